@@ -0,0 +1,105 @@
+"""Журнал действий редактора.
+
+Строки для окна копятся в кольцевом буфере фиксированного размера и
+выводятся пачками по таймеру GUI. Каждое сообщение (и отдельно каждая
+запись в PLC со старым и новым значением) пишется в файл с ротацией по
+размеру; запись в файл выполняет фоновый поток logging.QueueListener.
+"""
+import glob
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from collections import deque
+
+LOG_VIEW_LINES = 1000  # строк в окне лога
+LOG_FILE_SIZE = 1024 * 1024  # байт в одном файле журнала
+LOG_FILE_COUNT = 5  # сколько старых файлов журнала хранить
+
+
+class ActionLog:
+    """Кольцевой буфер строк для GUI + журнал на диске с ротацией."""
+
+    def __init__(self, path: str, view_lines: int = LOG_VIEW_LINES,
+                 max_bytes: int = LOG_FILE_SIZE, backup_count: int = LOG_FILE_COUNT):
+        self.path = path
+        self.lines = deque(maxlen=view_lines)
+        self._pending = deque(maxlen=view_lines)
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger('rh_editor.actions')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self._listener = None
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        except OSError:
+            # Нет прав на каталог журнала — работаем только с окном
+            self.logger.handlers = [logging.NullHandler()]
+            return
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        log_queue = queue.Queue()
+        self.logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+        self._listener = logging.handlers.QueueListener(log_queue, handler)
+        self._listener.start()
+
+    def add(self, message: str) -> None:
+        """Сообщение в окно (при следующем flush) и в журнал."""
+        with self._lock:
+            self.lines.append(message)
+            self._pending.append(message)
+        level = logging.ERROR if message.startswith('ОШИБКА') else logging.INFO
+        self.logger.log(level, message)
+
+    def record(self, message: str) -> None:
+        """Сообщение только в журнал (например, подробности записи в PLC)."""
+        self.logger.info(message)
+
+    def record_write(self, equip: dict, old_seconds, new_seconds, actual_seconds, status: str) -> None:
+        self.logger.warning(
+            f"WRITE {equip.get('eq_name', '')} PLC {equip.get('plc_name', '')} "
+            f"DB{equip.get('db_num')}.DBD{equip.get('db_addr')} old={old_seconds} new={new_seconds} "
+            f"readback={actual_seconds} status={status}")
+
+    def take_pending(self) -> tuple:
+        """Забрать строки, ещё не выведенные в окно.
+
+        Возвращает (lines, overflow): overflow — буфер переполнился между
+        вызовами, и окно нужно перерисовать целиком из self.lines.
+        """
+        with self._lock:
+            overflow = len(self._pending) == self._pending.maxlen
+            lines = list(self.lines) if overflow else list(self._pending)
+            self._pending.clear()
+        return lines, overflow
+
+    def files(self) -> list:
+        """Файлы журнала от старых к новым."""
+        backups = glob.glob(glob.escape(self.path) + '.*')
+        backups.sort(key=lambda name: int(name.rsplit('.', 1)[1]) if name.rsplit('.', 1)[1].isdigit() else 0,
+                     reverse=True)
+        return backups + ([self.path] if os.path.exists(self.path) else [])
+
+    def search(self, text: str, limit: int = 500) -> list:
+        """Последние limit строк журнала, содержащих text (без учёта регистра).
+
+        Файлы читаются построчно, в памяти держатся только найденные строки.
+        """
+        text = text.lower()
+        found = deque(maxlen=limit)
+        for path in self.files():
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    for line in f:
+                        if text in line.lower():
+                            found.append(line.rstrip('\n'))
+            except OSError:
+                continue
+        return list(found)
+
+    def close(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
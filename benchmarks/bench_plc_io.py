@@ -0,0 +1,188 @@
+"""Обмен с PLC на локальном симуляторе: подключение, одиночные чтение/запись, групповое чтение, снимок.
+
+Запуск (дисплей и реальные PLC не нужны):
+    python benchmarks/bench_plc_io.py [--repeat 50] [--latency 5 20] [--drop-rate 0.02] [-o result.json]
+
+Сначала измеряется прямое подключение к симулятору, затем те же операции
+через прокси с задержкой и с обрывами соединений. Результат печатается в
+JSON (время в миллисекундах), чтобы прогоны можно было сравнивать.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from editor_core import EQUIPS_FILE, PLC_FILE, EditorCore  # noqa: E402
+from plc_pool import PooledConnection  # noqa: E402
+from plc_sim import SIM_BASE_PORT, PLCSimulator, load_json_list  # noqa: E402
+
+
+def summarize(samples: list) -> dict:
+    """Статистика задержек в мс."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'min': round(ordered[0] * 1000, 3),
+        'median': round(statistics.median(ordered) * 1000, 3),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'max': round(ordered[-1] * 1000, 3),
+        'mean': round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def timed_samples(action, repeat: int) -> tuple:
+    """(задержки успешных вызовов, число ошибок)."""
+    samples = []
+    errors = 0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        try:
+            action()
+        except Exception:
+            errors += 1
+            continue
+        samples.append(time.perf_counter() - start_time)
+    return samples, errors
+
+
+def largest_plc(equips: list) -> str:
+    counts = {}
+    for eq in equips:
+        counts[eq.get('plc_name')] = counts.get(eq.get('plc_name'), 0) + 1
+    return max(counts, key=counts.get)
+
+
+def bench_connect(plc: dict, repeat: int) -> dict:
+    def connect():
+        connection = PooledConnection(plc['plc_name'], plc['plc_addr'], plc.get('rack', 0),
+                                      plc.get('slot', 1), plc['tcp_port'])
+        try:
+            connection.connect()
+        finally:
+            connection.drop()
+
+    samples, errors = timed_samples(connect, repeat)
+    return dict(summarize(samples), errors=errors)
+
+
+def bench_operations(core: EditorCore, simulator: PLCSimulator, repeat: int, deadline: float) -> dict:
+    """Одиночные чтение/запись, групповое чтение одного PLC и снимок всех PLC."""
+    plc_name = largest_plc(core.equips)
+    plc_equips = [eq for eq in core.equips if eq.get('plc_name') == plc_name]
+    equip = plc_equips[0]
+    value = simulator.values[equip['eq_name']]
+    result = {}
+
+    samples, errors = timed_samples(lambda: core.read_one(equip), repeat)
+    result['read_single'] = dict(summarize(samples), errors=errors)
+    # Запись того же значения: путь write_plc_data (чтение, запись, проверочное чтение)
+    samples, errors = timed_samples(lambda: core.write_one(equip, value), repeat)
+    result['write_single'] = dict(summarize(samples), errors=errors)
+
+    bulk = []
+    mismatches = failed = requests = 0
+    for _ in range(max(1, repeat // 10)):
+        start_time = time.perf_counter()
+        values, errors, stats = core.read(plc_equips)
+        bulk.append(time.perf_counter() - start_time)
+        failed += len(errors)
+        requests = stats.get(plc_name, {}).get('requests', 0)
+        mismatches += sum(1 for name, seconds in values.items() if simulator.values.get(name) != seconds)
+    result['bulk_read'] = dict(summarize(bulk), plc_name=plc_name, tags=len(plc_equips), requests=requests,
+                               tags_per_second=round(len(plc_equips) / statistics.median(bulk), 1),
+                               errors=failed, mismatches=mismatches)
+
+    start_time = time.perf_counter()
+    rows, plc_stats = core.snapshot(deadline=deadline)
+    elapsed = time.perf_counter() - start_time
+    ok = sum(1 for row in rows if row['seconds'] is not None)
+    result['fleet'] = {
+        'time': round(elapsed * 1000, 3),
+        'plcs': len(plc_stats),
+        'tags': len(rows),
+        'read': ok,
+        'tags_per_second': round(ok / elapsed, 1) if elapsed else None,
+        'statuses': {stats['plc_name']: stats['status'] for stats in plc_stats},
+    }
+    pool_stats = core.pool.stats()
+    result['pool'] = {key: pool_stats[key] for key in ('hits', 'misses', 'reconnects')}
+    return result
+
+
+def run_scenario(simulator: PLCSimulator, equips: list, repeat: int, deadline: float,
+                 latency: float = 0.0, drop_rate: float = 0.0) -> dict:
+    faults = bool(latency or drop_rate)
+    simulator.set_faults(latency, drop_rate)
+    drops_before = simulator.drops
+    core = EditorCore()
+    core.set_config(simulator.plc_configs(faults=faults), equips)
+    try:
+        plc = core.get_plc(largest_plc(equips))
+        result = {'latency_ms': latency * 1000, 'drop_rate': drop_rate, 'proxy': faults,
+                  'connect': bench_connect(plc, repeat)}
+        result.update(bench_operations(core, simulator, repeat, deadline))
+    finally:
+        core.close()
+        simulator.set_faults()
+    result['dropped_connections'] = simulator.drops - drops_before
+    return result
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plc-file', default=os.path.join(root, PLC_FILE))
+    parser.add_argument('--equips-file', default=os.path.join(root, EQUIPS_FILE))
+    parser.add_argument('--base-port', type=int, default=SIM_BASE_PORT)
+    parser.add_argument('--repeat', type=int, default=50, help='повторов одиночных операций')
+    parser.add_argument('--latency', type=float, nargs='*', default=[5.0, 20.0],
+                        help='сценарии задержки, мс в одну сторону')
+    parser.add_argument('--drop-rate', type=float, nargs='*', default=[0.02],
+                        help='сценарии обрывов: вероятность на пакет')
+    parser.add_argument('--deadline', type=float, default=30.0, help='дедлайн снимка, с')
+    parser.add_argument('-o', '--output', help='файл JSON (по умолчанию stdout)')
+    args = parser.parse_args()
+    # Ошибки соединения в сценариях с обрывами ожидаемы — не засоряем stderr
+    logging.getLogger('snap7').setLevel(logging.CRITICAL)
+
+    import snap7
+
+    plc_configs = load_json_list(args.plc_file, 'plc')
+    equips = load_json_list(args.equips_file, 'equips')
+    report = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'snap7': getattr(snap7, '__version__', ''),
+        'plcs': len(plc_configs),
+        'tags': len(equips),
+        'repeat': args.repeat,
+        'scenarios': {},
+    }
+    with PLCSimulator(plc_configs, equips, base_port=args.base_port) as simulator:
+        report['scenarios']['direct'] = run_scenario(simulator, equips, args.repeat, args.deadline)
+        for latency in args.latency:
+            report['scenarios'][f'latency_{latency:g}ms'] = run_scenario(
+                simulator, equips, args.repeat, args.deadline, latency=latency / 1000.0)
+        for drop_rate in args.drop_rate:
+            report['scenarios'][f'drop_{drop_rate:g}'] = run_scenario(
+                simulator, equips, args.repeat, args.deadline, drop_rate=drop_rate)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
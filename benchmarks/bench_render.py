@@ -0,0 +1,106 @@
+"""Время отрисовки таблицы оборудования: полная перестройка Treeview против VirtualTreeview.
+
+Запуск (нужен дисплей):
+    python benchmarks/bench_render.py [--rows 100000]
+
+Результат печатается в JSON: секунды на каждую операцию.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tkinter as tk
+from tkinter import ttk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from virtual_tree import VirtualTreeview  # noqa: E402
+
+COLUMNS = ('Tag', 'plc_name', 'db_num', 'db_addr', 'hours', 'age')
+
+
+def make_equips(count: int) -> list:
+    plcs = ['990', '991', '992', '993', '994', '995', '996', '997']
+    equips = [{
+        'eq_name': f"{i % 1000:03d}BM{i:06d}A01_MAINT20_MH",
+        'plc_name': plcs[i % len(plcs)],
+        'db_num': 6000 + i % 900,
+        'db_addr': 18 + 4 * (i % 8),
+    } for i in range(count)]
+    equips.sort(key=lambda eq: eq['eq_name'])
+    return equips
+
+
+def row_cells(eq) -> tuple:
+    return (eq['eq_name'], eq['plc_name'], eq['db_num'], eq['db_addr'], '', ''), ()
+
+
+def timed(root, action) -> float:
+    start_time = time.perf_counter()
+    action()
+    # Учитываем и отрисовку: ждём, пока Tk обработает все события
+    root.update()
+    return time.perf_counter() - start_time
+
+
+def bench_full_rebuild(root, equips: list, subset: list) -> dict:
+    """Старый update_table: удалить все строки и вставить весь список заново."""
+    tree = ttk.Treeview(root, columns=COLUMNS, show='headings')
+    tree.pack(fill=tk.BOTH, expand=True)
+
+    def rebuild(rows):
+        tree.delete(*tree.get_children())
+        for eq in rows:
+            tree.insert('', tk.END, values=row_cells(eq)[0])
+
+    result = {
+        'initial': timed(root, lambda: rebuild(equips)),
+        'filter': timed(root, lambda: rebuild(subset)),
+        'clear_filter': timed(root, lambda: rebuild(equips)),
+    }
+    tree.destroy()
+    return result
+
+
+def bench_virtual(root, equips: list, subset: list) -> dict:
+    table = VirtualTreeview(root, COLUMNS, row_cells)
+    table.frame.pack(fill=tk.BOTH, expand=True)
+    root.update()
+    result = {
+        'initial': timed(root, lambda: table.set_rows(equips)),
+        'filter': timed(root, lambda: table.set_rows(subset)),
+        'clear_filter': timed(root, lambda: table.set_rows(equips)),
+        'scroll_middle': timed(root, lambda: table.yview('moveto', 0.5)),
+        'scroll_page': timed(root, lambda: table.yview('scroll', 1, 'pages')),
+        'refresh_visible': timed(root, lambda: table.refresh()),
+        'materialized_rows': len(table.tree.get_children()),
+    }
+    table.frame.destroy()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--skip-full', action='store_true', help='не измерять полную перестройку (долго)')
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.geometry('800x600')
+    equips = make_equips(args.rows)
+    # Типичный фильтр по ЗИФ/тегу оставляет небольшую часть списка
+    subset = [eq for eq in equips if eq['eq_name'].startswith('12')]
+    report = {
+        'rows': args.rows,
+        'filtered_rows': len(subset),
+        'virtual': bench_virtual(root, equips, subset),
+    }
+    if not args.skip_full:
+        report['full_rebuild'] = bench_full_rebuild(root, equips, subset)
+    root.destroy()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""Локальный симулятор PLC на snap7.Server для измерений без доступа к производству.
+
+Для каждой записи plc.json запускается свой сервер snap7 на loopback-порту,
+DB заполняются значениями часов для оборудования из equips.json. Перед
+каждым сервером стоит TCP-прокси, которым можно добавить задержку и обрывы
+соединений (FaultProxy).
+
+Запуск отдельно (например, для rh_cli.py или GUI):
+    python benchmarks/plc_sim.py --write-plc-file sim_plc.json
+    python rh_cli.py --plc-file sim_plc.json read
+"""
+import argparse
+import ctypes
+import json
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from editor_core import EQUIPS_FILE, MAX_HOURS, PLC_FILE  # noqa: E402
+from plc_bulk import DINT_SIZE  # noqa: E402
+
+SIM_HOST = '127.0.0.1'
+SIM_BASE_PORT = 10200
+PROXY_BUFFER = 65536
+
+
+class FaultProxy:
+    """TCP-прокси с задержкой и случайными обрывами соединений.
+
+    latency — задержка каждого пакета в одну сторону (к круговой задержке
+    добавляется дважды), drop_rate — вероятность оборвать соединение на
+    очередном пакете. Параметры можно менять на ходу.
+    """
+
+    def __init__(self, target_port: int, host: str = SIM_HOST, latency: float = 0.0,
+                 drop_rate: float = 0.0, seed: int = 0):
+        self.host = host
+        self.target_port = target_port
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.drops = 0
+        self.port = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._sockets = set()
+        self._running = False
+
+    def start(self) -> None:
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((self.host, 0))
+        self._server.listen(16)
+        self.port = self._server.getsockname()[1]
+        self._running = True
+        threading.Thread(target=self._accept, name=f'proxy-{self.port}', daemon=True).start()
+
+    def _accept(self) -> None:
+        while self._running:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            try:
+                upstream = socket.create_connection((self.host, self.target_port))
+            except OSError:
+                client.close()
+                continue
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self._sockets.update((client, upstream))
+            threading.Thread(target=self._pump, args=(client, upstream), daemon=True).start()
+            threading.Thread(target=self._pump, args=(upstream, client), daemon=True).start()
+
+    def _should_drop(self) -> bool:
+        with self._lock:
+            return self.drop_rate > 0 and self._random.random() < self.drop_rate
+
+    def _close(self, *sockets) -> None:
+        for sock in sockets:
+            with self._lock:
+                self._sockets.discard(sock)
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _pump(self, source, target) -> None:
+        while True:
+            try:
+                data = source.recv(PROXY_BUFFER)
+            except OSError:
+                data = b''
+            if not data:
+                break
+            if self.latency:
+                time.sleep(self.latency)
+            if self._should_drop():
+                with self._lock:
+                    self.drops += 1
+                break
+            try:
+                target.sendall(data)
+            except OSError:
+                break
+        self._close(source, target)
+
+    def disconnect_all(self) -> None:
+        """Оборвать текущие соединения; новые подключения прокси принимает как обычно."""
+        with self._lock:
+            sockets = list(self._sockets)
+        self._close(*sockets)
+
+    def stop(self) -> None:
+        self._running = False
+        if self._server is not None:
+            self._server.close()
+        self.disconnect_all()
+
+
+def simulated_seconds(eq_name: str, seed: int = 0) -> int:
+    """Детерминированное значение часов (в секундах) для тега."""
+    return random.Random(f"{seed}:{eq_name}").randrange(0, MAX_HOURS * 3600)
+
+
+class PLCSimulator:
+    """Серверы snap7 по одному на PLC из plc_configs с данными equips."""
+
+    def __init__(self, plc_configs: list, equips: list, base_port: int = SIM_BASE_PORT,
+                 host: str = SIM_HOST, seed: int = 0):
+        self.source_configs = plc_configs
+        self.equips = equips
+        self.base_port = base_port
+        self.host = host
+        self.seed = seed
+        self.values = {}  # eq_name -> записанное в DB значение
+        self.servers = {}  # plc_name -> snap7.server.Server
+        self.proxies = {}  # plc_name -> FaultProxy
+        self.ports = {}
+        self._buffers = {}  # (plc_name, db_num) -> ctypes-буфер области DB (держим ссылку)
+
+    def _db_sizes(self) -> dict:
+        sizes = {}
+        for eq in self.equips:
+            if eq.get('db_num') is None or eq.get('db_addr') is None:
+                continue
+            key = (eq.get('plc_name'), eq['db_num'])
+            sizes[key] = max(sizes.get(key, 0), eq['db_addr'] + DINT_SIZE)
+        return sizes
+
+    def start(self) -> None:
+        import snap7.server
+        from snap7.type import SrvArea
+
+        sizes = self._db_sizes()
+        for index, plc in enumerate(self.source_configs):
+            plc_name = plc.get('plc_name')
+            server = snap7.server.Server(log=False)
+            for (db_plc, db_num), size in sizes.items():
+                if db_plc == plc_name:
+                    buffer = (ctypes.c_uint8 * size)()
+                    self._buffers[(plc_name, db_num)] = buffer
+                    server.register_area(SrvArea.DB, db_num, buffer)
+            port = self.base_port + index
+            server.start_to(self.host, port)
+            self.servers[plc_name] = server
+            self.ports[plc_name] = port
+            proxy = FaultProxy(port, self.host, seed=self.seed + index)
+            proxy.start()
+            self.proxies[plc_name] = proxy
+        for eq in self.equips:
+            buffer = self._buffers.get((eq.get('plc_name'), eq.get('db_num')))
+            if buffer is None or eq.get('db_addr') is None:
+                continue
+            value = simulated_seconds(eq.get('eq_name', ''), self.seed)
+            struct.pack_into('>i', buffer, eq['db_addr'], value)
+            self.values[eq.get('eq_name', '')] = value
+
+    def set_faults(self, latency: float = 0.0, drop_rate: float = 0.0) -> None:
+        """Задержка (секунд в одну сторону) и вероятность обрыва для всех прокси."""
+        for proxy in self.proxies.values():
+            proxy.latency = latency
+            proxy.drop_rate = drop_rate
+
+    @property
+    def drops(self) -> int:
+        return sum(proxy.drops for proxy in self.proxies.values())
+
+    def plc_configs(self, faults: bool = False) -> list:
+        """Копия plc.json с адресами симулятора: напрямую или через прокси с отказами."""
+        configs = []
+        for plc in self.source_configs:
+            plc_name = plc.get('plc_name')
+            if plc_name not in self.servers:
+                continue
+            port = self.proxies[plc_name].port if faults else self.ports[plc_name]
+            configs.append(dict(plc, plc_addr=self.host, tcp_port=port))
+        return configs
+
+    def stop(self) -> None:
+        for proxy in self.proxies.values():
+            proxy.stop()
+        for server in self.servers.values():
+            server.stop()
+            server.destroy()
+        self.proxies.clear()
+        self.servers.clear()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def load_json_list(path: str, key: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get(key, [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument('--plc-file', default=os.path.join(root, PLC_FILE))
+    parser.add_argument('--equips-file', default=os.path.join(root, EQUIPS_FILE))
+    parser.add_argument('--base-port', type=int, default=SIM_BASE_PORT)
+    parser.add_argument('--latency', type=float, default=0.0, help='мс задержки в одну сторону (через прокси)')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='вероятность обрыва на пакет (через прокси)')
+    parser.add_argument('--write-plc-file', help='сохранить plc.json для подключения к симулятору')
+    args = parser.parse_args()
+
+    simulator = PLCSimulator(load_json_list(args.plc_file, 'plc'), load_json_list(args.equips_file, 'equips'),
+                             base_port=args.base_port)
+    with simulator:
+        faults = bool(args.latency or args.drop_rate)
+        simulator.set_faults(args.latency / 1000.0, args.drop_rate)
+        configs = simulator.plc_configs(faults=faults)
+        if args.write_plc_file:
+            with open(args.write_plc_file, 'w', encoding='utf-8') as f:
+                json.dump({'plc': configs}, f, ensure_ascii=False, indent=2)
+        for plc in configs:
+            print(f"PLC {plc['plc_name']}: {plc['plc_addr']}:{plc['tcp_port']}")
+        print(f"Тегов: {len(simulator.values)}. Ctrl+C — остановить.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
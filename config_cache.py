@@ -0,0 +1,106 @@
+"""Кэш разобранных файлов конфигурации (plc.json, equips.json).
+
+Содержимое JSON-файлов сохраняется в один бинарный файл marshal вместе с
+отметками исходников (mtime, размер, SHA-1). При запуске кэш читается одним
+чтением; если mtime и размер файла не изменились, JSON не разбирается. Если
+изменился только mtime (файл скопировали заново), сверяется хеш содержимого.
+"""
+import hashlib
+import json
+import marshal
+import os
+import sys
+
+CACHE_VERSION = 1
+# Файлы хешируются кусками: большие (Points.xlsx, базы ECS) не читаются в память целиком
+HASH_CHUNK = 1 << 20
+# Формат marshal зависит от версии Python — кэш другой версии не читаем
+CACHE_TAG = (CACHE_VERSION, marshal.version, sys.version_info[:2])
+
+
+def file_stamp(path: str) -> tuple:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_sha1(path) -> str:
+    """SHA-1 содержимого файла, читаемого кусками."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_json(path: str):
+    """Разобранный JSON-файл или None, если файла нет."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ConfigCache:
+    """Разобранные JSON-файлы sources (имя -> путь) с кэшем в cache_path."""
+
+    def __init__(self, cache_path: str, sources: dict):
+        self.cache_path = cache_path
+        self.sources = sources
+        self.hits = []  # имена, взятые из кэша без разбора JSON
+        self.parsed = []  # имена, разобранные заново
+
+    def _read_cache(self) -> dict:
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cache = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return {}
+        if not isinstance(cache, dict) or cache.get('tag') != CACHE_TAG:
+            return {}
+        return cache.get('files', {})
+
+    def _write_cache(self, files: dict) -> None:
+        tmp_path = self.cache_path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(marshal.dumps({'tag': CACHE_TAG, 'files': files}))
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # Кэш — только ускорение: без прав на запись просто читаем JSON
+            pass
+
+    def load(self) -> dict:
+        """Данные файлов: имя -> разобранный JSON или None, если файла нет.
+
+        Ошибки разбора JSON пробрасываются, как при обычном json.load.
+        """
+        cached = self._read_cache()
+        files = {}
+        result = {}
+        changed = False
+        for name, path in self.sources.items():
+            if not os.path.exists(path):
+                result[name] = None
+                changed = changed or name in cached
+                continue
+            stamp = file_stamp(path)
+            entry = cached.get(name)
+            if entry is not None and entry['path'] == path and entry['stamp'] == stamp:
+                files[name] = entry
+                result[name] = entry['data']
+                self.hits.append(name)
+                continue
+            digest = file_sha1(path)
+            if entry is not None and entry['path'] == path and entry['hash'] == digest:
+                data = entry['data']
+                self.hits.append(name)
+            else:
+                data = read_json(path)
+                self.parsed.append(name)
+            files[name] = {'path': path, 'stamp': stamp, 'hash': digest, 'data': data}
+            result[name] = data
+            changed = True
+        if changed:
+            self._write_cache(files)
+        return result
@@ -0,0 +1,242 @@
+"""Ядро редактора часов без GUI.
+
+Конфигурация (plc.json, equips.json через кэш), индекс оборудования, пул
+соединений и операции чтения/записи/снимка. Используется и окном
+MHEditor, и консольной утилитой rh_cli.py, поэтому соединения и групповое
+чтение у них одинаковые.
+"""
+import fnmatch
+import os
+import sqlite3
+import sys
+
+from config_cache import ConfigCache, read_json
+from equip_index import ALL_ZIFS, EquipIndex
+from history_store import HistoryStore
+from plc_bulk import bulk_read, read_plc_values
+from plc_bulk_write import STATUS_DRY_RUN, STATUS_MISMATCH, STATUS_OK, bulk_write
+from plc_fleet import SNAPSHOT_DEADLINE, FleetSnapshot
+from plc_metrics import PLCMetrics
+from plc_pool import PLCPool
+from plc_worker import RequestCancelled
+from value_cache import CACHE_SIZE, CACHE_TTL
+
+EQUIPS_FILE = 'equips.json'
+PLC_FILE = 'plc.json'
+CONFIG_CACHE_FILE = os.path.join('cache', 'config.bin')
+HISTORY_FILE = 'history.sqlite'
+MAX_HOURS = 20000
+
+
+def resource_path(relative_path):
+    """Получить абсолютный путь к ресурсу (для dev и PyInstaller)."""
+    if hasattr(sys, '_MEIPASS'):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+
+def app_path(relative_path):
+    """Путь к изменяемым файлам (журнал): рядом с exe, а не во временном _MEIPASS."""
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+
+class EditorCore:
+    """Конфигурация и операции с PLC, общие для GUI и командной строки.
+
+    Методы чтения и записи блокирующие: GUI вызывает их в потоках PLCWorker,
+    CLI — напрямую. request — объект с check_cancelled/progress/log
+    (PLCRequest) или None.
+    """
+
+    def __init__(self, log=None, plc_file: str = None, equips_file: str = None, use_cache: bool = True,
+                 history_path: str = None):
+        self.log = log or (lambda message: None)
+        self.plc_file = plc_file or resource_path(PLC_FILE)
+        self.equips_file = equips_file or resource_path(EQUIPS_FILE)
+        self.use_cache = use_cache
+        self.plc_configs = []
+        self.equips = []
+        self.equip_index = EquipIndex([], [])
+        self.problems = []  # сообщения о недоступных файлах конфигурации
+        # Кэш прочитанных значений окна (необязательный раздел value_cache в plc.json)
+        self.value_cache_ttl = CACHE_TTL
+        self.value_cache_size = CACHE_SIZE
+        self.cache_info = {}
+        self.metrics = PLCMetrics()
+        self.pool = PLCPool([], log=self.log, metrics=self.metrics)
+        # История чтений и записей (history_store); None — не сохранять
+        self.history = HistoryStore(history_path) if history_path else None
+
+    # --- Конфигурация ---
+    def load(self) -> None:
+        """Прочитать plc.json и equips.json; без изменений в файлах — из бинарного кэша."""
+        sources = {'plc': self.plc_file, 'equips': self.equips_file}
+        if self.use_cache:
+            cache = ConfigCache(app_path(CONFIG_CACHE_FILE), sources)
+            data = cache.load()
+            self.cache_info = {'config_cache_hits': len(cache.hits), 'config_parsed': len(cache.parsed)}
+        else:
+            data = {name: read_json(path) for name, path in sources.items()}
+        self.problems = [f'Файл {sources[name]} не найден!' for name in sources if data[name] is None]
+        self.load_value_cache_settings((data['plc'] or {}).get('value_cache') or {})
+        self.set_config((data['plc'] or {}).get('plc', []), (data['equips'] or {}).get('equips', []))
+
+    def load_value_cache_settings(self, settings: dict) -> None:
+        """Срок свежести (ttl, секунд) и размер (max_size) кэша значений из plc.json.
+
+        Неверное или отсутствующее значение заменяется значением по умолчанию.
+        """
+        ttl = settings.get('ttl', CACHE_TTL)
+        if isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or ttl <= 0:
+            self.log(f"ОШИБКА: value_cache.ttl = {ttl!r} в plc.json, используется {CACHE_TTL:.0f} с")
+            ttl = CACHE_TTL
+        max_size = settings.get('max_size', CACHE_SIZE)
+        if isinstance(max_size, bool) or not isinstance(max_size, int) or max_size <= 0:
+            self.log(f"ОШИБКА: value_cache.max_size = {max_size!r} в plc.json, используется {CACHE_SIZE}")
+            max_size = CACHE_SIZE
+        self.value_cache_ttl = float(ttl)
+        self.value_cache_size = max_size
+
+    def set_config(self, plc_configs: list, equips: list) -> None:
+        """Задать конфигурацию без файлов (симулятор, тесты); пул создаётся заново."""
+        self.plc_configs = plc_configs
+        self.equips = equips
+        self.equip_index = EquipIndex(self.equips, self.plc_configs)
+        self.pool.close_all()
+        self.pool = PLCPool(self.plc_configs, log=self.log, metrics=self.metrics)
+
+    def zif_values(self) -> list:
+        """Уникальные значения zif из plc.json."""
+        zifs = {str(plc.get('zif')) for plc in self.plc_configs if plc.get('zif') is not None}
+        return sorted(zifs, key=lambda x: int(x))
+
+    def get_plc(self, plc_name: str):
+        for plc in self.plc_configs:
+            if plc.get('plc_name') == plc_name:
+                return plc
+        return None
+
+    def find_equip(self, eq_name: str):
+        for eq in self.equips:
+            if eq.get('eq_name') == eq_name:
+                return eq
+        return None
+
+    def select(self, zif=ALL_ZIFS, pattern: str = '', plc_names=None) -> list:
+        """Оборудование ЗИФ zif, отсортированное по eq_name.
+
+        pattern — подстрока тега или маска с * и ? (без учёта регистра);
+        plc_names — ограничить списком PLC.
+        """
+        pattern = (pattern or '').strip()
+        zif = ALL_ZIFS if zif in (None, '') else zif
+        if any(char in pattern for char in '*?['):
+            mask = pattern.lower()
+            equips = [eq for eq in self.equip_index.search('', zif)
+                      if fnmatch.fnmatchcase(str(eq.get('eq_name', '')).lower(), mask)]
+        else:
+            equips = self.equip_index.search(pattern, zif)
+        if plc_names:
+            plc_names = set(plc_names)
+            equips = [eq for eq in equips if eq.get('plc_name') in plc_names]
+        return equips
+
+    # --- История ---
+    def record_values(self, values: dict) -> None:
+        """Сохранить прочитанные значения (eq_name -> seconds) в историю."""
+        if self.history is None or not values:
+            return
+        try:
+            self.history.record_many(values.items())
+        except sqlite3.Error as e:
+            # История не должна мешать работе с PLC
+            self.log(f"ОШИБКА записи истории: {e}")
+
+    def record_write(self, eq_name: str, old_seconds, new_seconds: int, actual_seconds, status: str) -> None:
+        if self.history is None:
+            return
+        try:
+            self.history.record_write(eq_name, old_seconds, new_seconds, actual_seconds, status)
+        except sqlite3.Error as e:
+            self.log(f"ОШИБКА записи истории: {e}")
+
+    # --- Операции с PLC ---
+    def read_one(self, equip: dict, request=None) -> int:
+        """Прочитать DINT одного оборудования."""
+        value = self._read_value(equip, request)
+        self.record_values({equip.get('eq_name', ''): value})
+        return value
+
+    def _read_value(self, equip: dict, request=None, cancellable: bool = True) -> int:
+        log = request.log if request is not None else self.log
+        values, errors, _ = read_plc_values(self.pool, equip.get('plc_name', ''), [equip],
+                                            log=log, request=request if cancellable else None)
+        tag = equip.get('eq_name', '')
+        if tag not in values:
+            raise RuntimeError(errors.get(tag, 'нет данных'))
+        return values[tag]
+
+    def read(self, equips: list, request=None) -> tuple:
+        """Групповое чтение: (values, errors, stats), см. plc_bulk.bulk_read."""
+        log = request.log if request is not None else self.log
+        values, errors, stats = bulk_read(self.pool, equips, log=log, request=request)
+        self.record_values(values)
+        return values, errors, stats
+
+    def write_one(self, equip: dict, seconds: int, request=None) -> tuple:
+        """Записать DINT и прочитать обратно. Возвращает (old_value, actual_value).
+
+        old_value — значение до записи (None, если его не удалось прочитать).
+        """
+        from snap7.util import set_dint
+
+        if self.get_plc(equip.get('plc_name', '')) is None:
+            raise LookupError(f"Не найдены параметры PLC для '{equip.get('plc_name', '')}' в plc.json")
+        log = request.log if request is not None else self.log
+        data = bytearray(4)
+        set_dint(data, 0, seconds)
+        try:
+            old_value = self.read_one(equip, request)
+        except RequestCancelled:
+            raise
+        except Exception:
+            old_value = None
+        self.pool.run(equip.get('plc_name', ''),
+                      lambda client: client.db_write(equip['db_num'], equip['db_addr'], data))
+        log(f"УСПЕХ: Записано {seconds} сек ({seconds / 3600.0:.2f} ч) в {equip.get('eq_name', '')}")
+        # Проверка на том же соединении из пула; запись уже выполнена, поэтому без отмены
+        actual_value = self._read_value(equip, request, cancellable=False)
+        self.record_write(equip.get('eq_name', ''), old_value, seconds, actual_value,
+                          STATUS_OK if actual_value == seconds else STATUS_MISMATCH)
+        return old_value, actual_value
+
+    def write_rows(self, rows: list, dry_run: bool = False, rollback: bool = True, request=None) -> list:
+        """Групповая запись строк CSV, см. plc_bulk_write.bulk_write."""
+        log = request.log if request is not None else self.log
+        report = bulk_write(self.pool, rows, dry_run=dry_run, rollback=rollback, log=log, request=request)
+        self.record_values({row['eq_name']: row['old_seconds'] for row in report if row['old_seconds'] is not None})
+        for row in report:
+            if row['status'] != STATUS_DRY_RUN:
+                self.record_write(row['eq_name'], row['old_seconds'], row['new_seconds'],
+                                  row['actual_seconds'], row['status'])
+        return report
+
+    def snapshot(self, zif=None, equips: list = None, deadline: float = SNAPSHOT_DEADLINE,
+                 request=None, on_rows=None) -> tuple:
+        """Параллельный снимок по PLC, см. plc_fleet.FleetSnapshot.run."""
+        snapshot = FleetSnapshot(self.pool, self.plc_configs, self.equips if equips is None else equips,
+                                 log=self.log)
+        rows, plc_stats = snapshot.run(zif, deadline=deadline, request=request, on_rows=on_rows)
+        self.record_values({row['eq_name']: row['seconds'] for row in rows if row['seconds'] is not None})
+        return rows, plc_stats
+
+    def close(self) -> None:
+        self.pool.close_all()
+        if self.history is not None:
+            self.history.close()
@@ -0,0 +1,75 @@
+"""Индекс оборудования для быстрой фильтрации по ЗИФ и подстроке тега.
+
+Строится один раз при загрузке equips.json: оборудование заранее
+отсортировано по eq_name, для каждой ЗИФ известен список строк, а по
+триграммам имён в нижнем регистре строится инвертированный индекс.
+Результаты фильтра всегда возвращаются в отсортированном порядке.
+"""
+from array import array
+from collections import defaultdict
+
+NGRAM = 3
+ALL_ZIFS = 'Все'
+
+
+def name_ngrams(name: str) -> set:
+    return {name[i:i + NGRAM] for i in range(len(name) - NGRAM + 1)}
+
+
+class EquipIndex:
+    """Сортированный список оборудования с индексами по ЗИФ и n-граммам имени."""
+
+    def __init__(self, equips: list, plc_configs: list):
+        self.equips = sorted(equips, key=lambda eq: str(eq.get('eq_name', '')))
+        self.names = [str(eq.get('eq_name', '')).lower() for eq in self.equips]
+        plc_zif = {plc.get('plc_name'): str(plc.get('zif')) for plc in plc_configs if plc.get('zif') is not None}
+        self.zif_plcs = defaultdict(set)
+        for plc_name, zif in plc_zif.items():
+            self.zif_plcs[zif].add(plc_name)
+        self.row_zifs = [plc_zif.get(eq.get('plc_name')) for eq in self.equips]
+        self.zif_rows = defaultdict(lambda: array('i'))
+        self.ngrams = defaultdict(lambda: array('i'))
+        for pos, (name, zif) in enumerate(zip(self.names, self.row_zifs)):
+            if zif is not None:
+                self.zif_rows[zif].append(pos)
+            for gram in name_ngrams(name):
+                self.ngrams[gram].append(pos)
+        self._last_key = None
+        self._last_rows = None
+
+    def __len__(self):
+        return len(self.equips)
+
+    def _base_rows(self, zif: str):
+        if zif == ALL_ZIFS:
+            return range(len(self.equips))
+        return self.zif_rows.get(zif, ())
+
+    def _search_rows(self, text: str, zif: str):
+        # Новый фильтр уточняет предыдущий — сужаем прошлый результат вместо полного поиска
+        if self._last_key is not None:
+            last_zif, last_text = self._last_key
+            if last_zif == zif and last_text and last_text in text:
+                return [pos for pos in self._last_rows if text in self.names[pos]]
+        if not text:
+            return list(self._base_rows(zif))
+        if len(text) >= NGRAM:
+            # Кандидаты — самый короткий список позиций среди n-грамм запроса
+            postings = [self.ngrams.get(gram, ()) for gram in name_ngrams(text)]
+            candidates = min(postings, key=len)
+        else:
+            candidates = self._base_rows(zif)
+        names = self.names
+        if zif == ALL_ZIFS:
+            return [pos for pos in candidates if text in names[pos]]
+        row_zifs = self.row_zifs
+        return [pos for pos in candidates if row_zifs[pos] == zif and text in names[pos]]
+
+    def search(self, text: str = '', zif: str = ALL_ZIFS) -> list:
+        """Оборудование ЗИФ zif ('Все' — любой), eq_name которого содержит text."""
+        text = text.strip().lower()
+        zif = str(zif)
+        rows = self._search_rows(text, zif)
+        self._last_key = (zif, text)
+        self._last_rows = rows
+        return [self.equips[pos] for pos in rows]
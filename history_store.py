@@ -0,0 +1,287 @@
+"""История часов оборудования в SQLite.
+
+Каждое чтение и запись сохраняются, но не построчно: подряд идущие чтения
+одного тега, лежащие на одной прямой (значение не меняется или растёт с
+постоянной скоростью, пока агрегат работает), сливаются в один отрезок
+(ts_start, value_start) — (ts_end, value_end) со счётчиком отсчётов.
+Промежуточные значения восстанавливаются интерполяцией с погрешностью не
+больше tolerance секунд. Поэтому месяцы опроса раз в минуту занимают
+несколько отрезков на агрегат, а запросы идут по индексу (eq_name, ts_start).
+"""
+import sqlite3
+import threading
+import time
+
+HISTORY_TOLERANCE = 60  # секунд счётчика: допустимое отклонение отсчёта от прямой отрезка
+SECONDS_PER_DAY = 86400.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    eq_name TEXT NOT NULL,
+    ts_start REAL NOT NULL,
+    value_start INTEGER NOT NULL,
+    ts_end REAL NOT NULL,
+    value_end INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    PRIMARY KEY (eq_name, ts_start)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS latest (
+    eq_name TEXT PRIMARY KEY,
+    ts_start REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    eq_name TEXT NOT NULL,
+    ts REAL NOT NULL,
+    old_seconds INTEGER,
+    new_seconds INTEGER NOT NULL,
+    actual_seconds INTEGER,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS writes_eq_ts ON writes (eq_name, ts);
+"""
+
+
+class Run:
+    """Открытый (последний) отрезок истории тега."""
+
+    __slots__ = ('ts_start', 'value_start', 'ts_end', 'value_end', 'samples', 'slope_min', 'slope_max')
+
+    def __init__(self, ts_start, value_start, ts_end=None, value_end=None, samples=1, tolerance=0.0):
+        self.ts_start = ts_start
+        self.value_start = value_start
+        self.ts_end = ts_start if ts_end is None else ts_end
+        self.value_end = value_start if value_end is None else value_end
+        self.samples = samples
+        # Допустимые наклоны прямой из начала отрезка, при которых все отсчёты
+        # остаются в пределах tolerance. Для отрезка из базы границы известны
+        # только по его концу.
+        self.slope_min = 0.0
+        self.slope_max = 1.0  # счётчик часов не растёт быстрее времени
+        if self.ts_end > self.ts_start:
+            self._narrow(self.ts_end, self.value_end, tolerance)
+
+    def _narrow(self, ts: float, value: int, tolerance: float) -> None:
+        elapsed = ts - self.ts_start
+        self.slope_min = max(self.slope_min, (value - tolerance - self.value_start) / elapsed)
+        self.slope_max = min(self.slope_max, (value + tolerance - self.value_start) / elapsed)
+
+    def accepts(self, ts: float, value: int, tolerance: float) -> bool:
+        """Прямая от начала отрезка до отсчёта проходит в пределах tolerance от всех прежних отсчётов."""
+        if ts <= self.ts_end or value < self.value_end:
+            return False
+        slope = (value - self.value_start) / (ts - self.ts_start)
+        return self.slope_min <= slope <= self.slope_max
+
+    def extend(self, ts: float, value: int, tolerance: float) -> None:
+        self._narrow(ts, value, tolerance)
+        self.ts_end = ts
+        self.value_end = value
+        self.samples += 1
+
+    def value_at(self, ts: float) -> float:
+        if ts <= self.ts_start or self.ts_end == self.ts_start:
+            return self.value_start
+        if ts >= self.ts_end:
+            return self.value_end
+        return self.value_start + (self.value_end - self.value_start) * (ts - self.ts_start) / (
+            self.ts_end - self.ts_start)
+
+
+class HistoryStore:
+    """История чтений и записей часов; методы потокобезопасны."""
+
+    def __init__(self, path: str, tolerance: float = HISTORY_TOLERANCE):
+        self.path = path
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        self._open = None  # eq_name -> Run, загружается при первой записи
+
+    def _load_open_runs(self) -> dict:
+        rows = self._db.execute(
+            'SELECT r.eq_name, r.ts_start, r.value_start, r.ts_end, r.value_end, r.samples '
+            'FROM latest l JOIN runs r ON r.eq_name = l.eq_name AND r.ts_start = l.ts_start')
+        return {row[0]: Run(*row[1:], tolerance=self.tolerance) for row in rows}
+
+    # --- Запись ---
+    def record_many(self, samples, ts: float = None) -> int:
+        """Добавить отсчёты (eq_name, seconds) или (eq_name, seconds, ts) одной транзакцией.
+
+        Возвращает число новых отрезков (остальные отсчёты продлили существующие).
+        """
+        now = time.time() if ts is None else ts
+        with self._lock:
+            if self._open is None:
+                self._open = self._load_open_runs()
+            inserts = []
+            updates = []
+            for sample in samples:
+                eq_name, value = sample[0], int(sample[1])
+                ts = sample[2] if len(sample) > 2 else now
+                run = self._open.get(eq_name)
+                if run is not None and run.accepts(ts, value, self.tolerance):
+                    run.extend(ts, value, self.tolerance)
+                    updates.append((ts, value, run.samples, eq_name, run.ts_start))
+                elif run is None or ts > run.ts_end:
+                    run = self._open[eq_name] = Run(ts, value)
+                    inserts.append((eq_name, ts, value))
+                # Отсчёт не новее открытого отрезка (повтор) — пропускаем
+            with self._db:
+                # Сначала новые отрезки: их могли продлить отсчёты из этой же пачки
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, 1)',
+                    [(eq_name, ts, value, ts, value) for eq_name, ts, value in inserts])
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO latest VALUES (?, ?)',
+                    [(eq_name, ts) for eq_name, ts, _ in inserts])
+                self._db.executemany(
+                    'UPDATE runs SET ts_end = ?, value_end = ?, samples = ? WHERE eq_name = ? AND ts_start = ?',
+                    updates)
+        return len(inserts)
+
+    def record_write(self, eq_name: str, old_seconds, new_seconds: int, actual_seconds, status: str,
+                     ts: float = None) -> None:
+        """Запись в PLC: строка журнала записей и новый отрезок с прочитанным обратно значением."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            with self._db:
+                self._db.execute('INSERT INTO writes VALUES (?, ?, ?, ?, ?, ?)',
+                                 (eq_name, ts, old_seconds, new_seconds, actual_seconds, status))
+            if self._open is None:
+                self._open = self._load_open_runs()
+            # Запись — разрыв: следующий отсчёт начнёт новый отрезок
+            self._open.pop(eq_name, None)
+        if actual_seconds is not None:
+            self.record_many([(eq_name, actual_seconds, ts)])
+
+    # --- Запросы ---
+    def latest(self) -> dict:
+        """eq_name -> (ts, seconds) последнего отсчёта."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT r.eq_name, r.ts_end, r.value_end '
+                'FROM latest l JOIN runs r ON r.eq_name = l.eq_name AND r.ts_start = l.ts_start').fetchall()
+        return {eq_name: (ts, value) for eq_name, ts, value in rows}
+
+    def value_at(self, eq_name: str, ts: float):
+        """(ts, seconds) ближайшего известного значения на момент ts или первого после него."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT ts_start, value_start, ts_end, value_end, samples FROM runs '
+                'WHERE eq_name = ? AND ts_start <= ? ORDER BY ts_start DESC LIMIT 1', (eq_name, ts)).fetchone()
+            if row is not None:
+                run = Run(*row)
+                return min(ts, run.ts_end), run.value_at(ts)
+            row = self._db.execute(
+                'SELECT ts_start, value_start FROM runs WHERE eq_name = ? AND ts_start > ? '
+                'ORDER BY ts_start LIMIT 1', (eq_name, ts)).fetchone()
+        return tuple(row) if row is not None else None
+
+    def series(self, eq_name: str, since: float = 0.0, until: float = None) -> list:
+        """Точки (ts, seconds) концов отрезков тега за период."""
+        until = time.time() if until is None else until
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT ts_start, value_start, ts_end, value_end FROM runs '
+                'WHERE eq_name = ? AND ts_end >= ? AND ts_start <= ? ORDER BY ts_start',
+                (eq_name, since, until)).fetchall()
+        points = []
+        for ts_start, value_start, ts_end, value_end in rows:
+            points.append((ts_start, value_start))
+            if ts_end != ts_start:
+                points.append((ts_end, value_end))
+        return points
+
+    def growth(self, days: float = 30, now: float = None) -> list:
+        """Наработка часов по каждому тегу за последние days суток.
+
+        Считается только рост счётчика: скачки из-за записи в PLC и сбросы
+        не учитываются. Строки: eq_name, from_ts, from_seconds, to_ts,
+        to_seconds, growth_hours, hours_per_day — по убыванию наработки.
+        """
+        now = time.time() if now is None else now
+        since = now - days * SECONDS_PER_DAY
+        with self._lock:
+            runs = self._db.execute(
+                'SELECT eq_name, ts_start, value_start, ts_end, value_end, samples FROM runs '
+                'WHERE ts_end >= ? ORDER BY eq_name, ts_start', (since,)).fetchall()
+            writes = {}
+            for eq_name, ts in self._db.execute('SELECT eq_name, ts FROM writes WHERE ts >= ?', (since,)):
+                writes.setdefault(eq_name, []).append(ts)
+        points = {}
+        for eq_name, *fields in runs:
+            run = Run(*fields)
+            tag_points = points.setdefault(eq_name, [])
+            ts_start = max(run.ts_start, since)
+            tag_points.append((ts_start, run.value_at(ts_start)))
+            if run.ts_end != ts_start:
+                tag_points.append((run.ts_end, run.value_end))
+        result = []
+        for eq_name, tag_points in points.items():
+            write_times = writes.get(eq_name, ())
+            growth = 0.0
+            for (prev_ts, prev_value), (ts, value) in zip(tag_points, tag_points[1:]):
+                if value > prev_value and not any(prev_ts < write_ts <= ts for write_ts in write_times):
+                    growth += value - prev_value
+            (from_ts, from_value), (to_ts, to_value) = tag_points[0], tag_points[-1]
+            span_days = (to_ts - from_ts) / SECONDS_PER_DAY
+            growth /= 3600.0
+            result.append({
+                'eq_name': eq_name,
+                'from_ts': from_ts,
+                'from_seconds': round(from_value),
+                'to_ts': to_ts,
+                'to_seconds': to_value,
+                'growth_hours': round(growth, 2),
+                'hours_per_day': round(growth / span_days, 3) if span_days > 0 else None,
+            })
+        result.sort(key=lambda row: row['growth_hours'], reverse=True)
+        return result
+
+    def forecast(self, max_hours: float, within_days: float, window_days: float = 30, now: float = None) -> list:
+        """Теги, которые при текущей скорости наработки достигнут max_hours за within_days суток.
+
+        Скорость — средняя за последние window_days суток. Строки growth() плюс
+        hours, days_left и eta (timestamp) — по возрастанию days_left.
+        """
+        now = time.time() if now is None else now
+        result = []
+        for row in self.growth(window_days, now):
+            hours = row['to_seconds'] / 3600.0
+            rate = row['hours_per_day']
+            if hours >= max_hours:
+                days_left = 0.0
+            elif rate:
+                days_left = (max_hours - hours) / rate - (now - row['to_ts']) / SECONDS_PER_DAY
+            else:
+                continue
+            if days_left <= within_days:
+                result.append(dict(row, hours=round(hours, 2), days_left=round(max(days_left, 0.0), 1),
+                                   eta=now + max(days_left, 0.0) * SECONDS_PER_DAY))
+        result.sort(key=lambda row: row['days_left'])
+        return result
+
+    def writes(self, eq_name: str = None, since: float = 0.0) -> list:
+        query = 'SELECT eq_name, ts, old_seconds, new_seconds, actual_seconds, status FROM writes WHERE ts >= ?'
+        params = [since]
+        if eq_name is not None:
+            query += ' AND eq_name = ?'
+            params.append(eq_name)
+        with self._lock:
+            rows = self._db.execute(query + ' ORDER BY ts', params).fetchall()
+        fields = ('eq_name', 'ts', 'old_seconds', 'new_seconds', 'actual_seconds', 'status')
+        return [dict(zip(fields, row)) for row in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            runs, samples = self._db.execute('SELECT COUNT(*), COALESCE(SUM(samples), 0) FROM runs').fetchone()
+            tags = self._db.execute('SELECT COUNT(*) FROM latest').fetchone()[0]
+            writes = self._db.execute('SELECT COUNT(*) FROM writes').fetchone()[0]
+        return {'tags': tags, 'runs': runs, 'samples': samples, 'writes': writes}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -1,43 +1,102 @@
+import time
+STARTED = time.perf_counter()  # до остальных импортов: их время входит в отчёт о запуске
+
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import argparse
 import json
 import os
-import sys
-import snap7
-from snap7.util import get_dint, set_dint
+from editor_core import HISTORY_FILE, MAX_HOURS, EditorCore, app_path, resource_path
+from plc_bulk_write import STATUS_OK, hours_to_seconds, load_write_csv, save_report
+from value_cache import ValueCache, format_age
+from plc_monitor import MONITOR_INTERVAL, PLCMonitor
+from virtual_tree import VirtualTreeview
+from action_log import ActionLog
+from plc_worker import PLCWorker
+from startup_timer import StartupTimer
 
 # --- Константы ---
-EQUIPS_FILE = 'equips.json'
-PLC_FILE = 'plc.json'
 VERSION = '1.0.0'
 RELEASE_DATE = '2024-05-25'
-MAX_HOURS = 20000
-
-def resource_path(relative_path):
-    """Получить абсолютный путь к ресурсу (для dev и PyInstaller)."""
-    if hasattr(sys, '_MEIPASS'):
-        base_path = sys._MEIPASS
-    else:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
+POOL_MAINTAIN_MS = 5000  # Период обслуживания пула соединений с PLC
+WORKER_POLL_MS = 100  # Период опроса очереди результатов фоновых запросов
+AGE_REFRESH_MS = 5000  # Период обновления возраста значений в таблице
+MONITOR_TICK_MS = 250  # Период проверки, какие PLC пора опросить в режиме монитора
+FILTER_DEBOUNCE_MS = 200  # Пауза после ввода в фильтр перед его применением
+LOG_FLUSH_MS = 200  # Период вывода накопленных строк лога в окно
+STATS_REFRESH_MS = 2000  # Период обновления панели статистики PLC
+METRICS_EXPORT_MS = 60000  # Период выгрузки метрик PLC в файлы
+LOG_FILE = os.path.join('logs', 'actions.log')
+# Метрики для Prometheus (node_exporter textfile collector) и в JSON
+METRICS_FILES = (os.path.join('metrics', 'rh_editor.prom'), os.path.join('metrics', 'rh_editor.json'))
+STATS_COLUMNS = (
+    ('plc_name', 'PLC', 70),
+    ('operations', 'Операций', 75),
+    ('errors', 'Ошибок', 60),
+    ('connect_p50', 'connect p50, мс', 100),
+    ('db_read_p95', 'db_read p95, мс', 100),
+    ('read_multi_vars_p95', 'multi p95, мс', 90),
+    ('db_write_p95', 'db_write p95, мс', 105),
+    ('bytes_in', 'Прочитано, Б', 90),
+    ('bytes_out', 'Записано, Б', 85),
+    ('last_error', 'Последняя ошибка', 250),
+)
 
 class MHEditor(tk.Tk):
     """Главное окно редактора часов техобслуживания."""
 
-    def __init__(self):
-        super().__init__()
-        self.title('Редактор часов тех обслуживания')
-        self._set_icon()
-        self.geometry('800x600')
-        self.equips = []
-        self.filtered_equips = []
+    def __init__(self, startup: StartupTimer = None, on_started=None):
+        self.startup = startup or StartupTimer()
+        self._on_started = on_started
+        with self.startup.stage('widgets'):
+            super().__init__()
+            self.title('Редактор часов тех обслуживания')
+            self._set_icon()
+            self.geometry('800x600')
+        # Лог создаётся первым: загрузка конфигурации пишет в него ещё до создания виджетов
+        self.action_log = ActionLog(app_path(LOG_FILE))
+        self.worker = PLCWorker(log=self.add_log)
+        # Операции ядра выполняются в потоках воркера, поэтому лог идёт через его очередь
+        self.core = EditorCore(log=self.worker.log, history_path=app_path(HISTORY_FILE))
+        self.filtered_equips = []  # всегда отсортирован по eq_name
+        self._filter_after = None
         self.selected_equip = None
-        self.plc_configs = self.load_plc_configs()
+        with self.startup.stage('config'):
+            self.load_config()
+        self.value_cache = ValueCache(ttl=self.core.value_cache_ttl, max_size=self.core.value_cache_size)
         self.selected_zif = None
 
-        self._create_widgets()
-        self.load_equips()
-        self.update_table()
+        with self.startup.stage('widgets'):
+            self._create_widgets()
+        self.monitor = PLCMonitor(self.core.pool)
+        self._monitor_after = None
+        with self.startup.stage('widgets'):
+            self.update_table()
+        self.protocol('WM_DELETE_WINDOW', self.on_close)
+        self.after(POOL_MAINTAIN_MS, self._maintain_pool)
+        self.after(WORKER_POLL_MS, self._poll_worker)
+        self.after(AGE_REFRESH_MS, self._refresh_ages)
+        self.after(LOG_FLUSH_MS, self._flush_log)
+        self.after(METRICS_EXPORT_MS, self._export_metrics)
+        self._stats_window = None
+        self.startup.begin('first_paint')
+        self.bind('<Map>', self._on_first_map)
+
+    def _on_first_map(self, event):
+        # <Map> приходит и от дочерних виджетов; нужен только сам корень
+        if event.widget is not self:
+            return
+        self.unbind('<Map>')
+        # Отрисовка выполняется в idle-обработчиках Tk — дожидаемся их
+        self.after_idle(self._on_first_paint)
+
+    def _on_first_paint(self):
+        self.update_idletasks()
+        self.startup.end('first_paint')
+        self.startup.finish()
+        self.add_log(self.startup.format())
+        if self._on_started:
+            self._on_started(self.startup.report())
 
     def _set_icon(self):
         """Установить иконку приложения."""
@@ -47,29 +106,25 @@ class MHEditor(tk.Tk):
         except Exception:
             pass  # Не критично для не-Windows систем
 
+    def on_close(self):
+        """Закрыть соединения с PLC и окно."""
+        self.worker.shutdown()
+        self.core.close()
+        self._write_metrics()
+        self.action_log.close()
+        self.destroy()
+
     # --- Работа с файлами конфигурации ---
-    def load_plc_configs(self):
-        """Загрузить конфигурацию PLC из файла."""
-        path = resource_path(PLC_FILE)
-        if not os.path.exists(path):
-            self.add_log(f'ОШИБКА: Файл {path} не найден!')
-            return []
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get('plc', [])
-
-    def load_equips(self):
-        """Загрузить список оборудования из файла."""
-        path = resource_path(EQUIPS_FILE)
-        if not os.path.exists(path):
-            self.add_log(f'ОШИБКА: Файл {path} не найден!')
-            self.equips = []
-            return
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            self.equips = data.get('equips', [])
-        self.filtered_equips = self.equips.copy()
-        self.add_log(f'Загружено {len(self.equips)} записей оборудования')
+    def load_config(self):
+        """Загрузить plc.json и список оборудования (через кэш ядра)."""
+        self.core.load()
+        self.worker.set_plc_count(len(self.core.plc_configs))
+        self.startup.info.update(self.core.cache_info)
+        for problem in self.core.problems:
+            self.add_log(f'ОШИБКА: {problem}')
+        self.filtered_equips = self.core.select()
+        if self.core.equips:
+            self.add_log(f'Загружено {len(self.core.equips)} записей оборудования')
 
     # --- UI ---
     def _create_widgets(self):
@@ -77,135 +132,368 @@ class MHEditor(tk.Tk):
         self._create_filter_frame()
         self._create_table()
         self._create_button_frame()
+        self._create_progress_frame()
         self._create_log_area()
 
     def add_log(self, message: str) -> None:
-        """Add message to log area"""
-        self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)  # Scroll to bottom
-        self.log_text.config(state=tk.DISABLED)
+        """Add message to log area (выводится пачкой в _flush_log) и в журнал"""
+        self.action_log.add(message)
+
+    def _flush_log(self):
+        """Вывести накопленные строки лога одной вставкой и обрезать окно до размера буфера."""
+        lines, overflow = self.action_log.take_pending()
+        if lines:
+            self.log_text.config(state=tk.NORMAL)
+            if overflow:
+                self.log_text.delete('1.0', tk.END)
+            self.log_text.insert(tk.END, '\n'.join(lines) + '\n')
+            # Строк больше, чем в кольцевом буфере — удаляем самые старые
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - self.action_log.lines.maxlen
+            if excess > 0:
+                self.log_text.delete('1.0', f'{excess + 1}.0')
+            self.log_text.see(tk.END)  # Scroll to bottom
+            self.log_text.config(state=tk.DISABLED)
+        self.after(LOG_FLUSH_MS, self._flush_log)
+
+    def search_log(self, event=None):
+        """Найти строки в журнале на диске (включая старые файлы ротации)."""
+        text = self.log_search_var.get().strip()
+        if not text:
+            return
+        self.worker.submit(
+            f"Поиск в журнале '{text}'", lambda request: self.action_log.search(text),
+            on_done=lambda lines: self._show_log_search(text, lines),
+            on_error=lambda e: self.add_log(f"ОШИБКА поиска в журнале: {e}"),
+        )
+
+    def _show_log_search(self, text, lines):
+        window = tk.Toplevel(self)
+        window.title(f"Журнал: '{text}' — найдено {len(lines)}")
+        window.geometry('800x400')
+        result_text = tk.Text(window, wrap=tk.NONE)
+        scrollbar = tk.Scrollbar(window, orient=tk.VERTICAL, command=result_text.yview)
+        result_text.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        result_text.pack(fill=tk.BOTH, expand=True)
+        result_text.insert(tk.END, '\n'.join(lines) if lines else 'Ничего не найдено')
+        result_text.config(state=tk.DISABLED)
 
     # --- Фильтрация и обновление таблицы ---
     def get_zif_values(self) -> list:
         # Получить уникальные значения zif из plc.json
-        zifs = set()
-        for plc in self.plc_configs:
-            zif = plc.get('zif')
-            if zif is not None:
-                zifs.add(str(zif))
-        return sorted(zifs, key=lambda x: int(x))
+        return self.core.zif_values()
 
     def on_zif_change(self, event=None):
         self.apply_filters()
 
     def on_filter_change(self, *args):
-        self.apply_filters()
+        # Фильтр применяется после паузы в наборе, а не на каждое нажатие
+        if self._filter_after is not None:
+            self.after_cancel(self._filter_after)
+        self._filter_after = self.after(FILTER_DEBOUNCE_MS, self.apply_filters)
 
     def apply_filters(self) -> None:
-        filter_text = self.filter_var.get().strip().lower()
-        selected_zif = self.zif_var.get()
-        # Фильтруем equips по Tag и zif
-        if selected_zif == 'Все':
-            equips = self.equips.copy()
-        else:
-            # Получаем plc_name, у которых zif совпадает
-            plc_names = [plc.get('plc_name') for plc in self.plc_configs if str(plc.get('zif')) == selected_zif]
-            equips = [eq for eq in self.equips if eq.get('plc_name') in plc_names]
-        if filter_text:
-            equips = [eq for eq in equips if filter_text in str(eq.get('eq_name', '')).lower()]
-        self.filtered_equips = equips
+        self._filter_after = None
+        # Фильтруем equips по Tag и zif через индекс (результат уже отсортирован)
+        self.filtered_equips = self.core.select(self.zif_var.get(), self.filter_var.get())
         self.update_table()
 
     def update_table(self) -> None:
-        self.tree.delete(*self.tree.get_children())
-        # Сортировка по Tag (eq_name) по возрастанию
-        sorted_equips = sorted(self.filtered_equips, key=lambda eq: str(eq.get('eq_name', '')))
-        for eq in sorted_equips:
-            values = (
-                eq.get('eq_name', ''),
-                eq.get('plc_name', ''),
-                eq.get('db_num', ''),
-                eq.get('db_addr', '')
-            )
-            self.tree.insert('', tk.END, values=values)
+        # filtered_equips уже отсортирован по Tag (eq_name) индексом; в Treeview
+        # создаются только видимые строки, остальные — при прокрутке
+        self.table.set_rows(self.filtered_equips)
+
+    def _row_cells(self, eq) -> tuple:
+        """Значения строки таблицы и теги оформления (устаревшее значение — серым)."""
+        cached = self.value_cache.get(eq)
+        hours = age = ''
+        tags = ()
+        if cached is not None:
+            seconds, cached_age = cached
+            hours = f"{seconds / 3600.0:.2f}"
+            age = format_age(cached_age)
+            if self.value_cache.is_stale(cached_age):
+                tags = ('stale',)
+        values = (
+            eq.get('eq_name', ''),
+            eq.get('plc_name', ''),
+            eq.get('db_num', ''),
+            eq.get('db_addr', ''),
+            hours,
+            age
+        )
+        return values, tags
+
+    def refresh_rows(self, equips=None) -> None:
+        """Обновить hours/age видимых строк из кэша на месте, не перестраивая таблицу (и выбор)."""
+        self.table.refresh(equips)
+
+    def _refresh_ages(self):
+        """Периодически обновлять возраст значений и пометку устаревших."""
+        self.refresh_rows()
+        self.after(AGE_REFRESH_MS, self._refresh_ages)
 
     # --- Выбор и действия с оборудованием ---
-    def on_select(self, event):
-        selection = self.tree.selection()
-        if selection:
-            item = self.tree.item(selection[0])
-            values = item['values']
-            self.add_log(f"Выбрано оборудование: {values[0]}")
-            # Find the selected equipment in filtered list
-            for eq in self.filtered_equips:
-                if eq.get('eq_name', '') == values[0]:
-                    self.selected_equip = eq
-                    break
-        else:
-            self.selected_equip = None
+    def on_select(self, equip):
+        self.add_log(f"Выбрано оборудование: {equip.get('eq_name', '')}")
+        self.selected_equip = equip
 
     def on_double_click(self, event):
         # Get the item under cursor
         item = self.tree.identify('item', event.x, event.y)
-        if item:
+        equip = self.table.item_equip(item)
+        if equip is not None:
             # Select the item first
-            self.tree.selection_set(item)
-            # Then read PLC data
-            self.read_plc_data()
+            self.table.select(equip)
+            # Then read PLC data (свежее значение из кэша — без обращения к PLC)
+            self.read_plc_data(force=False)
 
     # --- Работа с PLC ---
-    def get_plc_connection_params(self, plc_name):
-        for plc in self.plc_configs:
-            if plc.get('plc_name') == plc_name:
-                return plc.get('plc_addr'), plc.get('rack', 0), plc.get('slot', 1)
-        return None, 0, 1  # По умолчанию
-
-    def read_plc_data(self):
+    def _maintain_pool(self):
+        # Проверка соединений может ждать TCP-таймаута — выполняем её в фоне
+        self.worker.run_background(self.core.pool.maintain)
+        self.after(POOL_MAINTAIN_MS, self._maintain_pool)
+
+    def _write_metrics(self):
+        for path in METRICS_FILES:
+            try:
+                self.core.metrics.export(app_path(path))
+            except OSError as e:
+                self.worker.log(f"ОШИБКА выгрузки метрик в {path}: {e}")
+
+    def _export_metrics(self):
+        # Запись файлов — в фоне, чтобы не задерживать интерфейс
+        self.worker.run_background(self._write_metrics)
+        self.after(METRICS_EXPORT_MS, self._export_metrics)
+
+    def show_stats(self):
+        """Панель задержек, объёма данных и ошибок по каждому PLC."""
+        if self._stats_window is not None and self._stats_window.winfo_exists():
+            self._stats_window.lift()
+            return
+        window = tk.Toplevel(self)
+        window.title("Статистика PLC")
+        window.geometry('1050x260')
+        tree = ttk.Treeview(window, columns=[column for column, _, _ in STATS_COLUMNS], show='headings')
+        for column, title, width in STATS_COLUMNS:
+            tree.heading(column, text=title)
+            tree.column(column, width=width, anchor=tk.W if column == 'last_error' else tk.CENTER)
+        tree.tag_configure('errors', foreground='red')
+        tree.pack(fill=tk.BOTH, expand=True)
+        self._stats_window = window
+        self._refresh_stats(tree)
+
+    def _refresh_stats(self, tree):
+        if self._stats_window is None or not self._stats_window.winfo_exists():
+            self._stats_window = None
+            return
+        rows = self.core.metrics.summary()
+        names = {row['plc_name'] for row in rows}
+        stale = [item for item in tree.get_children() if item not in names]
+        if stale:
+            tree.delete(*stale)
+        for row in rows:
+            values = ['' if row.get(column) is None else row.get(column) for column, _, _ in STATS_COLUMNS]
+            tags = ('errors',) if row['errors'] else ()
+            if tree.exists(row['plc_name']):
+                tree.item(row['plc_name'], values=values, tags=tags)
+            else:
+                tree.insert('', tk.END, iid=row['plc_name'], values=values, tags=tags)
+        self.after(STATS_REFRESH_MS, lambda: self._refresh_stats(tree))
+
+    def _poll_worker(self):
+        """Забрать результаты и лог фоновых запросов к PLC."""
+        if self.worker.poll():
+            self._update_progress()
+        self.after(WORKER_POLL_MS, self._poll_worker)
+
+    def _update_progress(self):
+        active = [request for request in self.worker.active.values() if not request.background]
+        if not active:
+            self.progress_var.set('')
+            self.progress_bar['value'] = 0
+            self.cancel_button.config(state=tk.DISABLED)
+            return
+        parts = []
+        done = total = 0
+        for request in active:
+            if request.total:
+                parts.append(f"{request.title} {request.done}/{request.total}")
+                done += request.done
+                total += request.total
+            else:
+                parts.append(f"{request.title}...")
+        self.progress_var.set(f"Запросов: {len(active)} | " + '; '.join(parts))
+        self.progress_bar['value'] = 100.0 * done / total if total else 0
+        self.cancel_button.config(state=tk.NORMAL)
+
+    def cancel_requests(self):
+        count = self.worker.cancel_all()
+        self.add_log(f"Отмена запросов к PLC: {count}")
+
+    def _log_pool_stats(self):
+        stats = self.core.pool.stats()
+        self.add_log(f"Пул соединений: попаданий {stats['hits']}, подключений {stats['misses']}, "
+                     f"переподключений {stats['reconnects']}")
+
+    def _show_read_result(self, equip, dint_value, cached=False):
+        tag = equip.get('eq_name', '')
+        hours = dint_value / 3600.0
+        if cached:
+            self.add_log(f"Из кэша: {dint_value} сек ({hours:.2f} ч) для {tag}")
+        else:
+            self.add_log(f"Прочитано: {dint_value} сек ({hours:.2f} ч) из {tag}")
+            self.value_cache.put(equip, dint_value)
+        # Пока запрос выполнялся, могли выбрать другую строку — поля не трогаем
+        if self.selected_equip is equip:
+            self.result_entry.config(state="normal")
+            self.result_var.set(str(dint_value))
+            self.result_entry.config(state="readonly")
+            self.hours_var.set(f"{hours:.2f}")
+        if not cached:
+            self._log_pool_stats()
+        self.refresh_rows([equip])
+
+    def read_plc_data(self, force=True):
+        """Прочитать выбранное оборудование; force=False берёт свежее значение из кэша."""
         if not self.selected_equip:
             self.add_log("ПРЕДУПРЕЖДЕНИЕ: Выберите оборудование в таблице!")
             return
-        try:
-            # Create PLC client
-            client = snap7.client.Client()
-            # Получаем параметры подключения из plc.json по plc_name
-            plc_name = self.selected_equip.get('plc_name', '')
-            plc_addr, rack, slot = self.get_plc_connection_params(plc_name)
-            if not plc_addr:
-                self.add_log(f"ОШИБКА: Не найдены параметры PLC для '{plc_name}' в plc.json")
+        equip = self.selected_equip
+        if not force:
+            cached = self.value_cache.get_fresh(equip)
+            if cached is not None:
+                self._show_read_result(equip, cached, cached=True)
                 return
-            self.add_log(f"Подключение к PLC {plc_name} {plc_addr} (rack={rack}, slot={slot})...")
-            client.connect(plc_addr, rack, slot)
-            if client.get_connected():
-                # Read DINT value from DB
-                db_num = self.selected_equip['db_num']
-                db_addr = self.selected_equip['db_addr']
-                tag = self.selected_equip.get('eq_name', '')
-                self.add_log(f"Чтение DB{db_num}.DBD{db_addr} (Tag: {tag})...")
-                # Read 4 bytes (DINT = 32 bits = 4 bytes)
-                data = client.db_read(db_num, db_addr, 4)
-                # Convert to DINT
-                dint_value = get_dint(data, 0)
-                # Update result label
-                self.result_entry.config(state="normal")
-                self.result_var.set(str(dint_value))
-                self.result_entry.config(state="readonly")
-                # Convert seconds to hours and update hours field
-                hours = dint_value / 3600.0
-                self.hours_var.set(f"{hours:.2f}")
-                self.add_log(f"Прочитано: {dint_value} сек ({hours:.2f} ч) из {self.selected_equip['eq_name']}")
-                # Disconnect
-                client.disconnect()
-                self.add_log("Отключение от PLC")
-            else:
-                self.add_log(f"ОШИБКА: Не удалось подключиться к PLC {plc_addr}")
-        except Exception as e:
-            self.add_log(f"ОШИБКА при чтении данных: {str(e)}")
+        plc_name = equip.get('plc_name', '')
+        if not self.core.get_plc(plc_name):
+            self.add_log(f"ОШИБКА: Не найдены параметры PLC для '{plc_name}' в plc.json")
+            return
+        db_num = equip['db_num']
+        db_addr = equip['db_addr']
+        tag = equip.get('eq_name', '')
+        self.add_log(f"Чтение DB{db_num}.DBD{db_addr} (Tag: {tag})...")
+
+        # DINT (4 байта) читается тем же пакетным слоем, что и групповое чтение
+        self.worker.submit(
+            f"READ {tag}", lambda request: self.core.read_one(equip, request),
+            on_done=lambda value: self._show_read_result(equip, value),
+            on_error=lambda e: self.add_log(f"ОШИБКА при чтении данных: {str(e)}"),
+        )
+        self._update_progress()
+
+    def read_all_visible(self):
+        """Прочитать часы всех строк таблицы (с учётом фильтра) групповыми запросами."""
+        if not self.filtered_equips:
+            self.add_log("ПРЕДУПРЕЖДЕНИЕ: Таблица пуста!")
+            return
+        equips = list(self.filtered_equips)
+        self.add_log(f"Групповое чтение {len(equips)} записей...")
+
+        def on_done(result):
+            values, errors, stats = result
+            for eq in equips:
+                if eq.get('eq_name', '') in values:
+                    self.value_cache.put(eq, values[eq.get('eq_name', '')])
+            for plc_name, plc_stats in stats.items():
+                self.add_log(f"PLC {plc_name}: {plc_stats['tags']} тегов за {plc_stats['requests']} запросов, "
+                             f"{plc_stats['time'] * 1000:.0f} мс")
+            self.add_log(f"Прочитано {len(values)} из {len(equips)}, ошибок: {len(errors)}")
+            self._log_pool_stats()
+            self.refresh_rows(equips)
+
+        self.worker.submit(
+            "READ ALL", lambda request: self.core.read(equips, request), on_done=on_done,
+            on_error=lambda e: self.add_log(f"ОШИБКА группового чтения: {str(e)}"),
+        )
+        self._update_progress()
+
+    def fleet_snapshot(self):
+        """Прочитать часы всего оборудования выбранной ЗИФ (или всех) параллельно по PLC."""
+        zif = self.zif_var.get()
+
+        def on_done(result):
+            rows, plc_stats = result
+            for row in rows:
+                if row['seconds'] is not None:
+                    self.value_cache.put(row, row['seconds'])
+            for stats in plc_stats:
+                status = stats['status'] if not stats['error'] else f"{stats['status']}: {stats['error']}"
+                self.add_log(f"PLC {stats['plc_name']} (ЗИФ {stats['zif']}): {stats['tags']} тегов, "
+                             f"{stats['requests']} запросов, {stats['time'] * 1000:.0f} мс — {status}")
+            ok = sum(1 for row in rows if row['seconds'] is not None)
+            self.add_log(f"Снимок: прочитано {ok} из {len(rows)}")
+            self.refresh_rows()
+
+        self.worker.submit(
+            f"SNAPSHOT ЗИФ {zif}", lambda request: self.core.snapshot(zif, request=request), on_done=on_done,
+            on_error=lambda e: self.add_log(f"ОШИБКА снимка: {str(e)}"),
+        )
+        self._update_progress()
+
+    def toggle_monitor(self):
+        """Включить/выключить периодический опрос видимых строк."""
+        if self._monitor_after is not None:
+            self.after_cancel(self._monitor_after)
+            self._monitor_after = None
+        if self.monitor_var.get():
+            self.monitor.reset()
+            self.add_log("Монитор включён")
+            self._monitor_tick()
+        else:
+            self.add_log("Монитор выключен")
+
+    def _monitor_tick(self):
+        try:
+            self.monitor.interval = max(float(self.monitor_interval_var.get()), 0.5)
+        except ValueError:
+            pass
+        for plc_name, equips in self.monitor.due(self.filtered_equips).items():
+            self.worker.submit(
+                f"MONITOR {plc_name}",
+                lambda request, p=plc_name, eqs=equips: self._monitor_poll(p, eqs, request),
+                on_done=lambda result, p=plc_name, eqs=equips: self._on_monitor_result(p, eqs, result),
+                on_error=lambda e, p=plc_name: self._on_monitor_error(p, e),
+                background=True,
+            )
+        self._monitor_after = self.after(MONITOR_TICK_MS, self._monitor_tick)
+
+    def _monitor_poll(self, plc_name, equips, request):
+        """Опрос монитора в потоке воркера; значения сразу уходят в историю."""
+        result = self.monitor.poll(plc_name, equips, request)
+        self.core.record_values(result[0])
+        return result
+
+    def _on_monitor_result(self, plc_name, equips, result):
+        values, errors, elapsed = result
+        for eq in equips:
+            value = values.get(eq.get('eq_name', ''))
+            if value is not None:
+                self.value_cache.put(eq, value)
+        # Перерисовываются только строки, у которых изменились значения
+        self.refresh_rows(equips)
+        state = self.monitor.states[plc_name]
+        error = next(iter(errors.values()), '')
+        if error and not state.last_error:
+            self.add_log(f"Монитор: ошибки чтения PLC {plc_name}: {error}")
+        previous_backoff = state.backoff
+        self.monitor.complete(plc_name, elapsed, error)
+        # В лог пишем только смену режима, а не каждый опрос
+        if previous_backoff == 1 and state.backoff > 1 and not error:
+            self.add_log(f"Монитор: PLC {plc_name} отвечает медленно ({elapsed * 1000:.0f} мс), "
+                         f"интервал увеличен")
+
+    def _on_monitor_error(self, plc_name, error):
+        state = self.monitor.states[plc_name]
+        if not state.last_error:
+            self.add_log(f"Монитор: PLC {plc_name} недоступен: {error}, опрос реже")
+        self.monitor.complete(plc_name, 0.0, str(error) or 'error')
 
     def write_plc_data(self):
         if not self.selected_equip:
             self.add_log("ПРЕДУПРЕЖДЕНИЕ: Выберите оборудование в таблице!")
             return
+        equip = self.selected_equip
         try:
             # Get hours value and convert to seconds
             hours_str = self.hours_var.get().strip()
@@ -213,45 +501,118 @@ class MHEditor(tk.Tk):
                 self.add_log("ПРЕДУПРЕЖДЕНИЕ: Введите значение в поле 'Часы'!")
                 return
             hours = float(hours_str)
-            if not (0 <= hours <= MAX_HOURS):
-                self.add_log(f"ПРЕДУПРЕЖДЕНИЕ: Значение часов должно быть от 0 до {MAX_HOURS}!")
-                return
-            seconds = int(hours * 3600)  # Convert hours to seconds
-            self.add_log(f"Подготовка записи: {hours:.2f} ч = {seconds} сек")
-            # Create PLC client
-            client = snap7.client.Client()
-            # Получаем параметры подключения из plc.json по plc_name
-            plc_name = self.selected_equip.get('plc_name', '')
-            plc_addr, rack, slot = self.get_plc_connection_params(plc_name)
-            if not plc_addr:
-                self.add_log(f"ОШИБКА: Не найдены параметры PLC для '{plc_name}' в plc.json")
-                return
-            self.add_log(f"Подключение к PLC {plc_name} {plc_addr} (rack={rack}, slot={slot})...")
-            client.connect(plc_addr, rack, slot)
-            if client.get_connected():
-                # Write DINT value to DB
-                db_num = self.selected_equip['db_num']
-                db_addr = self.selected_equip['db_addr']
-                tag = self.selected_equip.get('eq_name', '')
-                self.add_log(f"Запись в DB{db_num}.DBD{db_addr} (Tag: {tag})...")
-                # Convert seconds to bytes for DINT
-                data = bytearray(4)
-                set_dint(data, 0, seconds)
-                # Write to PLC
-                client.db_write(db_num, db_addr, data)
-                self.add_log(f"УСПЕХ: Записано {seconds} сек ({hours:.2f} ч) в {self.selected_equip['eq_name']}")
-                # Disconnect
-                client.disconnect()
-                self.add_log("Отключение от PLC")
-                # Read data back to confirm
-                self.read_plc_data()
-            else:
-                self.add_log(f"ОШИБКА: Не удалось подключиться к PLC {plc_addr}")
         except ValueError:
             self.add_log("ОШИБКА: Неверное значение в поле 'Часы'. Введите число.")
-        except Exception as e:
+            return
+        if not (0 <= hours <= MAX_HOURS):
+            self.add_log(f"ПРЕДУПРЕЖДЕНИЕ: Значение часов должно быть от 0 до {MAX_HOURS}!")
+            return
+        seconds = hours_to_seconds(hours)
+        self.add_log(f"Подготовка записи: {hours:.2f} ч = {seconds} сек")
+        plc_name = equip.get('plc_name', '')
+        if not self.core.get_plc(plc_name):
+            self.add_log(f"ОШИБКА: Не найдены параметры PLC для '{plc_name}' в plc.json")
+            return
+        db_num = equip['db_num']
+        db_addr = equip['db_addr']
+        tag = equip.get('eq_name', '')
+        self.add_log(f"Запись в DB{db_num}.DBD{db_addr} (Tag: {tag})...")
+
+        def on_done(result):
+            old_value, value = result
+            self.action_log.record_write(equip, old_value, seconds, value, 'ok' if value == seconds else 'mismatch')
+            # Значение в PLC изменилось — старая запись кэша недействительна
+            self.value_cache.invalidate(equip)
+            self._show_read_result(equip, value)
+
+        def on_error(e):
+            self.action_log.record_write(equip, None, seconds, None, f"error: {e}")
             self.add_log(f"ОШИБКА при записи данных: {str(e)}")
 
+        # Запись с чтением прежнего значения (для журнала) и проверкой обратным чтением
+        self.worker.submit(f"WRITE {tag}", lambda request: self.core.write_one(equip, seconds, request),
+                           on_done=on_done, on_error=on_error)
+        self._update_progress()
+
+    def bulk_write_csv(self):
+        """Записать часы для списка оборудования из CSV (eq_name,hours)."""
+        path = filedialog.askopenfilename(
+            title="CSV с часами (eq_name,hours)", filetypes=[("CSV", "*.csv"), ("Все файлы", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            rows, problems = load_write_csv(path, self.core.equips, MAX_HOURS)
+        except (OSError, UnicodeDecodeError) as e:
+            self.add_log(f"ОШИБКА чтения {path}: {e}")
+            return
+        # Проверяем весь файл до записи: при любой ошибке не пишем ничего
+        if problems:
+            for problem in problems:
+                self.add_log(f"ОШИБКА CSV: {problem}")
+            self.add_log(f"Групповая запись отменена: {len(problems)} ошибок в {os.path.basename(path)}")
+            return
+        if not rows:
+            self.add_log("ПРЕДУПРЕЖДЕНИЕ: CSV не содержит записей")
+            return
+        options = self._ask_bulk_write_options(len(rows))
+        if options is None:
+            return
+        dry_run, rollback = options
+        report_path = os.path.splitext(path)[0] + ('_dry_run.csv' if dry_run else '_report.csv')
+
+        def on_done(report):
+            save_report(report_path, report)
+            for row in report:
+                if not dry_run:
+                    self.action_log.record_write(row, row['old_seconds'], row['new_seconds'],
+                                                 row['actual_seconds'], row['status'])
+                    self.value_cache.invalidate(row)
+                if row['actual_seconds'] is not None:
+                    self.value_cache.put(row, row['actual_seconds'])
+                if row['status'] != STATUS_OK:
+                    self.add_log(f"{row['eq_name']}: {row['status']} {row['error']}".rstrip())
+            ok = sum(1 for row in report if row['status'] == STATUS_OK)
+            self.add_log(f"Групповая запись{' (пробный прогон)' if dry_run else ''}: успешно {ok} из {len(report)}, "
+                         f"отчёт: {report_path}")
+            self.refresh_rows()
+
+        self.worker.submit(
+            f"CSV WRITE {len(rows)}",
+            lambda request: self.core.write_rows(rows, dry_run=dry_run, rollback=rollback, request=request),
+            on_done=on_done,
+            on_error=lambda e: self.add_log(f"ОШИБКА групповой записи: {str(e)}"),
+        )
+        self._update_progress()
+
+    def _ask_bulk_write_options(self, count: int):
+        """Диалог параметров групповой записи. Возвращает (dry_run, rollback) или None."""
+        dialog = tk.Toplevel(self)
+        dialog.title("Групповая запись")
+        dialog.transient(self)
+        dialog.resizable(False, False)
+        dry_run_var = tk.BooleanVar(value=True)
+        rollback_var = tk.BooleanVar(value=True)
+        result = []
+        tk.Label(dialog, text=f"Записать часы для {count} единиц оборудования?",
+                 font=("Arial", 12, "bold")).pack(padx=10, pady=(10, 5))
+        tk.Checkbutton(dialog, text="Пробный прогон (только чтение текущих значений)",
+                       variable=dry_run_var).pack(anchor=tk.W, padx=10)
+        tk.Checkbutton(dialog, text="Откатить все значения при ошибке проверки",
+                       variable=rollback_var).pack(anchor=tk.W, padx=10)
+
+        def on_ok():
+            result.append((dry_run_var.get(), rollback_var.get()))
+            dialog.destroy()
+
+        buttons = tk.Frame(dialog)
+        buttons.pack(pady=10)
+        tk.Button(buttons, text="OK", width=10, command=on_ok).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Отмена", width=10, command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+        dialog.grab_set()
+        self.wait_window(dialog)
+        return result[0] if result else None
+
     def validate_hours(self, value: str) -> bool:
         if value == '':
             return True
@@ -301,18 +662,14 @@ class MHEditor(tk.Tk):
         self.help_button.pack(side=tk.RIGHT, padx=(0, 18))
 
     def _create_table(self):
-        columns = ('Tag', 'plc_name', 'db_num', 'db_addr')
-        table_frame = tk.Frame(self)
-        table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        self.tree = ttk.Treeview(table_frame, columns=columns, show='headings', selectmode='browse')
-        vsb = tk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=vsb.set)
+        columns = ('Tag', 'plc_name', 'db_num', 'db_addr', 'hours', 'age')
+        self.table = VirtualTreeview(self, columns, self._row_cells, on_select=self.on_select)
+        self.table.frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.tree = self.table.tree
         for col in columns:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=120)
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        vsb.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+        self.tree.tag_configure('stale', foreground='gray')
         self.tree.bind('<Double-1>', self.on_double_click)
 
     def _create_button_frame(self):
@@ -325,6 +682,18 @@ class MHEditor(tk.Tk):
         )
         self.read_button.pack(side=tk.LEFT)
 
+        self.read_all_button = tk.Button(
+            button_frame, text="READ ALL", command=self.read_all_visible,
+            font=("Arial", 16, "bold"), height=1, width=9
+        )
+        self.read_all_button.pack(side=tk.LEFT, padx=(5, 0))
+
+        self.snapshot_button = tk.Button(
+            button_frame, text="SNAPSHOT", command=self.fleet_snapshot,
+            font=("Arial", 16, "bold"), height=1, width=9
+        )
+        self.snapshot_button.pack(side=tk.LEFT, padx=(5, 0))
+
         tk.Label(button_frame, text="Сек:", font=("Arial", 16, "bold")).pack(side=tk.LEFT, padx=(20, 5))
         self.result_var = tk.StringVar()
         self.result_entry = tk.Entry(
@@ -349,10 +718,44 @@ class MHEditor(tk.Tk):
         )
         self.write_button.pack(side=tk.RIGHT, padx=(0, 18))
 
+        self.write_csv_button = tk.Button(
+            button_frame, text="WRITE CSV", command=self.bulk_write_csv,
+            bg="red", fg="white", font=("Arial", 16, "bold"), height=1, width=9
+        )
+        self.write_csv_button.pack(side=tk.RIGHT, padx=(0, 5))
+
+    def _create_progress_frame(self):
+        progress_frame = tk.Frame(self)
+        progress_frame.pack(fill=tk.X, padx=10)
+        self.monitor_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(progress_frame, text="Монитор", variable=self.monitor_var,
+                       command=self.toggle_monitor).pack(side=tk.LEFT)
+        self.monitor_interval_var = tk.StringVar(value=f"{MONITOR_INTERVAL:g}")
+        tk.Spinbox(progress_frame, from_=0.5, to=60, increment=0.5, width=4,
+                   textvariable=self.monitor_interval_var).pack(side=tk.LEFT)
+        tk.Label(progress_frame, text="с").pack(side=tk.LEFT, padx=(2, 10))
+        self.progress_bar = ttk.Progressbar(progress_frame, length=150, mode='determinate', maximum=100)
+        self.progress_bar.pack(side=tk.LEFT)
+        self.progress_var = tk.StringVar()
+        tk.Label(progress_frame, textvariable=self.progress_var, anchor=tk.W).pack(
+            side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.cancel_button = tk.Button(
+            progress_frame, text="Отмена", command=self.cancel_requests, state=tk.DISABLED
+        )
+        self.cancel_button.pack(side=tk.RIGHT, padx=(0, 18))
+        tk.Button(progress_frame, text="Статистика PLC", command=self.show_stats).pack(side=tk.RIGHT, padx=5)
+
     def _create_log_area(self):
         log_frame = tk.Frame(self)
         log_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        tk.Label(log_frame, text="Лог действий:", font=("Arial", 10, "bold")).pack(anchor=tk.W)
+        header_frame = tk.Frame(log_frame)
+        header_frame.pack(fill=tk.X)
+        tk.Label(header_frame, text="Лог действий:", font=("Arial", 10, "bold")).pack(side=tk.LEFT)
+        tk.Button(header_frame, text="Найти в журнале", command=self.search_log).pack(side=tk.RIGHT)
+        self.log_search_var = tk.StringVar()
+        search_entry = tk.Entry(header_frame, textvariable=self.log_search_var, width=30)
+        search_entry.pack(side=tk.RIGHT, padx=5)
+        search_entry.bind('<Return>', self.search_log)
         text_frame = tk.Frame(log_frame)
         text_frame.pack(fill=tk.BOTH, expand=True)
         self.log_text = tk.Text(text_frame, height=8, wrap=tk.WORD, state=tk.DISABLED)
@@ -362,6 +765,27 @@ class MHEditor(tk.Tk):
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
 
-if __name__ == '__main__':
-    app = MHEditor()
+def main():
+    parser = argparse.ArgumentParser(description='Редактор часов тех обслуживания')
+    parser.add_argument('--startup-report', nargs='?', const='-', metavar='FILE',
+                        help='вывести время запуска по этапам в JSON (или дописать строкой в FILE) и выйти')
+    args = parser.parse_args()
+    startup = StartupTimer(STARTED)
+    startup.add('import', time.perf_counter() - STARTED)
+
+    def save_startup_report(report):
+        line = json.dumps(report, ensure_ascii=False)
+        if args.startup_report == '-':
+            print(line)
+        else:
+            # В exe без консоли stdout нет — отчёт копится в файле
+            with open(args.startup_report, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        app.after_idle(app.on_close)
+
+    app = MHEditor(startup=startup, on_started=save_startup_report if args.startup_report else None)
     app.mainloop()
+
+
+if __name__ == '__main__':
+    main()
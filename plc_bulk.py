@@ -0,0 +1,253 @@
+"""Групповое чтение часов для списка оборудования.
+
+Адреса одного (plc_name, db_num) сливаются в диапазоны, каждый из которых
+помещается в один ответ db_read при согласованном размере PDU, а все DINT
+из буфера диапазона разбираются одним вызовом struct. Разрозненные
+диапазоны (разные DB) упаковываются в запросы read_multi_vars.
+"""
+import ctypes
+import struct
+import time
+from collections import defaultdict
+
+from plc_worker import RequestCancelled
+
+DINT_SIZE = 4
+# Заголовки S7 в ответе на чтение: полезных данных в PDU меньше на эту величину
+READ_PDU_OVERHEAD = 18
+# Ограничение S7 (и snap7) на число переменных в одном запросе ReadVar
+MAX_MULTI_VARS = 20
+# Размеры частей запроса/ответа ReadVar с несколькими переменными
+MULTI_REQUEST_HEADER = 19
+MULTI_REQUEST_ITEM = 12
+MULTI_RESPONSE_HEADER = 18
+MULTI_RESPONSE_ITEM = 4
+
+
+class ReadRange:
+    """Непрерывный участок DB, покрывающий несколько DBD."""
+
+    def __init__(self, plc_name: str, db_num: int, start: int):
+        self.plc_name = plc_name
+        self.db_num = db_num
+        self.start = start
+        self.size = 0
+        self.items = []  # (equip, смещение внутри буфера)
+
+    def add(self, equip: dict) -> None:
+        offset = equip['db_addr'] - self.start
+        self.items.append((equip, offset))
+        self.size = max(self.size, offset + DINT_SIZE)
+
+    def __repr__(self):
+        return f"<ReadRange {self.plc_name} DB{self.db_num}.DBB{self.start}[{self.size}] x{len(self.items)}>"
+
+
+def group_equips(equips: list) -> dict:
+    """Сгруппировать оборудование по (plc_name, db_num), адреса по возрастанию."""
+    groups = defaultdict(list)
+    for eq in equips:
+        if eq.get('db_num') is None or eq.get('db_addr') is None:
+            continue
+        groups[(eq.get('plc_name', ''), eq['db_num'])].append(eq)
+    for items in groups.values():
+        items.sort(key=lambda eq: eq['db_addr'])
+    return groups
+
+
+def plan_ranges(equips: list, max_bytes: int) -> list:
+    """Слить адреса одного DB в минимум диапазонов не длиннее max_bytes."""
+    ranges = []
+    for (plc_name, db_num), items in group_equips(equips).items():
+        current = None
+        for eq in items:
+            if current is None or eq['db_addr'] + DINT_SIZE - current.start > max_bytes:
+                current = ReadRange(plc_name, db_num, eq['db_addr'])
+                ranges.append(current)
+            current.add(eq)
+    return ranges
+
+
+def dint_struct(offsets: list):
+    """Struct, разбирающий DINT по возрастающим неперекрывающимся смещениям.
+
+    Возвращает None, если смещения перекрываются и одним форматом их не описать.
+    """
+    fmt = ['>']
+    position = 0
+    for offset in offsets:
+        if offset < position:
+            return None
+        if offset > position:
+            fmt.append(f'{offset - position}x')
+        fmt.append('i')
+        position = offset + DINT_SIZE
+    return struct.Struct(''.join(fmt))
+
+
+def decode_dints(buffer, offsets: list) -> list:
+    """Разобрать все DINT (big-endian, как в S7) из буфера за один проход."""
+    unique = sorted(set(offsets))
+    decoder = dint_struct(unique)
+    if decoder is not None:
+        values = dict(zip(unique, decoder.unpack_from(buffer)))
+    else:
+        values = {offset: struct.unpack_from('>i', buffer, offset)[0] for offset in unique}
+    return [values[offset] for offset in offsets]
+
+
+def plan_batches(ranges: list, pdu_length: int) -> list:
+    """Упаковать диапазоны в пачки для read_multi_vars.
+
+    Пачка ограничена MAX_MULTI_VARS переменными и размером PDU как для
+    запроса, так и для ответа (данные каждой переменной выравниваются до чётного).
+    """
+    batches = []
+    current = []
+    response_size = MULTI_RESPONSE_HEADER
+    for read_range in ranges:
+        item_size = MULTI_RESPONSE_ITEM + read_range.size + read_range.size % 2
+        request_size = MULTI_REQUEST_HEADER + MULTI_REQUEST_ITEM * (len(current) + 1)
+        if current and (len(current) >= MAX_MULTI_VARS or request_size > pdu_length
+                        or response_size + item_size > pdu_length):
+            batches.append(current)
+            current = []
+            response_size = MULTI_RESPONSE_HEADER
+        current.append(read_range)
+        response_size += item_size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def read_multi(client, ranges: list) -> list:
+    """Прочитать несколько диапазонов одним запросом read_multi_vars.
+
+    Возвращает по элементу на диапазон: bytearray или RuntimeError с кодом
+    ошибки конкретной переменной.
+    """
+    from snap7.type import Area, S7DataItem, WordLen
+
+    items = (S7DataItem * len(ranges))()
+    buffers = []
+    for item, read_range in zip(items, ranges):
+        buffer = (ctypes.c_uint8 * read_range.size)()
+        item.Area = Area.DB
+        item.WordLen = WordLen.Byte
+        item.Result = 0
+        item.DBNumber = read_range.db_num
+        item.Start = read_range.start
+        item.Amount = read_range.size
+        item.pData = ctypes.cast(buffer, ctypes.POINTER(ctypes.c_uint8))
+        buffers.append(buffer)
+    client.read_multi_vars(items)
+    results = []
+    for item, buffer in zip(items, buffers):
+        if item.Result == 0:
+            results.append(bytearray(buffer))
+        else:
+            results.append(RuntimeError(client.error_text(item.Result)))
+    return results
+
+
+def read_plc_values(pool, plc_name: str, equips: list, log=None, request=None, progress=None) -> tuple:
+    """Прочитать часы equips одного PLC диапазонами и пачками read_multi_vars.
+
+    Переменные, не прочитанные в пачке, перечитываются по одной через db_read.
+    Возвращает (values, errors, requests); progress(n) вызывается после каждых
+    n прочитанных (или неудачных) тегов.
+    """
+    log = log or (lambda message: None)
+    values = {}
+    errors = {}
+    requests = 0
+    pdu_length = pool.pdu_length(plc_name)
+    ranges = plan_ranges(equips, pdu_length - READ_PDU_OVERHEAD)
+
+    def single_read(read_range):
+        return pool.run(plc_name, lambda client: client.db_read(read_range.db_num, read_range.start, read_range.size))
+
+    for batch in plan_batches(ranges, pdu_length):
+        if request is not None:
+            request.check_cancelled()
+        requests += 1
+        if len(batch) == 1:
+            try:
+                buffers = [single_read(batch[0])]
+            except Exception as e:
+                buffers = [e]
+        else:
+            try:
+                buffers = pool.run(plc_name, lambda client, b=batch: read_multi(client, b))
+            except Exception as e:
+                log(f"ОШИБКА пакетного чтения ({len(batch)} переменных) PLC {plc_name}: {e}, чтение по одной")
+                buffers = [e] * len(batch)
+            # Неудачные переменные пачки пробуем прочитать поодиночке
+            for i, buffer in enumerate(buffers):
+                if isinstance(buffer, Exception):
+                    requests += 1
+                    try:
+                        buffers[i] = single_read(batch[i])
+                    except Exception as e:
+                        buffers[i] = e
+        count = 0
+        for read_range, buffer in zip(batch, buffers):
+            count += len(read_range.items)
+            if isinstance(buffer, Exception):
+                for eq, _ in read_range.items:
+                    errors[eq.get('eq_name', '')] = str(buffer)
+                log(f"ОШИБКА чтения DB{read_range.db_num}.DBB{read_range.start} ({read_range.size} байт) "
+                    f"PLC {plc_name}: {buffer}")
+                continue
+            decoded = decode_dints(buffer, [offset for _, offset in read_range.items])
+            for (eq, _), value in zip(read_range.items, decoded):
+                values[eq.get('eq_name', '')] = value
+        if progress is not None:
+            progress(count)
+    return values, errors, requests
+
+
+def bulk_read(pool, equips: list, log=None, request=None) -> tuple:
+    """Прочитать часы всех equips через пул соединений.
+
+    Возвращает (values, errors, stats): values и errors — словари по eq_name
+    (секунды / текст ошибки), stats — число запросов и время по каждому PLC.
+    request (PLCRequest из plc_worker) получает прогресс по диапазонам и
+    позволяет прервать чтение между запросами.
+    """
+    log = log or (lambda message: None)
+    values = {}
+    errors = {}
+    stats = {}
+    by_plc = defaultdict(list)
+    for eq in equips:
+        by_plc[eq.get('plc_name', '')].append(eq)
+
+    done = 0
+
+    def progress(count):
+        nonlocal done
+        done += count
+        if request is not None:
+            request.progress(done, len(equips))
+
+    for plc_name, plc_equips in by_plc.items():
+        start_time = time.perf_counter()
+        try:
+            plc_values, plc_errors, requests = read_plc_values(
+                pool, plc_name, plc_equips, log=log, request=request, progress=progress)
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            for eq in plc_equips:
+                errors[eq.get('eq_name', '')] = str(e)
+            log(f"ОШИБКА: PLC {plc_name} недоступен: {e}")
+            continue
+        values.update(plc_values)
+        errors.update(plc_errors)
+        stats[plc_name] = {
+            'tags': len(plc_equips),
+            'requests': requests,
+            'time': time.perf_counter() - start_time,
+        }
+    return values, errors, stats
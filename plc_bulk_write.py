@@ -0,0 +1,249 @@
+"""Групповая запись часов из CSV (eq_name,hours).
+
+Все строки проверяются заранее, записи группируются по (plc_name, db_num) и
+сливаются в непрерывные участки db_write, затем все значения проверяются
+одним пакетным чтением. Поддерживаются пробный прогон (dry-run) и откат
+к прежним значениям при ошибке проверки. Отменить запрос можно только до
+начала записи: запись, проверка и откат выполняются до конца, чтобы PLC не
+остались записанными частично, а отчёт попал в историю и журнал.
+"""
+import csv
+import struct
+from collections import defaultdict
+
+from plc_bulk import DINT_SIZE, group_equips, read_plc_values
+from plc_worker import RequestCancelled
+
+# Заголовки S7 в запросе на запись: полезных данных в PDU меньше на эту величину
+WRITE_PDU_OVERHEAD = 35
+
+STATUS_OK = 'ok'
+STATUS_DRY_RUN = 'dry-run'
+STATUS_MISMATCH = 'mismatch'
+STATUS_ERROR = 'error'
+STATUS_ROLLED_BACK = 'rolled back'
+
+SECONDS_PER_HOUR = 3600
+
+REPORT_FIELDS = ['eq_name', 'plc_name', 'db_num', 'db_addr', 'old_seconds', 'new_seconds',
+                 'actual_seconds', 'status', 'error']
+
+
+def hours_to_seconds(hours: float) -> int:
+    """Часы -> секунды для записи в PLC (одинаково для одиночной и групповой записи)."""
+    return int(hours * SECONDS_PER_HOUR)
+
+
+class WriteRow:
+    """Строка CSV, сопоставленная с оборудованием из equips.json."""
+
+    def __init__(self, equip: dict, hours: float):
+        self.equip = equip
+        self.eq_name = equip.get('eq_name', '')
+        self.plc_name = equip.get('plc_name', '')
+        self.db_num = equip['db_num']
+        self.db_addr = equip['db_addr']
+        self.hours = hours
+        self.seconds = hours_to_seconds(hours)
+        self.old_seconds = None
+        self.actual_seconds = None
+        self.status = ''
+        self.error = ''
+
+    def report(self) -> dict:
+        return {
+            'eq_name': self.eq_name,
+            'plc_name': self.plc_name,
+            'db_num': self.db_num,
+            'db_addr': self.db_addr,
+            'old_seconds': self.old_seconds,
+            'new_seconds': self.seconds,
+            'actual_seconds': self.actual_seconds,
+            'status': self.status,
+            'error': self.error,
+        }
+
+
+def load_write_csv(path: str, equips: list, max_hours: float) -> tuple:
+    """Прочитать и проверить CSV eq_name,hours.
+
+    Возвращает (rows, problems): rows — список WriteRow, problems — тексты
+    ошибок с номерами строк. При любой проблеме запись выполнять нельзя.
+    """
+    by_name = {eq.get('eq_name', ''): eq for eq in equips}
+    rows = []
+    problems = []
+    seen = set()
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        # Разделитель — по первой непустой строке; ';' и табуляция важнее запятой:
+        # в CSV из русского Excel запятая — десятичный разделитель (12,5)
+        first_line = next((line for line in sample.splitlines() if line.strip()), '')
+        delimiter = next((char for char in ';\t,' if char in first_line), ',')
+        for line_no, record in enumerate(csv.reader(f, delimiter=delimiter), start=1):
+            if not record or not ''.join(record).strip():
+                continue
+            eq_name = record[0].strip()
+            if line_no == 1 and eq_name.lower() == 'eq_name':
+                continue
+            # Пустые ячейки в конце строки добавляет Excel, их не считаем
+            while len(record) > 2 and not record[-1].strip():
+                record.pop()
+            if len(record) < 2:
+                problems.append(f"строка {line_no}: нет значения часов для '{eq_name}'")
+                continue
+            if len(record) > 2:
+                # Например, A0,12,5: десятичная запятая при разделителе ','
+                problems.append(f"строка {line_no}: лишние поля для '{eq_name}' ({len(record)} вместо 2), "
+                                f"проверьте разделитель и десятичную запятую")
+                continue
+            equip = by_name.get(eq_name)
+            if equip is None:
+                problems.append(f"строка {line_no}: '{eq_name}' нет в equips.json")
+                continue
+            if eq_name in seen:
+                problems.append(f"строка {line_no}: '{eq_name}' указан повторно")
+                continue
+            try:
+                hours = float(record[1].strip().replace(',', '.'))
+            except ValueError:
+                problems.append(f"строка {line_no}: неверное значение часов '{record[1]}'")
+                continue
+            if not (0 <= hours <= max_hours):
+                problems.append(f"строка {line_no}: {hours} ч вне диапазона 0..{max_hours}")
+                continue
+            seen.add(eq_name)
+            rows.append(WriteRow(equip, hours))
+    return rows, problems
+
+
+def plan_write_spans(rows: list, max_bytes: int) -> list:
+    """Слить записи одного DB в непрерывные участки (без промежутков).
+
+    Возвращает список (plc_name, db_num, start, [WriteRow, ...]).
+    """
+    spans = []
+    by_equip = {id(row.equip): row for row in rows}
+    for (plc_name, db_num), equips in group_equips([row.equip for row in rows]).items():
+        current = None
+        for eq in equips:
+            row = by_equip[id(eq)]
+            if (current is None or row.db_addr != current[2] + DINT_SIZE * len(current[3])
+                    or DINT_SIZE * (len(current[3]) + 1) > max_bytes):
+                current = (plc_name, db_num, row.db_addr, [])
+                spans.append(current)
+            current[3].append(row)
+    return spans
+
+
+def _write_spans(pool, spans: list, values_of, log) -> int:
+    """Записать участки; values_of(row) даёт записываемые секунды. Возвращает число запросов."""
+    requests = 0
+    for plc_name, db_num, start, span_rows in spans:
+        data = bytearray(struct.pack(f'>{len(span_rows)}i', *(values_of(row) for row in span_rows)))
+        requests += 1
+        try:
+            pool.run(plc_name, lambda client: client.db_write(db_num, start, data))
+        except Exception as e:
+            for row in span_rows:
+                row.status = STATUS_ERROR
+                row.error = str(e)
+            log(f"ОШИБКА записи DB{db_num}.DBB{start} ({len(data)} байт) PLC {plc_name}: {e}")
+    return requests
+
+
+def _read_back(pool, rows: list, log, request=None) -> dict:
+    by_plc = defaultdict(list)
+    for row in rows:
+        by_plc[row.plc_name].append(row.equip)
+    values = {}
+    for plc_name, equips in by_plc.items():
+        try:
+            plc_values, _, _ = read_plc_values(pool, plc_name, equips, log=log, request=request)
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            log(f"ОШИБКА чтения PLC {plc_name}: {e}")
+            continue
+        values.update(plc_values)
+    return values
+
+
+def bulk_write(pool, rows: list, dry_run: bool = False, rollback: bool = False, log=None, request=None) -> list:
+    """Записать значения rows и проверить их пакетным чтением.
+
+    dry_run — только прочитать текущие значения и показать, что будет записано.
+    rollback — при любой ошибке или несовпадении вернуть прежние значения всем строкам.
+    request проверяется на отмену только до первой записи.
+    Возвращает отчёт: по словарю REPORT_FIELDS на строку.
+    """
+    log = log or (lambda message: None)
+    all_rows = rows
+    old_values = _read_back(pool, rows, log, request)
+    for row in rows:
+        row.old_seconds = old_values.get(row.eq_name)
+    if dry_run:
+        for row in rows:
+            row.status = STATUS_DRY_RUN
+        log(f"Пробный прогон: {len(rows)} записей, изменится "
+            f"{sum(1 for row in rows if row.old_seconds != row.seconds)}")
+        return [row.report() for row in rows]
+
+    unreadable = [row for row in rows if row.old_seconds is None]
+    if rollback and unreadable:
+        # Без прежнего значения откатить нельзя — такие строки не пишем
+        for row in unreadable:
+            row.status = STATUS_ERROR
+            row.error = 'не удалось прочитать прежнее значение'
+        rows = [row for row in rows if row.old_seconds is not None]
+
+    pdu_lengths = {}
+    for plc_name in {row.plc_name for row in rows}:
+        try:
+            pdu_lengths[plc_name] = pool.pdu_length(plc_name)
+        except Exception as e:
+            log(f"ОШИБКА: PLC {plc_name} недоступен: {e}")
+            for row in rows:
+                if row.plc_name == plc_name:
+                    row.status = STATUS_ERROR
+                    row.error = str(e)
+    writable = [row for row in rows if row.plc_name in pdu_lengths]
+    spans = []
+    for plc_name, pdu_length in pdu_lengths.items():
+        spans += plan_write_spans([row for row in writable if row.plc_name == plc_name],
+                                  pdu_length - WRITE_PDU_OVERHEAD)
+    if request is not None:
+        request.check_cancelled()
+    # Дальше без отмены: начатая запись доводится до проверки (и отката)
+    requests = _write_spans(pool, spans, lambda row: row.seconds, log)
+    log(f"Запись {len(writable)} значений: {requests} запросов db_write")
+
+    actual = _read_back(pool, writable, log)
+    for row in writable:
+        row.actual_seconds = actual.get(row.eq_name)
+        if row.status == STATUS_ERROR:
+            continue
+        if row.actual_seconds == row.seconds:
+            row.status = STATUS_OK
+        else:
+            row.status = STATUS_MISMATCH
+            row.error = 'значение после записи не совпадает' if row.actual_seconds is not None else 'нет чтения'
+
+    failed = [row for row in writable if row.status != STATUS_OK]
+    if rollback and failed:
+        log(f"Откат {len(writable)} значений к прежним из-за {len(failed)} ошибок")
+        _write_spans(pool, spans, lambda row: row.old_seconds, log)
+        restored = _read_back(pool, writable, log)
+        for row in writable:
+            row.actual_seconds = restored.get(row.eq_name)
+            if row.actual_seconds == row.old_seconds:
+                row.status = STATUS_ROLLED_BACK
+    return [row.report() for row in all_rows]
+
+
+def save_report(path: str, report: list) -> None:
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(report)
@@ -0,0 +1,176 @@
+"""Снимок часов по всем PLC из plc.json одновременно.
+
+На каждый PLC — отдельная «дорожка» (поток) с групповым чтением из
+plc_bulk, поэтому общее время близко ко времени самого медленного PLC.
+Общий дедлайн ограничивает ожидание недоступных контроллеров.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+
+from plc_bulk import bulk_read
+from plc_worker import RequestCancelled
+
+SNAPSHOT_DEADLINE = 30.0  # секунд на весь снимок
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+STATUS_TIMEOUT = 'timeout'
+STATUS_CANCELLED = 'cancelled'
+
+
+class LaneCancelled(RequestCancelled):
+    """Дорожка PLC прервана по дедлайну или отмене снимка."""
+
+
+class _Lane:
+    """Прогресс и отмена одной дорожки (интерфейс как у PLCRequest)."""
+
+    def __init__(self, snapshot, plc_name: str, deadline: float, request=None):
+        self.snapshot = snapshot
+        self.plc_name = plc_name
+        self.deadline = deadline
+        self.request = request
+        self.done = 0
+
+    def check_cancelled(self) -> None:
+        if time.monotonic() > self.deadline:
+            raise LaneCancelled(STATUS_TIMEOUT)
+        if self.request is not None and self.request.cancelled:
+            raise LaneCancelled(STATUS_CANCELLED)
+
+    def progress(self, done: int, total: int) -> None:
+        self.done = done
+        self.snapshot.report_progress()
+
+
+class FleetSnapshot:
+    """Параллельное чтение часов оборудования всех (или одной ЗИФ) PLC.
+
+    Использует те же модели, что и MHEditor: список plc из plc.json и
+    equips из equips.json, а также общий пул соединений PLCPool.
+    """
+
+    def __init__(self, pool, plc_configs: list, equips: list, log=None):
+        self.pool = pool
+        self.plc_configs = plc_configs
+        self.equips = equips
+        self.log = log or (lambda message: None)
+        self._lanes = []
+        self._request = None
+        self._total = 0
+
+    def select_plcs(self, zif=None) -> list:
+        """PLC для снимка: все или только ЗИФ zif (поле zif в plc.json)."""
+        if zif in (None, '', 'Все'):
+            return list(self.plc_configs)
+        return [plc for plc in self.plc_configs if str(plc.get('zif')) == str(zif)]
+
+    def report_progress(self) -> None:
+        if self._request is not None:
+            self._request.progress(sum(lane.done for lane in self._lanes), self._total)
+
+    def _run_lane(self, lane: _Lane, equips: list) -> dict:
+        start_time = time.perf_counter()
+        try:
+            values, errors, stats = bulk_read(self.pool, equips, log=self.log, request=lane)
+        except LaneCancelled as e:
+            return {'status': str(e), 'values': {}, 'errors': {}, 'requests': 0,
+                    'time': time.perf_counter() - start_time, 'error': str(e)}
+        plc_stats = stats.get(lane.plc_name, {})
+        status = STATUS_OK
+        error = ''
+        if errors:
+            status = STATUS_ERROR
+            error = next(iter(errors.values()))
+        return {'status': status, 'values': values, 'errors': errors,
+                'requests': plc_stats.get('requests', 0),
+                'time': time.perf_counter() - start_time, 'error': error}
+
+    def _plc_rows(self, plc: dict, equips: list, result: dict) -> tuple:
+        """Строки оборудования и строка статистики одного PLC по результату дорожки."""
+        plc_name = plc.get('plc_name')
+        values = result.get('values', {})
+        errors = result.get('errors', {})
+        stats = {
+            'plc_name': plc_name,
+            'zif': plc.get('zif'),
+            'tags': len(equips),
+            'requests': result.get('requests', 0),
+            'time': result.get('time', 0.0),
+            'status': result.get('status', STATUS_ERROR),
+            'error': result.get('error', ''),
+        }
+        rows = []
+        for eq in equips:
+            eq_name = eq.get('eq_name', '')
+            seconds = values.get(eq_name)
+            rows.append({
+                'eq_name': eq_name,
+                'plc_name': plc_name,
+                'zif': plc.get('zif'),
+                'db_num': eq.get('db_num'),
+                'db_addr': eq.get('db_addr'),
+                'seconds': seconds,
+                'hours': round(seconds / 3600.0, 2) if seconds is not None else None,
+                'status': STATUS_OK if seconds is not None else result.get('status', STATUS_ERROR),
+                'error': errors.get(eq_name, '' if seconds is not None else result.get('error', '')),
+            })
+        return rows, stats
+
+    def run(self, zif=None, deadline: float = SNAPSHOT_DEADLINE, request=None, on_rows=None) -> tuple:
+        """Выполнить снимок.
+
+        Возвращает (rows, plc_stats): rows — по строке на оборудование
+        (eq_name, plc_name, zif, db_num, db_addr, seconds, hours, status, error),
+        plc_stats — по строке на PLC (plc_name, zif, tags, requests, time, status, error).
+        on_rows(rows, stats) вызывается в потоке run по мере завершения дорожек
+        (для потокового вывода); не уложившиеся в дедлайн PLC — в конце.
+        """
+        plcs = self.select_plcs(zif)
+        by_plc = {plc.get('plc_name'): [] for plc in plcs}
+        for eq in self.equips:
+            if eq.get('plc_name') in by_plc:
+                by_plc[eq.get('plc_name')].append(eq)
+        lanes_by_plc = {plc.get('plc_name'): plc for plc in plcs if by_plc[plc.get('plc_name')]}
+
+        start_time = time.perf_counter()
+        end_time = time.monotonic() + deadline
+        self._request = request
+        self._total = sum(len(by_plc[plc_name]) for plc_name in lanes_by_plc)
+        self._lanes = [_Lane(self, plc_name, end_time, request) for plc_name in lanes_by_plc]
+        self.log(f"Снимок: {len(self._lanes)} PLC, {self._total} тегов, дедлайн {deadline:.0f} с")
+
+        plc_results = {}
+
+        def finish_lane(plc_name, result):
+            plc_results[plc_name] = self._plc_rows(lanes_by_plc[plc_name], by_plc[plc_name], result)
+            if on_rows is not None:
+                on_rows(*plc_results[plc_name])
+
+        if self._lanes:
+            executor = ThreadPoolExecutor(max_workers=len(self._lanes), thread_name_prefix='fleet')
+            futures = {executor.submit(self._run_lane, lane, by_plc[lane.plc_name]): lane for lane in self._lanes}
+            try:
+                for future in as_completed(futures, timeout=deadline):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {'status': STATUS_ERROR, 'error': str(e)}
+                    finish_lane(futures[future].plc_name, result)
+            except TimeoutError:
+                pass
+            # Зависшие на connect дорожки не ждём: их результат будет отброшен
+            executor.shutdown(wait=False)
+            for lane in self._lanes:
+                if lane.plc_name not in plc_results:
+                    finish_lane(lane.plc_name, {'status': STATUS_TIMEOUT, 'error': f"не уложился в {deadline:.0f} с",
+                                                'time': time.perf_counter() - start_time})
+
+        rows = []
+        plc_stats = []
+        for plc_name in lanes_by_plc:
+            plc_rows, stats = plc_results[plc_name]
+            rows.extend(plc_rows)
+            plc_stats.append(stats)
+        self.log(f"Снимок завершён за {time.perf_counter() - start_time:.2f} с")
+        return rows, plc_stats
@@ -0,0 +1,224 @@
+"""Метрики обмена с PLC: задержки, объём данных и ошибки по каждому PLC.
+
+Каждая операция snap7 (connect, db_read, db_write, read_multi_vars,
+disconnect) попадает в гистограмму задержек своей пары (PLC, операция).
+Учитываются полезные байты (данные DB) и ошибки. Метрики можно выгрузить
+в textfile для Prometheus (node_exporter) или в JSON.
+"""
+import json
+import os
+import threading
+import time
+
+# Границы корзин гистограммы задержек, секунды
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+OPERATIONS = ('connect', 'db_read', 'read_multi_vars', 'db_write', 'disconnect')
+METRIC_PREFIX = 'rh_plc'
+
+
+class Histogram:
+    """Гистограмма задержек с фиксированными корзинами (как в Prometheus)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последняя корзина — +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        position = len(self.buckets)
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                position = index
+                break
+        self.counts[position] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float):
+        """Оценка квантиля по корзинам (линейно внутри корзины), None без данных."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, count in enumerate(self.counts):
+            upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+            if count and seen + count >= rank:
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return self.buckets[-1]
+
+
+class OperationStats:
+    """Счётчики одной пары (PLC, операция)."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.last_error = ''
+        self.last_time = 0.0
+
+
+def _label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PLCMetrics:
+    """Метрики всех PLC; методы потокобезопасны (операции идут из потоков воркера)."""
+
+    def __init__(self):
+        self._stats = {}  # (plc_name, operation) -> OperationStats
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def observe(self, plc_name: str, operation: str, seconds: float, bytes_in: int = 0,
+                bytes_out: int = 0, error: Exception = None) -> None:
+        with self._lock:
+            stats = self._stats.get((plc_name, operation))
+            if stats is None:
+                stats = self._stats[(plc_name, operation)] = OperationStats()
+            stats.latency.observe(seconds)
+            stats.last_time = time.time()
+            if error is not None:
+                stats.errors += 1
+                stats.last_error = str(error)
+            else:
+                stats.bytes_in += bytes_in
+                stats.bytes_out += bytes_out
+
+    def measure(self, plc_name: str, operation: str, call, bytes_in: int = 0, bytes_out: int = 0):
+        """Выполнить call() и учесть его время; ошибка учитывается и пробрасывается."""
+        start_time = time.perf_counter()
+        try:
+            result = call()
+        except Exception as e:
+            self.observe(plc_name, operation, time.perf_counter() - start_time, error=e)
+            raise
+        self.observe(plc_name, operation, time.perf_counter() - start_time, bytes_in, bytes_out)
+        return result
+
+    def plc_names(self) -> list:
+        with self._lock:
+            return sorted({plc_name for plc_name, _ in self._stats})
+
+    def summary(self) -> list:
+        """По строке на PLC для панели статистики: задержки в мс (p50/p95), байты, ошибки."""
+        with self._lock:
+            items = list(self._stats.items())
+        rows = {}
+        for (plc_name, operation), stats in items:
+            row = rows.setdefault(plc_name, {'plc_name': plc_name, 'operations': 0, 'errors': 0,
+                                             'bytes_in': 0, 'bytes_out': 0, 'last_error': '', 'last_time': 0.0})
+            row['operations'] += stats.latency.count
+            row['errors'] += stats.errors
+            row['bytes_in'] += stats.bytes_in
+            row['bytes_out'] += stats.bytes_out
+            if stats.last_error and stats.last_time >= row['last_time']:
+                row['last_error'] = stats.last_error
+            row['last_time'] = max(row['last_time'], stats.last_time)
+            for name, q in (('p50', 0.5), ('p95', 0.95)):
+                value = stats.latency.quantile(q)
+                row[f'{operation}_{name}'] = round(value * 1000, 1) if value is not None else None
+        return [rows[plc_name] for plc_name in sorted(rows)]
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            items = sorted(self._stats.items())
+            plcs = {}
+            for (plc_name, operation), stats in items:
+                plcs.setdefault(plc_name, {})[operation] = {
+                    'count': stats.latency.count,
+                    'sum_seconds': round(stats.latency.sum, 6),
+                    'buckets': {str(bound): count for bound, count in
+                                zip(list(stats.latency.buckets) + ['+Inf'], stats.latency.counts)},
+                    'p50_ms': _ms(stats.latency.quantile(0.5)),
+                    'p95_ms': _ms(stats.latency.quantile(0.95)),
+                    'errors': stats.errors,
+                    'bytes_in': stats.bytes_in,
+                    'bytes_out': stats.bytes_out,
+                    'last_error': stats.last_error,
+                }
+        return {'timestamp': time.time(), 'started': self.started, 'plc': plcs}
+
+    def to_prometheus(self) -> str:
+        """Текст в формате Prometheus exposition (для node_exporter textfile collector)."""
+        with self._lock:
+            items = sorted(self._stats.items())
+            lines = [
+                f'# HELP {METRIC_PREFIX}_operation_seconds Время операций snap7 с PLC',
+                f'# TYPE {METRIC_PREFIX}_operation_seconds histogram',
+            ]
+            for (plc_name, operation), stats in items:
+                labels = f'plc="{_label(plc_name)}",op="{operation}"'
+                cumulative = 0
+                for bound, count in zip(list(stats.latency.buckets) + ['+Inf'], stats.latency.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_PREFIX}_operation_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_PREFIX}_operation_seconds_sum{{{labels}}} {stats.latency.sum:.6f}')
+                lines.append(f'{METRIC_PREFIX}_operation_seconds_count{{{labels}}} {stats.latency.count}')
+            lines += [
+                f'# HELP {METRIC_PREFIX}_operation_errors_total Ошибки операций snap7 с PLC',
+                f'# TYPE {METRIC_PREFIX}_operation_errors_total counter',
+            ]
+            for (plc_name, operation), stats in items:
+                lines.append(f'{METRIC_PREFIX}_operation_errors_total{{plc="{_label(plc_name)}",op="{operation}"}} '
+                             f'{stats.errors}')
+            lines += [
+                f'# HELP {METRIC_PREFIX}_bytes_total Полезные данные DB, переданные PLC (out) и прочитанные (in)',
+                f'# TYPE {METRIC_PREFIX}_bytes_total counter',
+            ]
+            for (plc_name, operation), stats in items:
+                labels = f'plc="{_label(plc_name)}",op="{operation}"'
+                lines.append(f'{METRIC_PREFIX}_bytes_total{{{labels},direction="in"}} {stats.bytes_in}')
+                lines.append(f'{METRIC_PREFIX}_bytes_total{{{labels},direction="out"}} {stats.bytes_out}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path: str) -> None:
+        """Записать метрики в path атомарно: *.prom — Prometheus, иначе JSON."""
+        if path.endswith('.prom'):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.to_dict(), ensure_ascii=False, indent=2) + '\n'
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(text)
+        # Сборщик не должен увидеть недописанный файл
+        os.replace(tmp_path, path)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+class InstrumentedClient:
+    """Обёртка клиента snap7: операции обмена с DB измеряются в metrics.
+
+    Остальные методы (get_connected, get_pdu_length, ...) передаются клиенту
+    без изменений.
+    """
+
+    def __init__(self, client, plc_name: str, metrics: PLCMetrics):
+        self._client = client
+        self._plc_name = plc_name
+        self._metrics = metrics
+
+    def db_read(self, db_number: int, start: int, size: int):
+        return self._metrics.measure(self._plc_name, 'db_read',
+                                     lambda: self._client.db_read(db_number, start, size), bytes_in=size)
+
+    def db_write(self, db_number: int, start: int, data):
+        return self._metrics.measure(self._plc_name, 'db_write',
+                                     lambda: self._client.db_write(db_number, start, data), bytes_out=len(data))
+
+    def read_multi_vars(self, items):
+        return self._metrics.measure(self._plc_name, 'read_multi_vars',
+                                     lambda: self._client.read_multi_vars(items),
+                                     bytes_in=sum(item.Amount for item in items))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
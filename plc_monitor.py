@@ -0,0 +1,72 @@
+"""Периодический опрос видимого оборудования (режим «Монитор»).
+
+Каждый PLC опрашивается независимо, не чаще одного запроса одновременно.
+Если PLC отвечает с ошибкой или медленно, интервал его опроса растёт
+вдвое (до MAX_BACKOFF), после нормального ответа возвращается к базовому.
+"""
+import time
+from collections import defaultdict
+
+from plc_bulk import read_plc_values
+
+MONITOR_INTERVAL = 2.0  # секунд между опросами по умолчанию
+MAX_BACKOFF = 16  # максимальный множитель интервала для проблемного PLC
+# Ответ дольше этой доли интервала считается медленным
+SLOW_FRACTION = 0.5
+
+
+class PLCState:
+    """Состояние опроса одного PLC."""
+
+    def __init__(self):
+        self.busy = False
+        self.backoff = 1
+        self.next_due = 0.0
+        self.last_time = 0.0
+        self.last_error = ''
+
+
+class PLCMonitor:
+    """Планировщик опроса с отступом (backoff) для медленных и сбойных PLC."""
+
+    def __init__(self, pool, interval: float = MONITOR_INTERVAL):
+        self.pool = pool
+        self.interval = interval
+        self.states = defaultdict(PLCState)
+
+    def due(self, equips: list, now: float = None) -> dict:
+        """Оборудование PLC, которые пора опросить; такие PLC помечаются занятыми."""
+        now = time.monotonic() if now is None else now
+        by_plc = defaultdict(list)
+        for eq in equips:
+            by_plc[eq.get('plc_name', '')].append(eq)
+        result = {}
+        for plc_name, plc_equips in by_plc.items():
+            state = self.states[plc_name]
+            if state.busy or now < state.next_due:
+                continue
+            state.busy = True
+            result[plc_name] = plc_equips
+        return result
+
+    def poll(self, plc_name: str, equips: list, request=None) -> tuple:
+        """Прочитать значения одного PLC (в потоке воркера). Возвращает (values, errors, время)."""
+        start_time = time.perf_counter()
+        values, errors, _ = read_plc_values(self.pool, plc_name, equips, request=request)
+        return values, errors, time.perf_counter() - start_time
+
+    def complete(self, plc_name: str, elapsed: float, error: str = '', now: float = None) -> None:
+        """Учесть результат опроса и назначить следующий."""
+        now = time.monotonic() if now is None else now
+        state = self.states[plc_name]
+        state.busy = False
+        state.last_time = elapsed
+        state.last_error = error
+        if error or elapsed > self.interval * SLOW_FRACTION:
+            state.backoff = min(state.backoff * 2, MAX_BACKOFF)
+        else:
+            state.backoff = 1
+        state.next_due = now + self.interval * state.backoff
+
+    def reset(self) -> None:
+        self.states.clear()
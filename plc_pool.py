@@ -0,0 +1,228 @@
+"""Пул соединений с PLC (snap7).
+
+Клиенты хранятся по plc_name из plc.json и переиспользуются между операциями
+чтения/записи, чтобы не платить за ISO-on-TCP connect и согласование PDU на
+каждый клик.
+"""
+import threading
+import time
+
+from plc_metrics import InstrumentedClient
+
+# Закрывать соединение, если оно не использовалось столько секунд
+IDLE_TIMEOUT = 60.0
+# Проверять живое соединение не чаще, чем раз в столько секунд
+KEEPALIVE_INTERVAL = 15.0
+# Порт ISO-on-TCP по умолчанию (в plc.json можно задать tcp_port, например для симулятора)
+S7_PORT = 102
+# Биты кода ошибки snap7 (Cli_GetLastError) уровней TCP и ISO; ошибки CPU — в старших битах
+TRANSPORT_ERROR_MASK = 0x000FFFFF
+
+
+def _lost_connection(client) -> bool:
+    """Соединение после ошибки непригодно: клиент отключён или ошибка транспортная.
+
+    При обрыве snap7 сбрасывает get_connected(), а после таймаута приёма
+    соединение формально живо, но поток ISO рассинхронизирован — это видно по
+    коду последней ошибки. Ошибки адреса в PLC (нет DB и т.п.) соединение не рвут.
+    """
+    try:
+        return not client.get_connected() or bool(client.get_last_error() & TRANSPORT_ERROR_MASK)
+    except Exception:
+        return True
+
+
+class PooledConnection:
+    """Соединение с одним PLC и его служебное состояние."""
+
+    def __init__(self, plc_name: str, plc_addr: str, rack: int, slot: int, tcp_port: int = S7_PORT,
+                 metrics=None):
+        self.plc_name = plc_name
+        self.plc_addr = plc_addr
+        self.rack = rack
+        self.slot = slot
+        self.tcp_port = tcp_port
+        self.metrics = metrics
+        self.client = None
+        self.lock = threading.RLock()
+        self.last_used = 0.0
+        self.last_check = 0.0
+        self.pdu_length = 0  # согласованный при подключении размер PDU
+
+    @property
+    def connected(self) -> bool:
+        return self.client is not None and self.client.get_connected()
+
+    def connect(self) -> None:
+        self.drop()
+        # snap7 (и его библиотека) загружается при первом обращении к PLC, а не при запуске
+        import snap7.client
+        client = snap7.client.Client()
+
+        def connect():
+            client.connect(self.plc_addr, self.rack, self.slot, self.tcp_port)
+            if not client.get_connected():
+                raise ConnectionError(f"Не удалось подключиться к PLC {self.plc_addr}")
+
+        try:
+            if self.metrics is not None:
+                self.metrics.measure(self.plc_name, 'connect', connect)
+            else:
+                connect()
+        except Exception:
+            client.destroy()
+            raise
+        self.client = InstrumentedClient(client, self.plc_name, self.metrics) if self.metrics is not None else client
+        self.pdu_length = client.get_pdu_length()
+        self.last_check = time.monotonic()
+
+    def drop(self) -> None:
+        """Закрыть клиента, игнорируя ошибки (соединение могло уже упасть)."""
+        if self.client is None:
+            return
+        client, self.client = self.client, None
+        try:
+            if self.metrics is not None:
+                self.metrics.measure(self.plc_name, 'disconnect', client.disconnect)
+            else:
+                client.disconnect()
+        except Exception:
+            pass
+        # Нативный клиент освобождаем, даже если disconnect упал на оборванном соединении
+        try:
+            client.destroy()
+        except Exception:
+            pass
+
+
+class PLCPool:
+    """Пул клиентов snap7 с ключом plc_name.
+
+    run() выдаёт живого клиента: при необходимости подключается, а после
+    обрыва связи переподключается и повторяет операцию один раз.
+    maintain() закрывает простаивающие соединения и проверяет остальные,
+    её нужно вызывать периодически (в GUI — через after()).
+    """
+
+    def __init__(self, plc_configs: list, idle_timeout: float = IDLE_TIMEOUT,
+                 keepalive_interval: float = KEEPALIVE_INTERVAL, log=None, metrics=None):
+        self.plc_configs = plc_configs
+        self.metrics = metrics
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.log = log or (lambda message: None)
+        self._connections = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self.idle_closed = 0
+
+    def _get_entry(self, plc_name: str) -> PooledConnection:
+        with self._lock:
+            entry = self._connections.get(plc_name)
+            if entry is None:
+                for plc in self.plc_configs:
+                    if plc.get('plc_name') == plc_name:
+                        entry = PooledConnection(plc_name, plc.get('plc_addr'), plc.get('rack', 0),
+                                                 plc.get('slot', 1), plc.get('tcp_port', S7_PORT), self.metrics)
+                        break
+                if entry is None or not entry.plc_addr:
+                    raise LookupError(f"Не найдены параметры PLC для '{plc_name}' в plc.json")
+                self._connections[plc_name] = entry
+            return entry
+
+    def _count(self, counter: str) -> None:
+        # Счётчики меняются из разных потоков (по одному на PLC)
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _ensure_connected(self, entry: PooledConnection) -> None:
+        if entry.connected:
+            self._count('hits')
+            return
+        self._count('misses')
+        self.log(f"Подключение к PLC {entry.plc_name} {entry.plc_addr} "
+                 f"(rack={entry.rack}, slot={entry.slot})...")
+        entry.connect()
+
+    def run(self, plc_name: str, operation):
+        """Выполнить operation(client) на соединении из пула."""
+        entry = self._get_entry(plc_name)
+        with entry.lock:
+            self._ensure_connected(entry)
+            try:
+                result = operation(entry.client)
+            except RuntimeError as e:
+                if not _lost_connection(entry.client):
+                    raise
+                # Обрыв TCP — переподключаемся и повторяем операцию
+                self.log(f"Потеряно соединение с PLC {plc_name} ({e}), переподключение...")
+                self._count('reconnects')
+                entry.connect()
+                result = operation(entry.client)
+            entry.last_used = time.monotonic()
+            return result
+
+    def pdu_length(self, plc_name: str) -> int:
+        """Согласованный размер PDU для PLC (подключается при необходимости).
+
+        Берётся из соединения и не считается обращением к пулу в hits.
+        """
+        entry = self._get_entry(plc_name)
+        with entry.lock:
+            if not entry.connected:
+                self._ensure_connected(entry)
+            return entry.pdu_length
+
+    def maintain(self) -> None:
+        """Закрыть простаивающие соединения и проверить живость остальных."""
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._connections.values())
+        for entry in entries:
+            # Соединение занято операцией — проверим в следующий раз
+            if not entry.lock.acquire(blocking=False):
+                continue
+            try:
+                if entry.client is None:
+                    continue
+                if now - entry.last_used > self.idle_timeout:
+                    entry.drop()
+                    self._count('idle_closed')
+                    self.log(f"Закрыто неиспользуемое соединение с PLC {entry.plc_name}")
+                elif now - entry.last_check > self.keepalive_interval:
+                    entry.last_check = now
+                    # get_cpu_state не сообщает об ошибке обмена — смотрим состояние клиента
+                    try:
+                        entry.client.get_cpu_state()
+                        alive = not _lost_connection(entry.client)
+                    except Exception:
+                        alive = False
+                    if not alive:
+                        # Следующий run() переподключится сам
+                        entry.drop()
+            finally:
+                entry.lock.release()
+
+    def close_all(self) -> None:
+        with self._lock:
+            entries = list(self._connections.values())
+        for entry in entries:
+            # Соединение, занятое зависшей операцией, не ждём — его закроет выход из процесса
+            if entry.lock.acquire(blocking=False):
+                try:
+                    entry.drop()
+                finally:
+                    entry.lock.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            open_count = sum(1 for entry in self._connections.values() if entry.client is not None)
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'reconnects': self.reconnects,
+            'idle_closed': self.idle_closed,
+            'open': open_count,
+        }
@@ -0,0 +1,161 @@
+"""Фоновое выполнение запросов к PLC.
+
+Все вызовы snap7 выполняются в пулах потоков, а результаты, строки лога и
+прогресс складываются в очередь. GUI забирает их методом poll() из
+after()-таймера, поэтому Tk-объекты трогаются только из главного потока.
+Запросы пользователя и служебные задачи (опрос монитора, проверка
+соединений, выгрузка метрик) идут в разные пулы: недоступный PLC, опрос
+которого ждёт таймаута подключения, не задерживает READ/WRITE.
+"""
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Потоков для запросов пользователя (READ, WRITE, снимок и т.п.)
+MAX_WORKERS = 4
+# Служебный пул: по потоку на каждый PLC монитора плюс запас на проверку соединений и метрики
+BACKGROUND_HEADROOM = 2
+
+
+class RequestCancelled(Exception):
+    """Запрос отменён пользователем."""
+
+
+class PLCRequest:
+    """Один запрос в очереди: прогресс, отмена и обратная связь с GUI."""
+
+    def __init__(self, worker, request_id: int, title: str, on_done=None, on_error=None, background=False):
+        self.worker = worker
+        self.id = request_id
+        self.title = title
+        self.background = background
+        self.on_done = on_done
+        self.on_error = on_error
+        self.done = 0
+        self.total = 0
+        self.future = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check_cancelled(self) -> None:
+        """Прервать выполнение, если запрос отменён (вызывать между операциями)."""
+        if self.cancelled:
+            raise RequestCancelled(self.title)
+
+    def log(self, message: str) -> None:
+        self.worker.log(message)
+
+    def progress(self, done: int, total: int) -> None:
+        self.done = done
+        self.total = total
+        self.worker.events.put(('progress', self, None))
+
+
+class PLCWorker:
+    """Пул потоков для запросов к PLC с очередью событий для GUI."""
+
+    def __init__(self, log=None, max_workers: int = MAX_WORKERS, plc_count: int = 0):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='plc')
+        self.background_executor = None
+        self._background_workers = 0
+        self.set_plc_count(plc_count)
+        self.events = queue.Queue()
+        self.active = {}
+        self.on_log = log or (lambda message: None)
+        self._ids = itertools.count(1)
+
+    def log(self, message: str) -> None:
+        """Потокобезопасный лог: строка будет выведена при следующем poll()."""
+        self.events.put(('log', None, message))
+
+    def set_plc_count(self, plc_count: int) -> None:
+        """Размер служебного пула под число PLC (вызывать после загрузки plc.json)."""
+        workers = plc_count + BACKGROUND_HEADROOM
+        if workers == self._background_workers:
+            return
+        if self.background_executor is not None:
+            # Начатые задачи старого пула доработают сами
+            self.background_executor.shutdown(wait=False)
+        self.background_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='plc-bg')
+        self._background_workers = workers
+
+    def run_background(self, function):
+        """Служебная задача без событий для GUI (проверка соединений, выгрузка метрик)."""
+        return self.background_executor.submit(function)
+
+    def submit(self, title: str, job, on_done=None, on_error=None, background=False) -> PLCRequest:
+        """Поставить job(request) в очередь; колбэки вызываются из poll().
+
+        background — служебный запрос (опрос монитора): выполняется в служебном
+        пуле и не показывается в прогрессе.
+        """
+        request = PLCRequest(self, next(self._ids), title, on_done, on_error, background)
+        self.active[request.id] = request
+        executor = self.background_executor if background else self.executor
+        request.future = executor.submit(self._run, request, job)
+        return request
+
+    def _run(self, request: PLCRequest, job) -> None:
+        try:
+            request.check_cancelled()
+            # После завершения job отмену не проверяем: запись уже могла дойти до PLC,
+            # и её результат (журнал, сброс кэша) должен попасть в GUI
+            result = job(request)
+        except RequestCancelled:
+            self.events.put(('cancelled', request, None))
+        except Exception as e:
+            self.events.put(('error', request, e))
+        else:
+            self.events.put(('done', request, result))
+
+    def cancel_all(self, include_background: bool = False) -> int:
+        """Отменить запросы пользователя (и служебные, если include_background)."""
+        requests = [request for request in self.active.values() if include_background or not request.background]
+        for request in requests:
+            request.cancel()
+            # Ещё не начатый запрос не попадёт в _run — убираем его здесь
+            if request.future.cancelled():
+                self.events.put(('cancelled', request, None))
+        return len(requests)
+
+    def poll(self) -> bool:
+        """Обработать накопившиеся события. Вызывать только из потока Tk.
+
+        Возвращает True, если что-то изменилось (для обновления индикатора).
+        """
+        changed = False
+        while True:
+            try:
+                kind, request, payload = self.events.get_nowait()
+            except queue.Empty:
+                return changed
+            changed = True
+            if kind == 'log':
+                self.on_log(payload)
+            elif kind == 'done':
+                self.active.pop(request.id, None)
+                if request.on_done:
+                    request.on_done(payload)
+            elif kind == 'error':
+                self.active.pop(request.id, None)
+                if request.on_error:
+                    request.on_error(payload)
+                else:
+                    self.on_log(f"ОШИБКА ({request.title}): {payload}")
+            elif kind == 'cancelled':
+                if self.active.pop(request.id, None) is not None:
+                    self.on_log(f"Запрос отменён: {request.title}")
+
+    def shutdown(self) -> None:
+        self.cancel_all(include_background=True)
+        self.executor.shutdown(wait=False)
+        self.background_executor.shutdown(wait=False)
@@ -0,0 +1,318 @@
+"""Командная строка редактора часов: чтение, запись, снимок и выгрузка без GUI.
+
+Использует то же ядро (editor_core), что и окно редактора: пул соединений,
+групповое чтение и запись с проверкой. Результаты выводятся в CSV, JSON или
+NDJSON по мере поступления (по PLC).
+
+Примеры:
+    python rh_cli.py read --zif 1 --pattern BM --format ndjson
+    python rh_cli.py snapshot --deadline 20 --output snapshot.csv
+    python rh_cli.py write --tag 111BM001A01_MAINT20_MH --hours 120
+    python rh_cli.py write --csv hours.csv --dry-run
+    python rh_cli.py export --plc 991 --format json
+    python rh_cli.py growth --days 30 --zif 2
+    python rh_cli.py forecast --within 14
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+from action_log import ActionLog
+from editor_core import HISTORY_FILE, MAX_HOURS, EditorCore, app_path
+from equip_index import ALL_ZIFS
+from plc_bulk_write import (REPORT_FIELDS, STATUS_DRY_RUN, STATUS_ERROR, STATUS_MISMATCH, STATUS_OK,
+                            hours_to_seconds, load_write_csv)
+from plc_fleet import SNAPSHOT_DEADLINE
+from row_output import FORMATS, RowWriter
+
+LOG_FILE = os.path.join('logs', 'actions.log')
+
+READ_FIELDS = ['eq_name', 'plc_name', 'zif', 'db_num', 'db_addr', 'seconds', 'hours', 'error']
+SNAPSHOT_FIELDS = ['eq_name', 'plc_name', 'zif', 'db_num', 'db_addr', 'seconds', 'hours', 'status', 'error']
+EXPORT_FIELDS = ['eq_name', 'plc_name', 'zif', 'plc_addr', 'db_num', 'db_addr']
+GROWTH_FIELDS = ['eq_name', 'from_time', 'from_hours', 'to_time', 'to_hours', 'growth_hours', 'hours_per_day']
+FORECAST_FIELDS = ['eq_name', 'hours', 'hours_per_day', 'days_left', 'eta', 'to_time']
+
+EXIT_OK = 0
+EXIT_ERRORS = 1  # команда выполнена, но часть тегов с ошибками
+EXIT_USAGE = 2
+
+
+def stderr(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def plc_names_arg(values) -> list:
+    """--plc можно повторять и перечислять через запятую."""
+    names = []
+    for value in values or []:
+        names.extend(name.strip() for name in value.split(',') if name.strip())
+    return names
+
+
+def select_equips(core: EditorCore, args) -> list:
+    return core.select(args.zif, args.pattern, plc_names_arg(args.plc))
+
+
+def open_output(args):
+    if args.output in (None, '-'):
+        return sys.stdout
+    return open(args.output, 'w', encoding='utf-8', newline='')
+
+
+def cmd_read(core: EditorCore, args, writer: RowWriter) -> int:
+    """Групповое чтение выбранного оборудования; вывод после каждого PLC."""
+    equips = select_equips(core, args)
+    failed = 0
+    by_plc = {}
+    for eq in equips:
+        by_plc.setdefault(eq.get('plc_name', ''), []).append(eq)
+    for plc_name, plc_equips in by_plc.items():
+        plc = core.get_plc(plc_name) or {}
+        start_time = time.perf_counter()
+        if not plc:
+            values, errors = {}, {eq.get('eq_name', ''): f"PLC '{plc_name}' нет в plc.json" for eq in plc_equips}
+        else:
+            values, errors, _ = core.read(plc_equips)
+        for eq in plc_equips:
+            eq_name = eq.get('eq_name', '')
+            seconds = values.get(eq_name)
+            writer.write({
+                'eq_name': eq_name,
+                'plc_name': plc_name,
+                'zif': plc.get('zif'),
+                'db_num': eq.get('db_num'),
+                'db_addr': eq.get('db_addr'),
+                'seconds': seconds,
+                'hours': round(seconds / 3600.0, 2) if seconds is not None else None,
+                'error': errors.get(eq_name, '' if seconds is not None else 'нет данных'),
+            })
+        failed += len(plc_equips) - len(values)
+        core.log(f"PLC {plc_name}: {len(values)} из {len(plc_equips)} за {time.perf_counter() - start_time:.2f} с")
+    return EXIT_ERRORS if failed else EXIT_OK
+
+
+def cmd_snapshot(core: EditorCore, args, writer: RowWriter) -> int:
+    """Параллельный снимок по PLC с дедлайном; строки — по мере завершения PLC."""
+    equips = select_equips(core, args)
+    _, plc_stats = core.snapshot(args.zif, equips=equips, deadline=args.deadline,
+                                 on_rows=lambda rows, stats: writer.write_many(rows))
+    failed = False
+    for stats in plc_stats:
+        status = stats['status'] if not stats['error'] else f"{stats['status']}: {stats['error']}"
+        core.log(f"PLC {stats['plc_name']} (ЗИФ {stats['zif']}): {stats['tags']} тегов, "
+                 f"{stats['requests']} запросов, {stats['time'] * 1000:.0f} мс — {status}")
+        failed = failed or stats['status'] != STATUS_OK
+    return EXIT_ERRORS if failed else EXIT_OK
+
+
+def cmd_write(core: EditorCore, args, writer: RowWriter) -> int:
+    """Запись одного тега (--tag/--hours) или списка из CSV (--csv) с проверкой."""
+    action_log = ActionLog(app_path(LOG_FILE))
+    try:
+        if args.csv:
+            rows, problems = load_write_csv(args.csv, core.equips, MAX_HOURS)
+            # Как и в GUI: при ошибках в файле не пишем ничего
+            if problems:
+                for problem in problems:
+                    stderr(f"ОШИБКА CSV: {problem}")
+                return EXIT_USAGE
+            report = core.write_rows(rows, dry_run=args.dry_run, rollback=not args.no_rollback)
+        else:
+            report = [write_one(core, args)]
+        for row in report:
+            if not args.dry_run:
+                action_log.record_write(row, row['old_seconds'], row['new_seconds'],
+                                        row['actual_seconds'], row['status'])
+            writer.write(row)
+    finally:
+        action_log.close()
+    return EXIT_OK if all(row['status'] in (STATUS_OK, STATUS_DRY_RUN) for row in report) else EXIT_ERRORS
+
+
+def write_one(core: EditorCore, args) -> dict:
+    equip = core.find_equip(args.tag)
+    if equip is None:
+        raise LookupError(f"Тег '{args.tag}' не найден в equips.json")
+    seconds = hours_to_seconds(args.hours)
+    row = {'eq_name': args.tag, 'plc_name': equip.get('plc_name', ''), 'db_num': equip.get('db_num'),
+           'db_addr': equip.get('db_addr'), 'old_seconds': None, 'new_seconds': seconds,
+           'actual_seconds': None, 'status': STATUS_OK, 'error': ''}
+    if args.dry_run:
+        try:
+            row['old_seconds'] = core.read_one(equip)
+        except Exception as e:
+            row['status'] = STATUS_ERROR
+            row['error'] = str(e)
+            return row
+        row['status'] = STATUS_DRY_RUN
+        return row
+    try:
+        row['old_seconds'], row['actual_seconds'] = core.write_one(equip, seconds)
+    except Exception as e:
+        row['status'] = STATUS_ERROR
+        row['error'] = str(e)
+        return row
+    if row['actual_seconds'] != seconds:
+        row['status'] = STATUS_MISMATCH
+    return row
+
+
+def cmd_export(core: EditorCore, args, writer: RowWriter) -> int:
+    """Выгрузка выбранного оборудования с параметрами PLC (без обращения к PLC)."""
+    for eq in select_equips(core, args):
+        plc = core.get_plc(eq.get('plc_name')) or {}
+        writer.write(dict(eq, zif=plc.get('zif'), plc_addr=plc.get('plc_addr')))
+    return EXIT_OK
+
+
+def iso_time(ts) -> str:
+    return datetime.datetime.fromtimestamp(ts).isoformat(timespec='seconds') if ts is not None else ''
+
+
+def history(core: EditorCore):
+    if core.history is None:
+        raise LookupError("история отключена (--no-history)")
+    return core.history
+
+
+def history_rows(core: EditorCore, args, rows: list) -> list:
+    """Строки истории только для оборудования, выбранного фильтрами."""
+    names = {eq.get('eq_name') for eq in select_equips(core, args)}
+    return [row for row in rows if row['eq_name'] in names]
+
+
+def cmd_growth(core: EditorCore, args, writer: RowWriter) -> int:
+    """Прирост часов за последние --days суток по истории (без обращения к PLC)."""
+    for row in history_rows(core, args, history(core).growth(args.days)):
+        writer.write({
+            'eq_name': row['eq_name'],
+            'from_time': iso_time(row['from_ts']),
+            'from_hours': round(row['from_seconds'] / 3600.0, 2),
+            'to_time': iso_time(row['to_ts']),
+            'to_hours': round(row['to_seconds'] / 3600.0, 2),
+            'growth_hours': row['growth_hours'],
+            'hours_per_day': row['hours_per_day'],
+        })
+    return EXIT_OK
+
+
+def cmd_forecast(core: EditorCore, args, writer: RowWriter) -> int:
+    """Оборудование, которое достигнет --max-hours за --within суток при текущей наработке."""
+    rows = history(core).forecast(args.max_hours, args.within, args.window)
+    for row in history_rows(core, args, rows):
+        writer.write({
+            'eq_name': row['eq_name'],
+            'hours': row['hours'],
+            'hours_per_day': row['hours_per_day'],
+            'days_left': row['days_left'],
+            'eta': iso_time(row['eta']),
+            'to_time': iso_time(row['to_ts']),
+        })
+    return EXIT_OK
+
+
+COMMANDS = {
+    'read': (cmd_read, READ_FIELDS),
+    'snapshot': (cmd_snapshot, SNAPSHOT_FIELDS),
+    'write': (cmd_write, REPORT_FIELDS),
+    'export': (cmd_export, EXPORT_FIELDS),
+    'growth': (cmd_growth, GROWTH_FIELDS),
+    'forecast': (cmd_forecast, FORECAST_FIELDS),
+}
+
+
+def hours_arg(value: str) -> float:
+    hours = float(value.replace(',', '.'))
+    if not 0 <= hours <= MAX_HOURS:
+        raise argparse.ArgumentTypeError(f"часы должны быть от 0 до {MAX_HOURS}")
+    return hours
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Редактор часов тех обслуживания (командная строка)')
+    parser.add_argument('--plc-file', help='plc.json (по умолчанию рядом с программой)')
+    parser.add_argument('--equips-file', help='equips.json (по умолчанию рядом с программой)')
+    parser.add_argument('--no-cache', action='store_true', help='не использовать кэш конфигурации')
+    parser.add_argument('-v', '--verbose', action='store_true', help='выводить лог в stderr')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='сохранить метрики обмена с PLC (*.prom — Prometheus, иначе JSON)')
+    parser.add_argument('--history', metavar='FILE', help=f'база истории (по умолчанию {HISTORY_FILE})')
+    parser.add_argument('--no-history', action='store_true', help='не сохранять прочитанные значения в историю')
+
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('--format', choices=FORMATS, default='csv')
+    output.add_argument('-o', '--output', help='файл результата (по умолчанию stdout)')
+
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument('--zif', default=ALL_ZIFS, help='ЗИФ из plc.json (по умолчанию все)')
+    filters.add_argument('--pattern', default='', help='подстрока тега или маска с * и ?')
+    filters.add_argument('--plc', action='append', help='имя PLC (можно повторять или перечислить через запятую)')
+
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('read', parents=[filters, output], help='прочитать часы')
+    snapshot = commands.add_parser('snapshot', parents=[filters, output], help='снимок параллельно по PLC')
+    snapshot.add_argument('--deadline', type=float, default=SNAPSHOT_DEADLINE, help='секунд на весь снимок')
+    write = commands.add_parser('write', parents=[output], help='записать часы')
+    target = write.add_mutually_exclusive_group(required=True)
+    target.add_argument('--tag', help='тег (eq_name) для записи одного значения')
+    target.add_argument('--csv', help='CSV eq_name,hours для групповой записи')
+    write.add_argument('--hours', type=hours_arg, help='часы для --tag')
+    write.add_argument('--dry-run', action='store_true', help='только прочитать текущие значения')
+    write.add_argument('--no-rollback', action='store_true', help='не откатывать значения при ошибке проверки')
+    commands.add_parser('export', parents=[filters, output], help='выгрузить список оборудования')
+    growth = commands.add_parser('growth', parents=[filters, output], help='прирост часов по истории')
+    growth.add_argument('--days', type=float, default=30, help='период, суток')
+    forecast = commands.add_parser('forecast', parents=[filters, output],
+                                   help='кто достигнет предела часов в ближайшие дни')
+    forecast.add_argument('--within', type=float, default=30, help='горизонт прогноза, суток')
+    forecast.add_argument('--window', type=float, default=30, help='период для оценки наработки, суток')
+    forecast.add_argument('--max-hours', type=float, default=MAX_HOURS, help='предел часов')
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'write' and args.tag and args.hours is None:
+        parser.error('для --tag нужно указать --hours')
+    history_path = None if args.no_history else (args.history or app_path(HISTORY_FILE))
+    core = EditorCore(log=stderr if args.verbose else None, plc_file=args.plc_file,
+                      equips_file=args.equips_file, use_cache=not args.no_cache, history_path=history_path)
+    core.load()
+    if core.problems:
+        for problem in core.problems:
+            stderr(f"ОШИБКА: {problem}")
+        return EXIT_USAGE
+    command, fields = COMMANDS[args.command]
+    stream = open_output(args)
+    writer = RowWriter(stream, args.format, fields)
+    try:
+        return command(core, args, writer)
+    except BrokenPipeError:
+        # Читатель закрыл вывод (например, | head): остаток отправляем в никуда
+        os.dup2(os.open(os.devnull, os.O_WRONLY), stream.fileno())
+        return EXIT_ERRORS
+    except (LookupError, OSError, ValueError) as e:
+        stderr(f"ОШИБКА: {e}")
+        return EXIT_USAGE
+    except RuntimeError as e:
+        # Ошибки snap7 (PLC недоступен и т.п.), не перехваченные командой
+        stderr(f"ОШИБКА PLC: {e}")
+        return EXIT_ERRORS
+    except KeyboardInterrupt:
+        stderr("Прервано")
+        return EXIT_ERRORS
+    finally:
+        writer.close()
+        if stream is not sys.stdout:
+            stream.close()
+        core.close()
+        if args.metrics:
+            core.metrics.export(args.metrics)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Потоковый вывод строк (словарей) в CSV, JSON и NDJSON.
+
+Каждая строка записывается и сбрасывается в поток сразу, поэтому результаты
+видны по мере поступления. JSON выводится массивом: скобки пишутся в начале
+и в close().
+"""
+import csv
+import json
+
+FORMATS = ('csv', 'json', 'ndjson')
+
+
+class RowWriter:
+    """Запись строк с полями fields в stream в формате fmt."""
+
+    def __init__(self, stream, fmt: str, fields: list):
+        if fmt not in FORMATS:
+            raise ValueError(f"Неизвестный формат вывода: {fmt}")
+        self.stream = stream
+        self.fmt = fmt
+        self.fields = list(fields)
+        self.count = 0
+        self._csv = None
+        if fmt == 'csv':
+            self._csv = csv.DictWriter(stream, fieldnames=self.fields, extrasaction='ignore', lineterminator='\n')
+            self._csv.writeheader()
+        elif fmt == 'json':
+            stream.write('[')
+        stream.flush()
+
+    def write(self, row: dict) -> None:
+        if self.fmt == 'csv':
+            self._csv.writerow(row)
+        else:
+            line = json.dumps({field: row.get(field) for field in self.fields}, ensure_ascii=False)
+            if self.fmt == 'json':
+                line = ('\n' if self.count == 0 else ',\n') + line
+            else:
+                line += '\n'
+            self.stream.write(line)
+        self.count += 1
+        self.stream.flush()
+
+    def write_many(self, rows) -> None:
+        for row in rows:
+            self.write(row)
+
+    def close(self) -> None:
+        if self.fmt == 'json':
+            self.stream.write('\n]\n' if self.count else ']\n')
+        self.stream.flush()
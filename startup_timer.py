@@ -0,0 +1,63 @@
+"""Замер времени запуска редактора по этапам.
+
+Этапы: import (загрузка модулей), config (чтение конфигурации и индекс
+оборудования), widgets (создание окна и виджетов), first_paint (от конца
+конструктора до первой отрисовки окна). Отчёт пишется в журнал действий, а с
+ключом --startup-report печатается в JSON, чтобы отслеживать регрессии.
+"""
+import time
+from contextlib import contextmanager
+
+STAGES = ('import', 'config', 'widgets', 'first_paint')
+STAGE_TITLES = {
+    'import': 'импорт',
+    'config': 'конфигурация',
+    'widgets': 'виджеты',
+    'first_paint': 'первая отрисовка',
+}
+
+
+class StartupTimer:
+    """Суммарное время по этапам запуска, отсчёт от started (time.perf_counter)."""
+
+    def __init__(self, started: float = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.stages = {}
+        self.info = {}  # дополнительные сведения для отчёта (например, попадание в кэш)
+        self._open = {}
+        self.finished = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, stage: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start_time)
+
+    def begin(self, stage: str) -> None:
+        self._open[stage] = time.perf_counter()
+
+    def end(self, stage: str) -> None:
+        start_time = self._open.pop(stage, None)
+        if start_time is not None:
+            self.add(stage, time.perf_counter() - start_time)
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    def report(self) -> dict:
+        """Миллисекунды по этапам и всего (до первой отрисовки)."""
+        report = {stage: round(self.stages.get(stage, 0.0) * 1000, 1) for stage in STAGES}
+        end_time = self.finished if self.finished is not None else time.perf_counter()
+        report['total'] = round((end_time - self.started) * 1000, 1)
+        report.update(self.info)
+        return report
+
+    def format(self) -> str:
+        report = self.report()
+        parts = [f"{STAGE_TITLES[stage]} {report[stage]:.0f} мс" for stage in STAGES]
+        return f"Запуск: {', '.join(parts)}; всего {report['total']:.0f} мс"
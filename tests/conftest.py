@@ -0,0 +1,44 @@
+"""Общие настройки тестов: модули редактора (корень) и утилит (utils) импортируются напрямую.
+
+Фикстуры sim и pool поднимают локальный симулятор PLC (benchmarks/plc_sim.py)
+с оборудованием SIM_EQUIPS; без snap7 такие тесты пропускаются.
+"""
+import os
+import socket
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, 'utils'), os.path.join(ROOT_DIR, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+SIM_PLC = '991'
+SIM_EQUIPS = [{'eq_name': f'A{i}', 'plc_name': SIM_PLC, 'db_num': 10, 'db_addr': 18 + 4 * i} for i in range(6)] + [
+    {'eq_name': f'B{i}', 'plc_name': SIM_PLC, 'db_num': 11, 'db_addr': 18 + 8 * i} for i in range(3)]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def sim():
+    pytest.importorskip('snap7')
+    from plc_sim import PLCSimulator
+
+    with PLCSimulator([{'plc_name': SIM_PLC, 'zif': 1}], SIM_EQUIPS, base_port=free_port()) as simulator:
+        yield simulator
+
+
+@pytest.fixture
+def pool(sim):
+    from plc_pool import PLCPool
+
+    pool = PLCPool(sim.plc_configs())
+    yield pool
+    pool.close_all()
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip('alive_progress')
+pytest.importorskip('colorama')
+
+import ecs7tags2equips  # noqa: E402
+from ecs7tags2equips import DBHelper, equips_source_hash  # noqa: E402
+from equips_merge import EquipsFile  # noqa: E402
+from exceptions import FileFindError  # noqa: E402
+
+
+def make_sources(db_dir):
+    for path in DBHelper.source_files(db_dir):
+        path.write_bytes(path.name.encode())
+
+
+def test_source_hash_depends_on_databases_and_params(tmp_path):
+    make_sources(tmp_path)
+    first = equips_source_hash('MAINT%_MH', db_dir=tmp_path)
+
+    assert equips_source_hash('MAINT%_MH', db_dir=tmp_path) == first
+    assert equips_source_hash('MAINT%_MH', only_a_point=False, db_dir=tmp_path) != first
+    assert equips_source_hash('MAINT%_MH', db_dir=tmp_path, extra=(['A'],)) != first
+    (tmp_path / 'SdrPoint30.sqlite').write_bytes(b'changed')
+    assert equips_source_hash('MAINT%_MH', db_dir=tmp_path) != first
+
+
+def test_source_hash_needs_every_database(tmp_path):
+    make_sources(tmp_path)
+    (tmp_path / 'SdrPoint30.sqlite').unlink()
+
+    with pytest.raises(FileFindError):
+        equips_source_hash('MAINT%_MH', db_dir=tmp_path)
+
+
+def test_main_skips_extraction_when_sources_are_unchanged(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    make_sources(tmp_path)
+    monkeypatch.setattr(ecs7tags2equips, '_TAG_DB_DIR', tmp_path)
+    monkeypatch.setattr(ecs7tags2equips, '_EQUIPS_STATE', tmp_path / 'state.json')
+    created = []
+
+    class Tags:
+        def __init__(self, *args, **kwargs):
+            created.append(args)
+
+        def save_equip_json(self):
+            pass
+
+    monkeypatch.setattr(ecs7tags2equips, 'TagsHelper', Tags)
+    EquipsFile('equips.json', tmp_path / 'state.json', 'changes.txt').update(
+        [], equips_source_hash('MAINT%_MH', db_dir=tmp_path))
+
+    ecs7tags2equips.main()
+    assert created == []
+
+    (tmp_path / 'SdrBlkAlg30.sqlite').write_bytes(b'changed')
+    ecs7tags2equips.main()
+    assert created == [('MAINT%_MH',)]
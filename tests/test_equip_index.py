@@ -0,0 +1,47 @@
+from equip_index import ALL_ZIFS, EquipIndex
+
+PLC_CONFIGS = [{'plc_name': '991', 'zif': 1}, {'plc_name': '992', 'zif': 2}, {'plc_name': '993'}]
+EQUIPS = [
+    {'eq_name': '020BM110A01_MAINT20_MH', 'plc_name': '991'},
+    {'eq_name': '010BC011M01_MAINT_MH', 'plc_name': '991'},
+    {'eq_name': '2010BC015U01Maint_MH', 'plc_name': '992'},
+    {'eq_name': '2930AG605A01M01Maint_MH', 'plc_name': '992'},
+    {'eq_name': 't_pu977', 'plc_name': '993'},
+]
+
+
+def names(equips):
+    return [eq['eq_name'] for eq in equips]
+
+
+def brute_force(text, zif):
+    plc_zif = {plc['plc_name']: str(plc.get('zif')) for plc in PLC_CONFIGS if plc.get('zif') is not None}
+    return sorted(eq['eq_name'] for eq in EQUIPS
+                  if text.strip().lower() in eq['eq_name'].lower()
+                  and (zif == ALL_ZIFS or plc_zif.get(eq['plc_name']) == str(zif)))
+
+
+def test_search_returns_sorted_equips_by_zif():
+    index = EquipIndex(EQUIPS, PLC_CONFIGS)
+
+    assert names(index.search()) == sorted(names(EQUIPS))
+    assert names(index.search('', 1)) == ['010BC011M01_MAINT_MH', '020BM110A01_MAINT20_MH']
+    assert names(index.search('', '2')) == ['2010BC015U01Maint_MH', '2930AG605A01M01Maint_MH']
+    assert index.search('', 3) == []
+
+
+def test_search_is_case_insensitive_substring_match():
+    index = EquipIndex(EQUIPS, PLC_CONFIGS)
+
+    for text in ('maint', 'BC0', ' mh ', 'a01m', 'pu', 'xyz', 'm', '_'):
+        for zif in (ALL_ZIFS, 1, 2):
+            assert names(index.search(text, zif)) == brute_force(text, zif), (text, zif)
+
+
+def test_search_narrowing_and_widening_filter_stays_exact():
+    index = EquipIndex(EQUIPS, PLC_CONFIGS)
+
+    # Набор текста по символу, стирание и смена ЗИФ — как в поле фильтра
+    for text, zif in [('2', ALL_ZIFS), ('20', ALL_ZIFS), ('201', ALL_ZIFS), ('20', ALL_ZIFS), ('20', 1),
+                      ('20b', 1), ('20', 2), ('', 2), ('maint_', ALL_ZIFS), ('maint', ALL_ZIFS)]:
+        assert names(index.search(text, zif)) == brute_force(text, zif), (text, zif)
@@ -0,0 +1,71 @@
+import json
+
+from equips_merge import EquipsFile, file_sha1, merge_equips, sources_hash
+
+
+def equip(name, db_addr=18, plc_name='991', db_num=6801):
+    return {'eq_name': name, 'plc_name': plc_name, 'db_num': db_num, 'db_addr': db_addr}
+
+
+def test_merge_adds_removes_and_updates_generated_entries():
+    existing = [equip('A'), equip('B'), equip('GONE'), equip('t_pu977', plc_name='test_plc')]
+    generated = [equip('A'), equip('B', db_addr=22), equip('NEW')]
+
+    merged, changes = merge_equips(existing, generated, previous={'A', 'B', 'GONE'})
+
+    assert merged == [equip('A'), equip('B', db_addr=22), equip('t_pu977', plc_name='test_plc'), equip('NEW')]
+    assert changes['added'] == [equip('NEW')]
+    assert changes['removed'] == [equip('GONE')]
+    assert changes['changed'] == [('B', {'db_addr': (18, 22)})]
+    assert changes['manual'] == [equip('t_pu977', plc_name='test_plc')]
+
+
+def test_merge_without_previous_keeps_unknown_entries_as_manual():
+    merged, changes = merge_equips([equip('OLD')], [equip('A')])
+
+    assert merged == [equip('OLD'), equip('A')]
+    assert changes['removed'] == [] and changes['manual'] == [equip('OLD')]
+
+
+def test_merge_keeps_extra_fields_and_drops_duplicates():
+    existing = [dict(equip('A'), comment='ручная правка'), equip('A')]
+
+    merged, changes = merge_equips(existing, [equip('A', db_addr=30), equip('A', db_addr=99)], {'A'})
+
+    assert merged == [dict(equip('A', db_addr=30), comment='ручная правка')]
+    assert changes['changed'] == [('A', {'db_addr': (18, 30)})]
+
+
+def test_sources_hash_depends_on_content_and_params(tmp_path):
+    source = tmp_path / 'Points.xlsx'
+    source.write_bytes(b'v1')
+    hashes = {}
+
+    first = sources_hash([source], ('p',), hashes)
+
+    assert hashes == {str(source): file_sha1(source)}
+    assert sources_hash([source], ('p',)) == first
+    assert sources_hash([source], ('q',)) != first
+    source.write_bytes(b'v2')
+    assert sources_hash([source], ('p',)) != first
+
+
+def test_equips_file_update_is_incremental(tmp_path):
+    path = tmp_path / 'equips.json'
+    path.write_text(json.dumps({'equips': [equip('t_pu977', plc_name='test_plc')]}), encoding='utf-8')
+    equips_file = EquipsFile(path, tmp_path / 'cache' / 'state.json', tmp_path / 'changes.txt')
+
+    changes = equips_file.update([equip('A'), equip('B')], 'hash1')
+
+    assert changes['written'] and equips_file.is_current('hash1') and not equips_file.is_current('hash2')
+    assert [eq['eq_name'] for eq in json.loads(path.read_text(encoding='utf-8'))['equips']] == ['t_pu977', 'A', 'B']
+    assert not equips_file.update([equip('A'), equip('B')], 'hash2')['written']
+
+    changes = equips_file.update([equip('A')], 'hash3')
+
+    assert changes['removed'] == [equip('B')]
+    assert [eq['eq_name'] for eq in json.loads(path.read_text(encoding='utf-8'))['equips']] == ['t_pu977', 'A']
+    assert '- B' in (tmp_path / 'changes.txt').read_text(encoding='utf-8')
+    # Файл правили вручную — он больше не считается актуальным
+    path.write_text(path.read_text(encoding='utf-8') + '\n', encoding='utf-8')
+    assert not equips_file.is_current('hash3')
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from history_store import HISTORY_TOLERANCE, SECONDS_PER_DAY, HistoryStore
+
+T0 = 1_700_000_000.0
+STEP = 60.0
+
+
+def machine_samples(periods, value=1_000_000):
+    """Отсчёты раз в минуту: periods — (длительность, работает ли агрегат)."""
+    samples = []
+    ts = T0
+    for duration, running in periods:
+        end = ts + duration
+        while ts < end:
+            samples.append((ts, value))
+            ts += STEP
+            if running:
+                value += int(STEP)
+    return samples
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.sqlite'))
+    yield store
+    store.close()
+
+
+def test_collinear_samples_are_stored_as_few_runs(store):
+    periods = [(8 * 3600, True), (4 * 3600, False)] * 4
+    samples = machine_samples(periods)
+
+    store.record_many([('M1', value, ts) for ts, value in samples])
+
+    stats = store.stats()
+    assert stats['samples'] == len(samples)
+    assert stats['runs'] <= len(periods) + 1
+    for ts, value in samples:
+        assert abs(store.value_at('M1', ts)[1] - value) <= HISTORY_TOLERANCE
+
+
+def test_timestamp_jitter_does_not_break_compression(store):
+    # Опрос монитора раз в 2 с, время отсчёта плавает на задержку ответа PLC
+    jitter = random.Random(1)
+    samples = [(T0 + i * 2 + jitter.uniform(-0.2, 0.2), 1000 + i * 2) for i in range(5000)]
+
+    store.record_many([('M1', value, ts) for ts, value in samples])
+
+    assert store.stats()['runs'] <= 10
+    for ts, value in samples[::50]:
+        assert abs(store.value_at('M1', ts)[1] - value) <= HISTORY_TOLERANCE
+
+
+def test_repeated_and_older_samples_are_skipped(store):
+    store.record_many([('M1', 100, T0), ('M1', 160, T0 + 60)])
+    store.record_many([('M1', 160, T0 + 60), ('M1', 50, T0 + 30)])
+
+    assert store.stats()['samples'] == 2
+    assert store.latest() == {'M1': (T0 + 60, 160)}
+
+
+def test_open_run_continues_after_reopen(tmp_path):
+    path = str(tmp_path / 'history.sqlite')
+    store = HistoryStore(path)
+    store.record_many([('M1', 100 + i * 60, T0 + i * 60) for i in range(10)])
+    store.close()
+
+    store = HistoryStore(path)
+    store.record_many([('M1', 100 + i * 60, T0 + i * 60) for i in range(10, 20)])
+    try:
+        assert store.stats() == {'tags': 1, 'runs': 1, 'samples': 20, 'writes': 0}
+    finally:
+        store.close()
+
+
+def test_growth_ignores_jumps_from_writes(store):
+    now = T0 + 10 * SECONDS_PER_DAY
+    # 10 суток по 12 ч работы в сутки
+    samples = machine_samples([(12 * 3600, True), (12 * 3600, False)] * 10)
+    store.record_many([('M1', value, ts) for ts, value in samples[:len(samples) // 2]])
+    # Ручная запись +1000 ч посередине, дальше счётчик растёт от нового значения
+    offset = 1000 * 3600
+    write_ts = samples[len(samples) // 2][0]
+    store.record_write('M1', samples[len(samples) // 2][1], samples[len(samples) // 2][1] + offset,
+                       samples[len(samples) // 2][1] + offset, 'ok', ts=write_ts)
+    store.record_many([('M1', value + offset, ts) for ts, value in samples[len(samples) // 2 + 1:]])
+
+    [row] = store.growth(days=10, now=now)
+
+    assert row['growth_hours'] == pytest.approx(120, abs=0.1)
+    assert row['hours_per_day'] == pytest.approx(12, abs=0.1)
+    assert [write['status'] for write in store.writes('M1')] == ['ok']
+
+
+def test_forecast_lists_equips_reaching_limit(store):
+    now = T0 + 2 * SECONDS_PER_DAY
+    store.record_many([('NEAR', 19990 * 3600 + int(i * 3600), T0 + i * 3600) for i in range(49)])
+    store.record_many([('FAR', 100 * 3600 + int(i * 3600), T0 + i * 3600) for i in range(49)])
+    store.record_many([('IDLE', 500 * 3600, T0 + i * 3600) for i in range(49)])
+
+    rows = store.forecast(max_hours=20000, within_days=14, window_days=2, now=now)
+
+    assert [row['eq_name'] for row in rows] == ['NEAR']
+    assert rows[0]['days_left'] == 0.0
@@ -0,0 +1,51 @@
+import sys
+
+import import_equips
+from import_equips import merge_sources, validate_equip
+
+
+def equip(name, db_addr=18, plc_name='991', db_num=6801):
+    return {'eq_name': name, 'plc_name': plc_name, 'db_num': db_num, 'db_addr': db_addr}
+
+
+def result(source, *equips):
+    return {'source': source, 'equips': list(equips), 'problems': [], 'timings': {}}
+
+
+def test_validate_equip():
+    assert validate_equip(equip('A')) == ''
+    assert validate_equip(equip(' ')) == 'пустой eq_name'
+    assert validate_equip(equip('A', plc_name=None)) == 'нет plc_name'
+    assert validate_equip(equip('A', db_addr=-1))
+    assert validate_equip(equip('A', db_num=True))
+    assert validate_equip(equip('A', db_num=1.5))
+
+
+def test_merge_sources_deduplicates_and_flags_conflicts():
+    ecs7 = result('ecs7', equip('A'), dict(equip('B'), extra=1), equip('BAD', plc_name=''))
+    ecs8 = result('ecs8', equip('B'), equip('A', db_addr=22), equip('C', plc_name='993'))
+
+    equips, conflicts, invalid = merge_sources([ecs7, ecs8])
+
+    # Приоритет — у первого источника, лишние поля отбрасываются
+    assert equips == [equip('A'), equip('B'), equip('C', plc_name='993')]
+    assert conflicts == [('A', [('ecs7', ('991', 6801, 18)), ('ecs8', ('991', 6801, 22))])]
+    assert invalid == [('ecs7', 'BAD', 'нет plc_name')]
+
+
+def test_merge_sources_flags_conflicting_duplicates_within_source():
+    equips, conflicts, _ = merge_sources([result('ecs8', equip('A'), equip('A'), equip('A', db_addr=22))])
+
+    assert equips == [equip('A')]
+    assert conflicts == [('A', [('ecs8', ('991', 6801, 18)), ('ecs8', ('991', 6801, 22))])]
+
+
+def test_main_skips_missing_source(tmp_path, monkeypatch, capsys):
+    output = tmp_path / 'equips.json'
+    monkeypatch.setattr(sys, 'argv', ['import_equips.py', '--no-ecs7', '--xlsx', str(tmp_path / 'Points.xlsx'),
+                                      '-o', str(output)])
+    assert import_equips.main() == 2
+    captured = capsys.readouterr()
+    assert captured.out == f"ecs8: нет файла {tmp_path / 'Points.xlsx'}, источник пропущен\n"
+    assert captured.err == "ОШИБКА: нет ни одного доступного источника\n"
+    assert not output.exists()
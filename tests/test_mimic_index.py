@@ -0,0 +1,65 @@
+import os
+
+from mimic_index import MimicIndex
+
+TAGS = ['020BM110A01_MAINT_MH', '020BM120A01_MAINT_MH']
+
+
+def write_mimics(directory, texts: dict) -> list:
+    paths = []
+    for name, text in texts.items():
+        path = directory / name
+        path.write_text(text, encoding='ascii')
+        paths.append(path)
+    return paths
+
+
+def update(index, tags, files) -> list:
+    scanned = []
+    index.update(tags, files, processes=1, on_file=lambda path: scanned.append(path.name))
+    return sorted(scanned)
+
+
+def test_only_changed_files_are_rescanned(tmp_path):
+    files = write_mimics(tmp_path, {'a.g': TAGS[0], 'b.g': TAGS[1], 'c.g': f'{TAGS[0]} {TAGS[1]}'})
+    index = MimicIndex(tmp_path / 'index.sqlite')
+    try:
+        assert update(index, TAGS, files) == ['a.g', 'b.g', 'c.g']
+        assert update(index, TAGS, files) == []
+
+        (tmp_path / 'c.g').write_text(f'{TAGS[1]} only', encoding='ascii')
+        assert update(index, TAGS, files) == ['c.g']
+        assert index.stats['changed'] == 1
+        # Строка c.g для первого тега устарела и удалена
+        assert index.tags_to_mimics(TAGS) == {TAGS[0]: ['a.g'], TAGS[1]: ['b.g', 'c.g']}
+    finally:
+        index.close()
+
+
+def test_touched_file_with_same_content_is_not_rescanned(tmp_path):
+    files = write_mimics(tmp_path, {'a.g': TAGS[0], 'b.g': TAGS[1]})
+    index = MimicIndex(tmp_path / 'index.sqlite')
+    try:
+        update(index, TAGS, files)
+        stat = os.stat(files[0])
+        os.utime(files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        assert update(index, TAGS, files) == []
+        assert index.mimics(TAGS[0]) == ['a.g']
+    finally:
+        index.close()
+
+
+def test_deleted_files_and_new_tags(tmp_path):
+    files = write_mimics(tmp_path, {'a.g': f'{TAGS[0]} NEW_TAG', 'b.g': TAGS[1]})
+    index = MimicIndex(tmp_path / 'index.sqlite')
+    try:
+        update(index, TAGS, files)
+
+        # Новый тег ищется во всех файлах, удалённый файл уходит из индекса
+        assert update(index, TAGS + ['NEW_TAG'], files[:1]) == ['a.g']
+        assert index.stats['deleted'] == 1
+        assert index.tags_to_mimics(TAGS + ['NEW_TAG']) == {TAGS[0]: ['a.g'], TAGS[1]: [], 'NEW_TAG': ['a.g']}
+        assert index.tags_without_mimic(TAGS) == [TAGS[1]]
+    finally:
+        index.close()
@@ -0,0 +1,41 @@
+import logging
+
+from mimic_scanner import MimicScanner, tags_to_mimics
+
+TAGS = ['020BM110A01_MAINT_MH', '020BM110A01_MAINT20_MH', 'BM110', 'MAINT2', 'ABC_1']
+
+
+def test_scanner_matches_substring_check(tmp_path):
+    texts = {
+        'a.g': 'text 020BM110A01_MAINT20_MH; other',
+        'b.g': '<tag>020BM110A01_MAINT_MH</tag> ABC_1',
+        'c.g': 'nothing here',
+        'd.g': '',
+    }
+    files = []
+    for name, text in texts.items():
+        (tmp_path / name).write_text(text, encoding='ascii')
+        files.append(tmp_path / name)
+
+    mimics = tags_to_mimics(TAGS, files, processes=1)
+
+    assert mimics == {tag: [name for name, text in texts.items() if tag in text] for tag in TAGS}
+
+
+def test_scanner_finds_overlapping_tags_in_one_token():
+    scanner = MimicScanner(TAGS)
+
+    found = {scanner.tags[index] for index in scanner.scan_bytes(b'x 020BM110A01_MAINT20_MH y')}
+
+    assert found == {'020BM110A01_MAINT20_MH', 'BM110', 'MAINT2'}
+
+
+def test_non_ascii_tags_are_skipped_with_warning(tmp_path, caplog):
+    (tmp_path / 'a.g').write_text('AB Тег1', encoding='utf-8')
+
+    with caplog.at_level(logging.WARNING):
+        mimics = tags_to_mimics(['AB', 'ABĆ', 'Тег1'], [tmp_path / 'a.g'], processes=1)
+
+    # 'ABĆ' не превращается в 'AB' и не находится на чужом месте
+    assert mimics == {'AB': ['a.g'], 'ABĆ': [], 'Тег1': []}
+    assert 'ABĆ' in caplog.text
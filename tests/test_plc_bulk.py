@@ -0,0 +1,93 @@
+import struct
+
+from plc_bulk import (DINT_SIZE, MAX_MULTI_VARS, MULTI_REQUEST_HEADER, MULTI_REQUEST_ITEM, MULTI_RESPONSE_HEADER,
+                      MULTI_RESPONSE_ITEM, decode_dints, plan_batches, plan_ranges)
+
+
+def equip(name, db_addr, db_num=100, plc_name='991'):
+    return {'eq_name': name, 'plc_name': plc_name, 'db_num': db_num, 'db_addr': db_addr}
+
+
+def test_plan_ranges_merges_addresses_of_one_db():
+    equips = [equip('c', 26), equip('a', 18), equip('b', 22)]
+
+    ranges = plan_ranges(equips, max_bytes=222)
+
+    assert len(ranges) == 1
+    assert (ranges[0].db_num, ranges[0].start, ranges[0].size) == (100, 18, 3 * DINT_SIZE)
+    assert [(eq['eq_name'], offset) for eq, offset in ranges[0].items] == [('a', 0), ('b', 4), ('c', 8)]
+
+
+def test_plan_ranges_covers_gaps_inside_one_range():
+    ranges = plan_ranges([equip('a', 18), equip('b', 90)], max_bytes=222)
+
+    assert len(ranges) == 1
+    assert ranges[0].size == 90 - 18 + DINT_SIZE
+
+
+def test_plan_ranges_splits_by_max_bytes():
+    equips = [equip(f't{i}', 18 + i * DINT_SIZE) for i in range(10)]
+
+    ranges = plan_ranges(equips, max_bytes=4 * DINT_SIZE)
+
+    assert [len(read_range.items) for read_range in ranges] == [4, 4, 2]
+    assert all(read_range.size <= 4 * DINT_SIZE for read_range in ranges)
+    assert [read_range.start for read_range in ranges] == [18, 34, 50]
+
+
+def test_plan_ranges_separates_dbs_and_plcs_and_skips_incomplete():
+    equips = [equip('a', 18), equip('b', 22, db_num=101), equip('c', 18, plc_name='992'),
+              {'eq_name': 'no_addr', 'plc_name': '991', 'db_num': 100}]
+
+    ranges = plan_ranges(equips, max_bytes=222)
+
+    assert sorted((r.plc_name, r.db_num) for r in ranges) == [('991', 100), ('991', 101), ('992', 100)]
+    assert sum(len(r.items) for r in ranges) == 3
+
+
+def test_decode_dints_reads_big_endian_values_by_offset():
+    buffer = struct.pack('>iiii', 1, -2, 3600, 72000000)
+
+    assert decode_dints(buffer, [12, 0, 4]) == [72000000, 1, -2]
+    # Перекрывающиеся смещения разбираются по одному
+    assert decode_dints(buffer + b'\0\0', [8, 10]) == [3600, struct.unpack('>i', buffer[10:14])[0]]
+
+
+def scattered_ranges(count, addresses_per_db=1):
+    equips = [equip(f't{db}_{i}', 18 + i * DINT_SIZE, db_num=db)
+              for db in range(count) for i in range(addresses_per_db)]
+    return plan_ranges(equips, max_bytes=222)
+
+
+def response_size(batch):
+    return MULTI_RESPONSE_HEADER + sum(MULTI_RESPONSE_ITEM + r.size + r.size % 2 for r in batch)
+
+
+def test_plan_batches_keeps_all_ranges_in_order():
+    ranges = scattered_ranges(45)
+
+    batches = plan_batches(ranges, pdu_length=960)
+
+    assert [r for batch in batches for r in batch] == ranges
+    assert [len(batch) for batch in batches] == [MAX_MULTI_VARS, MAX_MULTI_VARS, 5]
+
+
+def test_plan_batches_fits_request_and_response_into_pdu():
+    pdu_length = 240
+    ranges = scattered_ranges(30, addresses_per_db=5)
+
+    batches = plan_batches(ranges, pdu_length)
+
+    assert len(batches) > 1
+    for batch in batches:
+        assert response_size(batch) <= pdu_length
+        assert MULTI_REQUEST_HEADER + MULTI_REQUEST_ITEM * len(batch) <= pdu_length
+
+
+def test_plan_batches_puts_oversized_range_alone():
+    ranges = scattered_ranges(1, addresses_per_db=40) + scattered_ranges(2)[1:]
+
+    batches = plan_batches(ranges, pdu_length=100)
+
+    assert batches[0] == ranges[:1]
+    assert plan_batches([], pdu_length=240) == []
@@ -0,0 +1,191 @@
+import json
+
+import pytest
+
+import rh_cli
+from conftest import SIM_EQUIPS as EQUIPS
+from conftest import SIM_PLC as PLC_NAME
+from plc_bulk import read_plc_values
+from plc_bulk_write import (STATUS_DRY_RUN, STATUS_ERROR, STATUS_MISMATCH, STATUS_OK, STATUS_ROLLED_BACK, WriteRow,
+                            bulk_write, hours_to_seconds, load_write_csv, plan_write_spans)
+from plc_worker import PLCRequest, PLCWorker, RequestCancelled
+
+
+class FaultyClient:
+    """Клиент snap7, портящий первую запись в DB fail_db (ошибкой или другим значением).
+
+    Адреса DB 11 не подряд, поэтому каждая строка B пишется своим запросом и
+    портится только B0.
+    """
+
+    def __init__(self, client, faults):
+        self._client = client
+        self._faults = faults
+
+    def db_write(self, db_num, start, data):
+        faults = self._faults
+        if faults.on_write is not None:
+            faults.on_write()
+        if db_num == faults.fail_db and faults.armed:
+            faults.armed = False
+            if faults.corrupt:
+                data = bytearray(data)
+                data[-1] ^= 1
+            else:
+                raise RuntimeError('CPU : Function not available')
+        return self._client.db_write(db_num, start, data)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class FaultyPool:
+    def __init__(self, pool, fail_db=None, corrupt=False, on_write=None):
+        self.pool = pool
+        self.fail_db = fail_db
+        self.corrupt = corrupt
+        self.on_write = on_write
+        self.armed = True
+
+    def run(self, plc_name, operation):
+        return self.pool.run(plc_name, lambda client: operation(FaultyClient(client, self)))
+
+    def pdu_length(self, plc_name):
+        return self.pool.pdu_length(plc_name)
+
+
+def plc_values(pool) -> dict:
+    values, errors, _ = read_plc_values(pool, PLC_NAME, EQUIPS)
+    assert not errors
+    return values
+
+
+def rows(hours=100.0):
+    return [WriteRow(eq, hours) for eq in EQUIPS]
+
+
+def by_status(report) -> dict:
+    result = {}
+    for row in report:
+        result.setdefault(row['status'], []).append(row['eq_name'])
+    return result
+
+
+def test_plan_write_spans_merges_contiguous_rows():
+    spans = plan_write_spans(rows(), max_bytes=16)
+
+    # A0..A5 подряд, но не больше 16 байт в запросе; B с промежутками — по одному
+    assert [(db_num, start, [row.eq_name for row in span_rows]) for _, db_num, start, span_rows in spans] == [
+        (10, 18, ['A0', 'A1', 'A2', 'A3']), (10, 34, ['A4', 'A5']),
+        (11, 18, ['B0']), (11, 26, ['B1']), (11, 34, ['B2'])]
+
+
+def test_bulk_write_writes_and_verifies_all_rows(pool):
+    report = bulk_write(pool, rows(100.5))
+
+    assert by_status(report) == {STATUS_OK: [eq['eq_name'] for eq in EQUIPS]}
+    assert set(plc_values(pool).values()) == {hours_to_seconds(100.5)}
+
+
+def test_bulk_write_dry_run_only_reads(pool, sim):
+    report = bulk_write(pool, rows(), dry_run=True)
+
+    assert {row['status'] for row in report} == {STATUS_DRY_RUN}
+    assert {row['eq_name']: row['old_seconds'] for row in report} == sim.values
+    assert plc_values(pool) == sim.values
+
+
+def test_bulk_write_rolls_back_all_rows_after_write_error(pool, sim):
+    report = bulk_write(FaultyPool(pool, fail_db=11), rows(), rollback=True)
+
+    assert {row['status'] for row in report} == {STATUS_ROLLED_BACK}
+    assert [row['eq_name'] for row in report if row['error']] == ['B0']
+    assert plc_values(pool) == sim.values
+
+
+def test_bulk_write_rolls_back_after_mismatch(pool, sim):
+    report = bulk_write(FaultyPool(pool, fail_db=10, corrupt=True), rows(), rollback=True)
+
+    assert {row['status'] for row in report} == {STATUS_ROLLED_BACK}
+    assert plc_values(pool) == sim.values
+
+
+def test_bulk_write_reports_mismatch_without_rollback(pool):
+    report = bulk_write(FaultyPool(pool, fail_db=10, corrupt=True), rows(), rollback=False)
+
+    assert by_status(report)[STATUS_MISMATCH] == ['A5']
+    assert plc_values(pool)['A5'] == hours_to_seconds(100.0) ^ 1
+
+
+def test_bulk_write_without_rollback_keeps_written_rows(pool, sim):
+    report = bulk_write(FaultyPool(pool, fail_db=11), rows(), rollback=False)
+
+    assert by_status(report)[STATUS_ERROR] == ['B0']
+    values = plc_values(pool)
+    assert values['B0'] == sim.values['B0']
+    assert values['B1'] == values['A0'] == hours_to_seconds(100.0)
+
+
+def test_bulk_write_cancelled_before_write_changes_nothing(pool, sim):
+    request = PLCRequest(PLCWorker(), 1, 'CSV')
+    request.cancel()
+
+    with pytest.raises(RequestCancelled):
+        bulk_write(pool, rows(), request=request)
+    assert plc_values(pool) == sim.values
+
+
+def test_bulk_write_is_not_interrupted_by_cancel_during_write(pool):
+    request = PLCRequest(PLCWorker(), 1, 'CSV')
+
+    report = bulk_write(FaultyPool(pool, on_write=request.cancel), rows(7.0), request=request)
+
+    assert request.cancelled
+    assert {row['status'] for row in report} == {STATUS_OK}
+    assert set(plc_values(pool).values()) == {hours_to_seconds(7.0)}
+
+
+def test_load_write_csv_reports_every_problem(tmp_path):
+    path = tmp_path / 'hours.csv'
+    path.write_text('eq_name,hours\nA0,12.5\nA1,abc\nA0,1\nX,1\nA2,-1\nA3\n', encoding='utf-8')
+
+    loaded, problems = load_write_csv(str(path), EQUIPS, max_hours=20000)
+
+    assert [(row.eq_name, row.seconds) for row in loaded] == [('A0', 45000)]
+    assert [problem.split(':')[0] for problem in problems] == ['строка 3', 'строка 4', 'строка 5', 'строка 6',
+                                                                'строка 7']
+
+
+def test_load_write_csv_semicolons_with_decimal_commas(tmp_path):
+    path = tmp_path / 'hours.csv'
+    path.write_text('eq_name;hours\nA0;12,5\nA1;abc\nA2;7\n', encoding='utf-8')
+
+    loaded, problems = load_write_csv(str(path), EQUIPS, max_hours=20000)
+
+    assert [(row.eq_name, row.seconds) for row in loaded] == [('A0', 45000), ('A2', 25200)]
+    assert [problem.split(':')[0] for problem in problems] == ['строка 3']
+
+
+def test_load_write_csv_rejects_extra_fields(tmp_path):
+    path = tmp_path / 'hours.csv'
+    # Десятичная запятая при разделителе ',' не должна превратиться в 12 ч
+    path.write_text('eq_name,hours\nA0,12,5\nA1,7,\nA2,8,x\n', encoding='utf-8')
+
+    loaded, problems = load_write_csv(str(path), EQUIPS, max_hours=20000)
+
+    assert [(row.eq_name, row.seconds) for row in loaded] == [('A1', 25200)]
+    assert [problem.split(':')[0] for problem in problems] == ['строка 2', 'строка 4']
+    assert 'лишние поля' in problems[0]
+
+
+def test_cli_writes_nothing_when_csv_has_extra_fields(pool, sim, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'plc.json').write_text(json.dumps({'plc': sim.plc_configs()}), encoding='utf-8')
+    (tmp_path / 'equips.json').write_text(json.dumps({'equips': EQUIPS}), encoding='utf-8')
+    (tmp_path / 'hours.csv').write_text('A0,7\nA1,12,5\n', encoding='utf-8')
+
+    code = rh_cli.main(['--plc-file', 'plc.json', '--equips-file', 'equips.json', '--no-history',
+                        'write', '--csv', 'hours.csv', '-o', 'report.csv'])
+
+    assert code == rh_cli.EXIT_USAGE
+    assert plc_values(pool) == sim.values
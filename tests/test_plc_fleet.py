@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from conftest import free_port
+from plc_fleet import STATUS_CANCELLED, STATUS_ERROR, STATUS_OK, STATUS_TIMEOUT, FleetSnapshot, LaneCancelled, _Lane
+from plc_pool import PLCPool
+
+PLCS = [{'plc_name': name, 'zif': zif} for name, zif in (('991', 1), ('992', 1), ('993', 2))]
+EQUIPS = [{'eq_name': f'{plc["plc_name"]}_{i}', 'plc_name': plc['plc_name'], 'db_num': 10, 'db_addr': 18 + 4 * i}
+          for plc in PLCS for i in range(4)]
+
+
+@pytest.fixture
+def fleet():
+    """Три PLC симулятора через прокси (можно замедлить) и один недоступный."""
+    pytest.importorskip('snap7')
+    from plc_sim import PLCSimulator
+
+    with PLCSimulator(PLCS, EQUIPS, base_port=free_port()) as simulator:
+        configs = simulator.plc_configs(faults=True)
+        configs.append({'plc_name': '994', 'zif': 2, 'plc_addr': '127.0.0.1', 'tcp_port': free_port()})
+        pool = PLCPool(configs)
+        equips = EQUIPS + [{'eq_name': '994_0', 'plc_name': '994', 'db_num': 10, 'db_addr': 18}]
+        yield simulator, FleetSnapshot(pool, configs, equips)
+        pool.close_all()
+
+
+class Request:
+    def __init__(self, cancelled=False):
+        self.cancelled = cancelled
+        self.calls = []
+
+    def progress(self, done, total):
+        self.calls.append((done, total))
+
+
+def test_slow_plc_times_out_and_others_finish(fleet):
+    simulator, snapshot = fleet
+    simulator.proxies['992'].latency = 1.0
+    streamed = []
+
+    start_time = time.perf_counter()
+    rows, plc_stats = snapshot.run(deadline=0.5, on_rows=lambda rows, stats: streamed.append(stats['plc_name']))
+
+    assert time.perf_counter() - start_time < 1.5
+    assert {stats['plc_name']: stats['status'] for stats in plc_stats} == {
+        '991': STATUS_OK, '992': STATUS_TIMEOUT, '993': STATUS_OK, '994': STATUS_ERROR}
+    # Не уложившийся PLC выводится последним
+    assert streamed[-1] == '992'
+    values = {row['eq_name']: row['seconds'] for row in rows if row['status'] == STATUS_OK}
+    assert values == {name: value for name, value in simulator.values.items() if not name.startswith('992')}
+    assert {row['status'] for row in rows if row['plc_name'] == '992'} == {STATUS_TIMEOUT}
+
+
+def test_snapshot_of_one_zif(fleet):
+    simulator, snapshot = fleet
+
+    rows, plc_stats = snapshot.run(zif=2)
+
+    assert [stats['plc_name'] for stats in plc_stats] == ['993', '994']
+    assert len(rows) == 5
+
+
+def test_cancelled_request_stops_every_lane(fleet):
+    _, snapshot = fleet
+
+    rows, plc_stats = snapshot.run(request=Request(cancelled=True))
+
+    assert {stats['status'] for stats in plc_stats if stats['plc_name'] != '994'} == {STATUS_CANCELLED}
+    assert all(row['seconds'] is None for row in rows)
+
+
+def test_lane_raises_after_deadline():
+    lane = _Lane(FleetSnapshot(None, [], []), '991', time.monotonic() - 1)
+
+    with pytest.raises(LaneCancelled, match=STATUS_TIMEOUT):
+        lane.check_cancelled()
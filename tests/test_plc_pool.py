@@ -0,0 +1,93 @@
+import struct
+
+import pytest
+
+from conftest import SIM_EQUIPS, SIM_PLC
+from plc_pool import PLCPool, PooledConnection
+
+EQUIP = SIM_EQUIPS[0]
+
+
+@pytest.fixture
+def proxy_pool(sim):
+    """Пул через прокси симулятора: соединения можно обрывать."""
+    pool = PLCPool(sim.plc_configs(faults=True), idle_timeout=3600, keepalive_interval=3600)
+    yield pool
+    pool.close_all()
+
+
+def read_value(pool) -> int:
+    data = pool.run(SIM_PLC, lambda client: client.db_read(EQUIP['db_num'], EQUIP['db_addr'], 4))
+    return struct.unpack('>i', data)[0]
+
+
+def test_connection_is_reused(pool, sim):
+    assert read_value(pool) == read_value(pool) == sim.values[EQUIP['eq_name']]
+
+    assert pool.stats() == {'hits': 1, 'misses': 1, 'reconnects': 0, 'idle_closed': 0, 'open': 1}
+
+
+def test_reconnects_once_after_connection_loss(proxy_pool, sim):
+    read_value(proxy_pool)
+    sim.proxies[SIM_PLC].disconnect_all()
+
+    assert read_value(proxy_pool) == sim.values[EQUIP['eq_name']]
+    assert proxy_pool.stats()['reconnects'] == 1
+
+
+def test_plc_error_keeps_connection(pool):
+    read_value(pool)
+
+    with pytest.raises(RuntimeError):
+        pool.run(SIM_PLC, lambda client: client.db_read(999, 0, 4))
+
+    assert pool.stats()['reconnects'] == 0
+    assert pool.stats()['open'] == 1
+
+
+def test_maintain_closes_idle_connections(sim):
+    pool = PLCPool(sim.plc_configs(), idle_timeout=0)
+    try:
+        read_value(pool)
+        pool.maintain()
+
+        assert pool.stats()['idle_closed'] == 1
+        assert pool.stats()['open'] == 0
+        read_value(pool)
+        assert pool.stats()['misses'] == 2
+    finally:
+        pool.close_all()
+
+
+def test_keepalive_drops_dead_connection(proxy_pool, sim):
+    proxy_pool.keepalive_interval = 0
+    read_value(proxy_pool)
+    proxy_pool.maintain()
+    assert proxy_pool.stats()['open'] == 1
+
+    sim.proxies[SIM_PLC].disconnect_all()
+    proxy_pool.maintain()
+
+    assert proxy_pool.stats()['open'] == 0
+    assert read_value(proxy_pool) == sim.values[EQUIP['eq_name']]
+
+
+class BrokenClient:
+    def __init__(self):
+        self.destroyed = False
+
+    def disconnect(self):
+        raise RuntimeError('TCP : Connection reset')
+
+    def destroy(self):
+        self.destroyed = True
+
+
+def test_drop_destroys_client_when_disconnect_fails():
+    entry = PooledConnection(SIM_PLC, '127.0.0.1', 0, 1)
+    client = entry.client = BrokenClient()
+
+    entry.drop()
+
+    assert client.destroyed
+    assert entry.client is None
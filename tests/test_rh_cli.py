@@ -0,0 +1,68 @@
+import csv
+import json
+
+import pytest
+
+import rh_cli
+
+PLCS = [
+    {'plc_name': '991', 'plc_addr': '10.0.0.1', 'rack': 0, 'slot': 3, 'zif': 1},
+    {'plc_name': '992', 'plc_addr': '10.0.0.2', 'rack': 0, 'slot': 3, 'zif': 2},
+]
+EQUIPS = [
+    {'eq_name': 'BM002_MH', 'plc_name': '991', 'db_num': 10, 'db_addr': 22},
+    {'eq_name': 'BM001_MH', 'plc_name': '991', 'db_num': 10, 'db_addr': 18},
+    {'eq_name': 'PU001_MH', 'plc_name': '992', 'db_num': 11, 'db_addr': 18},
+]
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    # Журнал, кэш и история CLI создаются рядом с программой — здесь во временном каталоге
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'plc.json').write_text(json.dumps({'plc': PLCS}), encoding='utf-8')
+    (tmp_path / 'equips.json').write_text(json.dumps({'equips': EQUIPS}), encoding='utf-8')
+    return ['--plc-file', str(tmp_path / 'plc.json'), '--equips-file', str(tmp_path / 'equips.json')]
+
+
+def export(config, tmp_path, fmt: str, *filters) -> str:
+    path = tmp_path / f'export.{fmt}'
+    assert rh_cli.main(config + ['export', '--format', fmt, '-o', str(path), *filters]) == rh_cli.EXIT_OK
+    return path.read_text(encoding='utf-8')
+
+
+def expected_rows(*eq_names) -> list:
+    plcs = {plc['plc_name']: plc for plc in PLCS}
+    rows = []
+    for eq_name in eq_names:
+        eq = next(eq for eq in EQUIPS if eq['eq_name'] == eq_name)
+        plc = plcs[eq['plc_name']]
+        row = dict(eq, zif=plc['zif'], plc_addr=plc['plc_addr'])
+        rows.append({field: row[field] for field in rh_cli.EXPORT_FIELDS})
+    return rows
+
+
+def test_export_json(config, tmp_path):
+    rows = json.loads(export(config, tmp_path, 'json', '--zif', '1'))
+
+    assert rows == expected_rows('BM001_MH', 'BM002_MH')
+
+
+def test_export_ndjson(config, tmp_path):
+    text = export(config, tmp_path, 'ndjson', '--pattern', '*001*')
+
+    assert [json.loads(line) for line in text.splitlines()] == expected_rows('BM001_MH', 'PU001_MH')
+
+
+def test_export_csv(config, tmp_path):
+    text = export(config, tmp_path, 'csv', '--plc', '992')
+
+    assert list(csv.DictReader(text.splitlines())) == [
+        {field: str(value) for field, value in row.items()} for row in expected_rows('PU001_MH')]
+
+
+def test_missing_config_is_usage_error(config, tmp_path, capsys):
+    (tmp_path / 'equips.json').unlink()
+
+    assert rh_cli.main(config + ['--no-cache', 'export']) == rh_cli.EXIT_USAGE
+    assert 'equips.json' in capsys.readouterr().err
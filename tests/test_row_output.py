@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+
+import pytest
+
+from row_output import RowWriter
+
+FIELDS = ['eq_name', 'seconds', 'hours', 'error']
+ROWS = [
+    {'eq_name': 'A0', 'seconds': 45000, 'hours': 12.5, 'error': '', 'extra': 1},
+    {'eq_name': 'Тег; "1"', 'seconds': None, 'hours': None, 'error': 'нет данных'},
+]
+
+
+def write_rows(fmt: str, rows: list) -> str:
+    stream = io.StringIO()
+    writer = RowWriter(stream, fmt, FIELDS)
+    writer.write_many(rows)
+    writer.close()
+    assert writer.count == len(rows)
+    return stream.getvalue()
+
+
+def expected(rows: list) -> list:
+    return [{field: row.get(field) for field in FIELDS} for row in rows]
+
+
+@pytest.mark.parametrize('rows', [ROWS, []])
+def test_json_round_trip(rows):
+    assert json.loads(write_rows('json', rows)) == expected(rows)
+
+
+@pytest.mark.parametrize('rows', [ROWS, []])
+def test_ndjson_round_trip(rows):
+    text = write_rows('ndjson', rows)
+
+    assert [json.loads(line) for line in text.splitlines()] == expected(rows)
+
+
+def test_csv_round_trip():
+    text = write_rows('csv', ROWS)
+
+    assert list(csv.DictReader(io.StringIO(text))) == [
+        {field: '' if value is None else str(value) for field, value in row.items()} for row in expected(ROWS)]
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        RowWriter(io.StringIO(), 'xml', FIELDS)
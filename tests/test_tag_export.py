@@ -0,0 +1,56 @@
+import json
+
+import pytest
+import yaml
+
+from tag_export import export_tags, tag_to_equip
+
+
+def make_tag(index: int) -> dict:
+    return {
+        'Id': index,
+        'Tag': f'020BM{index:03d}A01_MAINT_MH',
+        'DescEng': f'Motor {index}',
+        'DescRus': f'Двигатель {index}',
+        'Groups': ['MAINT'],
+        'PLC': {'PLCNo': '991', 'Input': {'Block': 10, 'Word': 4 * index}},
+        'PLC_INP': f'991:10.{4 * index}',
+        'Algorithms': {},
+        'Mimics': [],
+    }
+
+
+@pytest.mark.parametrize('count', [0, 1, 3])
+def test_equips_writer_matches_json_dump(tmp_path, count):
+    tags = [make_tag(index) for index in range(count)]
+    path = tmp_path / 'equips.json'
+
+    assert export_tags(iter(tags), {'equips': path}) == {'equips': count}
+
+    expected = json.dumps({'equips': [tag_to_equip(tag) for tag in tags]}, ensure_ascii=False, indent=4)
+    assert path.read_text(encoding='utf-8') == expected
+
+
+def test_yaml_writer_matches_yaml_dump(tmp_path):
+    tags = [make_tag(index) for index in range(3)]
+    path = tmp_path / 'tags.yaml'
+
+    export_tags(iter(tags), {'yaml': path})
+
+    assert yaml.safe_load(path.read_text(encoding='utf-8')) == tags
+
+
+def test_failed_export_keeps_previous_files(tmp_path):
+    targets = {'equips': tmp_path / 'equips.json', 'csv': tmp_path / 'tags.csv'}
+    for path in targets.values():
+        path.write_text('old', encoding='utf-8')
+
+    def tags():
+        yield make_tag(0)
+        raise RuntimeError('database is locked')
+
+    with pytest.raises(RuntimeError):
+        export_tags(tags(), targets)
+
+    assert [path.read_text(encoding='utf-8') for path in targets.values()] == ['old', 'old']
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['equips.json', 'tags.csv']
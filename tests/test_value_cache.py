@@ -0,0 +1,66 @@
+import json
+import time
+
+import pytest
+
+from editor_core import EditorCore
+from value_cache import CACHE_SIZE, CACHE_TTL, ValueCache, format_age
+
+
+def equip(index: int) -> dict:
+    return {'eq_name': f'A{index}', 'plc_name': '991', 'db_num': 10, 'db_addr': 18 + 4 * index}
+
+
+def test_value_expires_after_ttl():
+    cache = ValueCache(ttl=60)
+    cache.put(equip(0), 100, timestamp=time.time() - 30)
+    cache.put(equip(1), 200, timestamp=time.time() - 90)
+
+    assert cache.get_fresh(equip(0)) == 100
+    assert cache.get_fresh(equip(1)) is None
+    # Устаревшее значение остаётся в кэше для показа с возрастом
+    value, age = cache.get(equip(1))
+    assert value == 200 and cache.is_stale(age)
+
+
+def test_least_recently_used_value_is_evicted():
+    cache = ValueCache(max_size=2)
+    cache.put(equip(0), 100)
+    cache.put(equip(1), 200)
+    cache.get(equip(0))
+
+    cache.put(equip(2), 300)
+
+    assert len(cache) == 2
+    assert cache.get(equip(1)) is None
+    assert [cache.get(equip(index))[0] for index in (0, 2)] == [100, 300]
+
+
+def test_format_age():
+    assert [format_age(age) for age in (5, 150, 7200)] == ['<1 мин', '2 мин', '2 ч']
+
+
+def load_core(tmp_path, plc_data: dict, log=None) -> EditorCore:
+    (tmp_path / 'plc.json').write_text(json.dumps(plc_data), encoding='utf-8')
+    (tmp_path / 'equips.json').write_text(json.dumps({'equips': []}), encoding='utf-8')
+    core = EditorCore(log=log, plc_file=str(tmp_path / 'plc.json'), equips_file=str(tmp_path / 'equips.json'),
+                      use_cache=False)
+    core.load()
+    return core
+
+
+def test_cache_settings_from_plc_json(tmp_path):
+    core = load_core(tmp_path, {'plc': [], 'value_cache': {'ttl': 30, 'max_size': 10}})
+
+    assert (core.value_cache_ttl, core.value_cache_size) == (30.0, 10)
+
+
+@pytest.mark.parametrize('settings', [None, {}, {'ttl': 0, 'max_size': '10'}, {'ttl': True, 'max_size': 1.5}])
+def test_invalid_or_missing_cache_settings_use_defaults(tmp_path, settings):
+    messages = []
+    plc_data = {'plc': []} if settings is None else {'plc': [], 'value_cache': settings}
+
+    core = load_core(tmp_path, plc_data, log=messages.append)
+
+    assert (core.value_cache_ttl, core.value_cache_size) == (CACHE_TTL, CACHE_SIZE)
+    assert len(messages) == (2 if settings else 0)
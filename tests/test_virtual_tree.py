@@ -0,0 +1,130 @@
+import tkinter as tk
+
+import pytest
+
+from virtual_tree import VirtualTreeview
+
+
+class FakeTree:
+    """Минимальная модель ttk.Treeview: строки верхнего уровня с item id."""
+
+    def __init__(self):
+        self.items = []
+        self.cells = {}
+        self.selected = ()
+        self.inserts = 0
+
+    def bind(self, sequence, func):
+        pass
+
+    def insert(self, parent, index, iid, values, tags):
+        if iid in self.cells:
+            raise tk.TclError(f'Item {iid} already exists')
+        self.items.insert(index, iid)
+        self.cells[iid] = (values, tags)
+        self.inserts += 1
+
+    def delete(self, *items):
+        for item in items:
+            self.items.remove(item)
+            del self.cells[item]
+
+    def index(self, item):
+        return self.items.index(item)
+
+    def move(self, item, parent, index):
+        self.items.remove(item)
+        self.items.insert(index, item)
+
+    def item(self, item, values, tags):
+        self.cells[item] = (values, tags)
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, items):
+        self.selected = tuple(items)
+
+
+class FakeScrollbar:
+    def set(self, first, last):
+        pass
+
+
+class Table(VirtualTreeview):
+    def _create_widgets(self, master, columns):
+        return None, FakeTree(), FakeScrollbar()
+
+
+def equip(name, db_addr=18, plc_name='991'):
+    return {'eq_name': name, 'plc_name': plc_name, 'db_num': 10, 'db_addr': db_addr}
+
+
+def make_table(rows, visible=10, hours=None):
+    hours = hours if hours is not None else {}
+    table = Table(None, (), lambda eq: ((eq['eq_name'], eq['db_addr'], hours.get(eq['db_addr'], '')), ()))
+    table.visible = visible
+    table.set_rows(rows)
+    return table
+
+
+def shown(table):
+    return [table.tree.cells[item][0][:2] for item in table.tree.items]
+
+
+def test_duplicate_names_get_their_own_rows():
+    rows = [equip('A'), equip('B'), equip('B', db_addr=22), equip('B', db_addr=22), equip('C')]
+
+    table = make_table(rows)
+
+    assert shown(table) == [('A', 18), ('B', 18), ('B', 22), ('B', 22), ('C', 18)]
+    assert len(set(table.tree.items)) == len(rows)
+
+
+def test_changed_list_reuses_rows_in_place():
+    rows = [equip(name, db_addr=18 + 4 * i) for i, name in enumerate('ABCDEF')]
+    table = make_table(rows, visible=4)
+    assert shown(table) == [('A', 18), ('B', 22), ('C', 26), ('D', 30)]
+
+    table.set_rows([rows[1], rows[3], rows[4]])
+
+    assert shown(table) == [('B', 22), ('D', 30), ('E', 34)]
+    # Вставлена только новая строка E
+    assert table.tree.inserts == 5
+
+
+def test_select_and_refresh_pick_the_exact_duplicate():
+    hours = {}
+    rows = [equip('A'), equip('B'), equip('B', db_addr=22)]
+    table = make_table(rows, hours=hours)
+
+    table.select(equip('B', db_addr=22))
+    hours[22] = 5.0
+    table.refresh([equip('B', db_addr=22)])
+
+    assert table.selected_equip is rows[2]
+    assert [table.tree.cells[item][0] for item in table.tree.selection()] == [('B', 22, 5.0)]
+    assert [table.tree.cells[item][0][2] for item in table.tree.items] == ['', '', 5.0]
+
+
+def test_scroll_keeps_selection_of_hidden_row():
+    rows = [equip(f'A{i:02d}') for i in range(20)]
+    table = make_table(rows, visible=5)
+    table.select(rows[1])
+
+    table.yview('moveto', '0.5')
+    assert table.tree.selection() == ()
+    table.yview('moveto', '0')
+
+    assert [table.tree.cells[item][0][0] for item in table.tree.selection()] == ['A01']
+
+
+@pytest.mark.parametrize('key, position', [('Down', 2), ('Up', 0), ('End', 19), ('Next', 6)])
+def test_keys_move_selection(key, position):
+    rows = [equip(f'A{i:02d}') for i in range(20)]
+    table = make_table(rows, visible=5)
+    table.select(rows[1])
+
+    table._on_key(type('Event', (), {'keysym': key})())
+
+    assert table.selected_equip is rows[position]
@@ -7,114 +7,151 @@ from pathlib import Path
 import sqlite3
 import time
 from exceptions import DirFindError, FileFindError
+from mimic_index import MimicIndex
+from tag_search import TagSearchIndex
+from equips_merge import EquipsFile, format_report, sources_hash
+from tag_export import export_tags, tag_to_equip
+from tag_model import TagRecord
 from alive_progress import alive_bar, config_handler
 from colorama import init, Fore
 from colorama import Style
 import re
 import yaml
-import csv
 
 # Абсолютный путь к директории с скриптом
 _PRG_DIR = Path(__file__).parent.absolute()
 
 _RES_DIR = _PRG_DIR / 'resources'
 _TAG_DB_DIR = _RES_DIR / 'FlsaProDb'
+_MIMIC_INDEX = _PRG_DIR / 'cache' / 'mimic_index.sqlite'
+_TAG_SEARCH_DB = _PRG_DIR / 'cache' / 'tag_search.sqlite'
+_EQUIPS_STATE = _PRG_DIR / 'cache' / 'equips.json.state.json'
+_EQUIPS_REPORT = 'equips_changes.txt'
+# Базы ECS, из которых строятся теги (для хэша исходных данных)
+_SOURCE_DB_FILES = ('SdrPoint30.sqlite', 'SdrBlkAlg30.sqlite', 'SdrBpAlg30.sqlite', 'SdrSimS5Config30.sqlite')
+_REPORT_LINES = 20  # строк отчёта об изменениях в консоли
 
-
-_PLCNAME = {0: 'spare', 1: '991', 2: '992', 3: '990'}
-_PLCMEMTYP = {
-    '17': '16 Bit',
-    '21': '16 Bit',
-    '22': '32 Bit',
-    '23': 'Float',
-    '26': '16 Bit/Time',
-    '28': 'Float/Stat/Timer',
-    '29': '8 Bit',
-    '30': 'Flt/Trig/Sts',
-}
 logger = logging.getLogger()
 
+# Точки ECS с группой и адресом в PLC (столбцы tag_search.POINT_COLUMNS)
+_POINTS_SQL = "SELECT  PointConfig.PointId, PointConfig.PointCode, PointConfig.DefaultText, PointConfig.LocalText," \
+              "ConvAlg, CalcAlg, BlockAlg, " \
+              "Groups.GroupCode, sim.Points.PLCNo, " \
+              "sim.Points.InputType, InputBlock, InputWord, InputBit, " \
+              "sim.Points.OutputType, OutputBlock, OutputWord, OutputBit, ParameterBlock " \
+              "FROM PointConfig, Groups, sim.Points " \
+              "WHERE Groups.GroupNo = PointConfig.GroupNo AND PointConfig.PointId = sim.Points.SDRPointNo"
+
+
+def _connect_ro(db_file: Path) -> sqlite3.Connection:
+    """Соединение только для чтения: базы ECS не изменяем."""
+    return sqlite3.connect(f"{db_file.as_uri()}?mode=ro", uri=True)
+
 
 class DBHelper(object):
     """ECS хранит базу тэгов в формате Ms Access,
     клас работает с конвертированными в sqlite3  файлами mdb ECS.
-    """
 
-    def __init__(self):
-        self.sdrpoint = _TAG_DB_DIR / 'SdrPoint30.sqlite'
-        self.sdrapalg = _TAG_DB_DIR / 'SdrApAlg30.sqlite'
-        self.sdrblkalg = _TAG_DB_DIR / 'SdrBlkAlg30.sqlite'
-        self.sdrbpalg = _TAG_DB_DIR / 'SdrBpAlg30.sqlite'
-        self.sdrsims5config = _TAG_DB_DIR / 'SdrSimS5Config30.sqlite'
+    Одно соединение с SdrPoint30 (SdrSimS5Config30 подключена как sim) на всё
+    время работы; справочники алгоритмов читаются в словари один раз.
+    Поиск тегов идёт по отдельной базе tag_search (FTS5), которая строится
+    при первом запуске и после изменения исходных баз.
+    """
 
-        if not self.sdrpoint.is_file() or not self.sdrblkalg.is_file() or not self.sdrbpalg.is_file() \
-                or not self.sdrsims5config.is_file():
-            raise Exception(f"Can't open db file {self.sdrpoint}")
+    def __init__(self, db_dir: Path = _TAG_DB_DIR, search_db: Path = _TAG_SEARCH_DB):
+        self.sdrpoint = db_dir / 'SdrPoint30.sqlite'
+        self.sdrapalg = db_dir / 'SdrApAlg30.sqlite'
+        self.sdrblkalg = db_dir / 'SdrBlkAlg30.sqlite'
+        self.sdrbpalg = db_dir / 'SdrBpAlg30.sqlite'
+        self.sdrsims5config = db_dir / 'SdrSimS5Config30.sqlite'
+
+        for db_file in (self.sdrpoint, self.sdrblkalg, self.sdrbpalg, self.sdrsims5config):
+            if not db_file.is_file():
+                raise FileFindError(f"Can't open db file {db_file}")
+
+        self.timings = {}  # этап -> секунды
+        start_time = time.perf_counter()
+        self._conn = _connect_ro(self.sdrpoint)
+        self._conn.execute("ATTACH DATABASE ? AS sim", (f"{self.sdrsims5config.as_uri()}?mode=ro",))
+        self._blk_algs = self._load_names(self.sdrblkalg, "SELECT AlgNo, BlockTableName FROM BlockDescriptionIndex")
+        self._conv_algs = self._load_names(self.sdrbpalg, "SELECT CaptionKey, English FROM AlgMaster")
+        self.timings['open'] = time.perf_counter() - start_time
+        self.search = None
+        if search_db is not None:
+            self.search = TagSearchIndex(search_db, (self.sdrpoint, self.sdrsims5config))
+            if not self.search.is_fresh():
+                self.build_search_index()
+
+    def build_search_index(self):
+        """Перестроить поисковую базу тегов из исходных баз ECS."""
+        self.timings['index'] = self.search.build(self._conn.execute(_POINTS_SQL))
 
     @staticmethod
-    def _sql_fetchone(bd, sql):
-        conn = sqlite3.connect(str(bd))
-        cursor = conn.cursor()
-        cursor.execute(sql)
-        result = cursor.fetchone()
-        conn.commit()
-        conn.close()
-        return result
+    def _load_names(db_file: Path, sql: str) -> dict:
+        names = {}
+        conn = _connect_ro(db_file)
+        try:
+            # Ключи в базах ECS текстовые ('4'), номера алгоритмов в PointConfig — числа.
+            # При повторе ключа (SubNo) берётся первая строка, как раньше у fetchone
+            for key, name in conn.execute(sql):
+                names.setdefault(str(key), name)
+        finally:
+            conn.close()
+        return names
 
     def get_blk_alg_name(self, alg_no=0) -> str:
-        sql = f"SELECT BlockTableName FROM BlockDescriptionIndex WHERE AlgNo = '{str(alg_no)}'"
-        result = self._sql_fetchone(self.sdrblkalg, sql)
-        return result[0] if result else f"{alg_no} unknown"
+        name = self._blk_algs.get(str(alg_no))
+        return name if name is not None else f"{alg_no} unknown"
 
     def get_conv_alg_name(self, alg_no=0) -> str:
-        sql = f"SELECT English FROM AlgMaster WHERE CaptionKey = '{str(alg_no)}'"
-        result = self._sql_fetchone(self.sdrbpalg, sql)
-        return result[0] if result else f"{alg_no} unknown"
+        name = self._conv_algs.get(str(alg_no))
+        return name if name is not None else f"{alg_no} unknown"
 
     def get_tag(self, tag, only_a_point=False):
-        conn = sqlite3.connect(str(self.sdrpoint))
-        cursor = conn.cursor()
-        # sql = "SELECT PointConfig.PointCode, PointConfig.DefaultText, PointConfig.ConvAlg, PointConfig.CalcAlg," \
-        #       "PointConfig.BlockAlg, Groups.GroupCode " \
-        #       "FROM PointConfig, Groups " \
-        #       f"WHERE PointConfig.PointCode LIKE '%{tag}%' AND Groups.GroupNo = PointConfig.GroupNo;"
-        sql = "ATTACH DATABASE ? AS sim"
-        # cursor.execute(sql)
-        cursor.execute(sql, (str(self.sdrsims5config),))
-        sql = f"SELECT *  FROM Points WHERE PointCode LIKE '%{tag}%';"
-        sql_apoint = "PointConfig.PointId > 0 AND " if only_a_point is True else ""
-        # sql_bpoint = "PointConfig.PointId < 0" if False is True else ""
-
-        sql = "SELECT  PointConfig.PointId, PointConfig.PointCode, PointConfig.DefaultText, PointConfig.LocalText," \
-              "ConvAlg, CalcAlg, BlockAlg, " \
-              "Groups.GroupCode, sim.Points.PLCNo, " \
-              "sim.Points.InputType, InputBlock, InputWord, InputBit, " \
-              "sim.Points.OutputType, OutputBlock, OutputWord, OutputBit, ParameterBlock," \
-              "PointConfig.BlockAlg, ConvAlg " \
-              "FROM PointConfig, Groups, sim.Points " \
-              f"WHERE {sql_apoint} PointConfig.PointCode LIKE '%{tag}%' " \
-              f"AND PointConfig.PointCode NOT LIKE '%_SPM%' " \
-              f"AND PointConfig.PointCode NOT LIKE '%_SPA%' " \
-              "AND Groups.GroupNo = PointConfig.GroupNo AND PointConfig.PointId = sim.Points.SDRPointNo;"
+        """Точки, код которых содержит tag (шаблон LIKE, допускаются % и _)."""
+        start_time = time.perf_counter()
+        if self.search is not None:
+            rows = self.search.find(tag, only_a_point)
+        else:
+            sql_apoint = "PointConfig.PointId > 0 AND " if only_a_point is True else ""
+            sql = _POINTS_SQL + f" AND {sql_apoint}PointConfig.PointCode LIKE ? " \
+                                "AND PointConfig.PointCode NOT LIKE '%_SPM%' " \
+                                "AND PointConfig.PointCode NOT LIKE '%_SPA%'"
+            rows = self._conn.execute(sql, (f"%{tag}%",)).fetchall()
+        # Строки как раньше: в конце повторяются BlockAlg и ConvAlg
+        result = [row + (row[6], row[4]) for row in rows]
+        self.timings['query'] = time.perf_counter() - start_time
+        return result
 
-        cursor.execute(sql)
+    @staticmethod
+    def source_files(db_dir: Path = _TAG_DB_DIR) -> list:
+        """То же без открытия баз (и без перестройки поискового индекса)."""
+        return [db_dir / name for name in _SOURCE_DB_FILES]
 
-        result = cursor.fetchall()
+    def close(self):
+        self._conn.close()
+        if self.search is not None:
+            self.search.close()
 
-        conn.commit()
-        conn.close()
-        # return tags
-        return result
 
-    # def get_all_tags(self):
-    #     conn = sqlite3.connect(str(self.sdrpoint))
-    #     cursor = conn.cursor()
+def equips_source_hash(tags_pattern, only_a_point=True, db_dir: Path = _TAG_DB_DIR, extra=()) -> str:
+    """Хэш исходных баз и параметров выборки для equips.json.
+
+    Считается без открытия баз, поэтому неизменность equips.json можно
+    проверить до выборки тегов.
+    """
+    files = DBHelper.source_files(db_dir)
+    for db_file in files:
+        if not db_file.is_file():
+            raise FileFindError(f"Can't open db file {db_file}")
+    return sources_hash(files, (tags_pattern, only_a_point) + tuple(extra))
 
 
 class TagsHelper(object):
     def __init__(self, tags_pattern='', with_mimic=False):
         self.db = DBHelper()
-        self.tags = []
+        self.tags = []  # TagRecord
+        self._index = {}  # имя тега -> TagRecord
         self.tags_pattern = tags_pattern
         self.with_mimic = with_mimic
         self.only_a_point = True
@@ -126,6 +163,7 @@ class TagsHelper(object):
         self.index_date = ""
         self.pages_without_tags = ""
         self.mimic_dir = _RES_DIR / 'ECS2261'
+        self.mimic_index = None  # MimicIndex, открывается при первом поиске по мнемосхемам
         self.update()
         logger.info(f"Init class TagsHelper")
 
@@ -133,9 +171,7 @@ class TagsHelper(object):
         return len(self.tags)
 
     def __getitem__(self, tag):
-        for cur_tag in self.tags:
-            if cur_tag['Tag'] == tag:
-                return cur_tag
+        return self._index.get(tag)
 
     def __iter__(self):
         return iter(self.tags)
@@ -147,6 +183,7 @@ class TagsHelper(object):
         """"""
         start_time = time.time()
         self.tags.clear()
+        self._index.clear()
         tags = []
         logger.info(f"Start update tags from DB")
         print(f"{Fore.YELLOW}Поиск тегов неиспользуемых на мнемосхемах")
@@ -157,26 +194,18 @@ class TagsHelper(object):
             tags = self.db.get_tag(self.tags_pattern, self.only_a_point)
             bar()
         print(f"{Fore.WHITE}Формирования словаря Тегов :{Fore.GREEN + str(len(tags)) + Style.RESET_ALL}")
+        build_time = time.perf_counter()
 
         for tag in tags:
-            tag_data = {
-                "Id": tag[0], "Tag": tag[1], "Groups": tag[7], "DescEng": tag[2], "DescRus": str(tag[3]),
-                "Tag": tag[1], "Groups": tag[7], "DescEng": tag[2], "DescRus": str(tag[3]),
-                "Algorithms": {"ConvAlg": str(tag[4]) + " " + self.db.get_conv_alg_name(tag[4]),
-                               "CalcAlg": tag[5],
-                               "BlockAlg": str(tag[6]) + " " + self.db.get_blk_alg_name(tag[6])},
-                "PLC": {"PLCNo": _PLCNAME.get(tag[8]),
-                        # "Input (Type/Block/Word/Bit)": [tag[9], tag[10], tag[11],  tag[12]],
-                        "FC": tag[17],
-                        "Input": {"Type": _PLCMEMTYP.get(tag[9]),
-                                  "Block": tag[10], "Word": tag[11], "Bit": tag[12]},
-                        "Output": {"Type": _PLCMEMTYP.get(tag[13]),
-                                   "Block": tag[14], "Word": tag[15], "Bit": tag[16]},
-                        },
-                "PLC_INP": f"%DB{tag[10]}.DBD{tag[11]}",
-                "Mimics": '',
-            }
-            self.tags.append(tag_data)
+            record = TagRecord(tag, self.db.get_conv_alg_name(tag[4]), self.db.get_blk_alg_name(tag[6]))
+            self.tags.append(record)
+            # Как и прежний поиск перебором: при повторе имени — первая точка
+            self._index.setdefault(record.tag, record)
+        self.db.timings['build'] = time.perf_counter() - build_time
+        print(f"{Fore.WHITE}Выборка из базы: {Fore.GREEN}"
+              + ", ".join(f"{stage} {seconds:.3f} с" for stage, seconds in self.db.timings.items())
+              + Style.RESET_ALL)
+        logger.info(f"DB timings: {self.db.timings}")
         if self.with_mimic:
             self.find_tags_on_mimics()
 
@@ -185,12 +214,12 @@ class TagsHelper(object):
         print(f"{Fore.WHITE}За время: {Fore.GREEN + str(self.index_time) + Style.RESET_ALL}")
         logger.info(f"Update complite")
 
-    def find_tags_on_mimics(self):
-        """"""
-        i = 0
+    def find_tags_on_mimics(self, processes=None):
+        """Обновляет индекс мнемосхем (сканируются только новые и изменённые файлы)
+        и заполняет Mimics у тегов из индекса."""
         self.cnt_files = 0
-        mimics_in_dir = self.mimic_dir.glob('*.g')
-        mimics_col = sum([1 for _ in self.mimic_dir.glob('*.g')])
+        mimics_in_dir = list(self.mimic_dir.glob('*.g'))
+        mimics_col = len(mimics_in_dir)
         print(f"{Fore.YELLOW}Поиск тегов на мнемосхемах\r\n"
               # f"{Fore.YELLOW}Опции: \r\n"
               #   f"   {Fore.WHITE}Только А точки = {Fore.GREEN}{self.only_a_point} \r\n"
@@ -198,17 +227,17 @@ class TagsHelper(object):
               f"{Fore.WHITE}Количество тегов: {Fore.GREEN} {len(self.tags)}{Fore.WHITE}\r\n"
               f"{Fore.WHITE}Количество мнемосхем: {Fore.GREEN} {mimics_col}{Fore.WHITE}")
 
-        with alive_bar(len(self.tags), force_tty=True, length=30) as bar:
-            for tag in self.tags:
-                mimics_list = []
-                for mimic in self.mimic_dir.glob('*.g'):
-                    if self.find_tag_on_mimic(mimic, tag['Tag']):
-                        mimics_list.append(mimic.name)
-                    self.cnt_files += 1
-
-                self.tags[i]['Mimics'] = mimics_list
-                i += 1
-                bar()
+        if self.mimic_index is None:
+            self.mimic_index = MimicIndex(_MIMIC_INDEX)
+        tag_names = [tag.tag for tag in self.tags]
+        with alive_bar(mimics_col, force_tty=True, length=30) as bar:
+            stats = self.mimic_index.update(tag_names, mimics_in_dir, processes, on_file=lambda path: bar())
+        self.cnt_files = stats['scanned']
+        print(f"{Fore.WHITE}Индекс мнемосхем: новых {stats['new']}, изменённых {stats['changed']}, "
+              f"удалённых {stats['deleted']}, за {stats['time']:.2f} с{Style.RESET_ALL}")
+        mimics = self.mimic_index.tags_to_mimics(tag_names)
+        for tag in self.tags:
+            tag.mimics = mimics[tag.tag]
 
     def find_tag_on_mimic(self, mimic, tag) -> bool:
         """"""
@@ -223,75 +252,79 @@ class TagsHelper(object):
                     return True
 
     def get_tags_without_mimic(self) -> list:
-        """"""
-        tag_wo_mim = []
-        for tag in self.tags:
-            if len(tag['Mimics']) == 0:
-                tag_wo_mim.append(tag)
+        """Теги, которых нет ни на одной мнемосхеме (по индексу мнемосхем)."""
+        if self.mimic_index is None:
+            self.find_tags_on_mimics()
+        without_mimic = set(self.mimic_index.tags_without_mimic(tag.tag for tag in self.tags))
+        tag_wo_mim = [tag for tag in self.tags if tag.tag in without_mimic]
 
         print(f"{Fore.WHITE}Тегов без мнемомосхем:{Fore.GREEN}  {len(tag_wo_mim)}  {Style.RESET_ALL}")
         return tag_wo_mim
 
     @staticmethod
     def to_yaml(tags) -> str:
+        tags = [tag.as_dict() if isinstance(tag, TagRecord) else tag for tag in tags]
         return yaml.dump(tags, default_flow_style=False, indent=3, sort_keys=False, allow_unicode=True)
 
+    def export(self, targets, tags=None) -> dict:
+        """Выгрузить теги во все форматы targets ({'csv': путь, 'yaml': ..., 'telegraf': ...,
+        'equips': ..., 'ndjson': ...}) за один проход; файлы заменяются атомарно."""
+        start_time = time.perf_counter()
+        tags = self.tags if tags is None else tags
+        # Вложенные словари строятся по одному на лету, только для выгрузки
+        counts = export_tags((tag.as_dict() if isinstance(tag, TagRecord) else tag for tag in tags), targets)
+        for path in targets.values():
+            print(f"{Fore.YELLOW}Теги сохранены в:{Fore.GREEN}  {path}  {Style.RESET_ALL}")
+        logger.info(f"Export {counts} in {time.perf_counter() - start_time:.2f} s")
+        return counts
+
     def save_csv(self, tags=None):
         """"""
-        tags = tags or self.tags
-        field_names = ['Id', 'Tag', 'DescEng', 'DescRus', 'Groups', 'PLC', 'PLC_INP', 'Algorithms', 'Mimics']
-        with open('tags.csv', 'w', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=field_names, )
-            writer.writeheader()
-            writer.writerows(tags)
-        print(f"{Fore.YELLOW}Теги сохранены в:{Fore.GREEN}  tags.csv  {Style.RESET_ALL}")
+        self.export({'csv': 'tags.csv'}, tags or self.tags)
 
     def save_yaml(self, tags=None):
         """"""
-        tags = tags or self.tags
-        tags = self.to_yaml(tags)
-        with open("tags.yaml", 'w') as target:
-            target.write(tags)
-        print(f"{Fore.YELLOW}Теги сохранены в :{Fore.GREEN}  tags.yaml   {Style.RESET_ALL}")
+        self.export({'yaml': 'tags.yaml'}, tags or self.tags)
 
     def save_telegraf(self, tags=None):
         """Перечень OPC тегов для telegraf.conf"""
+        self.export({'telegraf': 'tags.telegraf.conf'}, tags or self.tags)
+
+    def save_equip_json(self, tags=None, merge=True):
+        """Сохраняет теги в формате equips.json.
+
+        merge=True — слияние с существующим файлом (equips_merge): ручные записи
+        сохраняются, изменения пишутся в equips_changes.txt; при неизменных
+        исходных базах файл не трогается. merge=False — перезапись целиком.
+        """
         tags = tags or self.tags
-        field_names = ['Id', 'Tag', 'DescEng', 'DescRus', 'Groups', 'PLC', 'PLC_INP', 'Algorithms', 'Mimics']
-        nodes =[]
-        tags_str = "   nodes = [\n"
-        with open('tags.telegraf.conf', 'w', newline='') as tconf:
-            for tag in tags:
-                tags_str += (f'     {{name="{tag["Tag"]} {tag["DescEng"]}", namespace="1", identifier_type="s", '
-                             f'identifier="t|{tag["Tag"]}"}},\n')
-
-            tags_str += "]"
-            tconf.write(tags_str)
-
-        print(f"{Fore.YELLOW}Теги сохранены в:{Fore.GREEN}  tags.csv  {Style.RESET_ALL}")
-
-    def save_equip_json(self, tags=None):
-        """Сохраняет теги в формате equips.json"""
-        import json
-        tags = tags or self.tags
-        equips = []
-        for tag in tags:
-            eq_name = tag["Tag"].replace("", "")
-            equip = {
-                "eq_name": eq_name,
-                "plc_name": tag["PLC"]["PLCNo"],
-                "db_num": tag["PLC"]["Input"]["Block"],
-                "db_addr": int(tag["PLC"]["Input"]["Word"] or 0) + 16
-            }
-            equips.append(equip)
-        data = {"equips": equips}
-        with open("equips.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        print(f"{Fore.YELLOW}Оборудование сохранено в: {Fore.GREEN}  equips.json  {Style.RESET_ALL}")
+        if not merge:
+            self.export({'equips': 'equips.json'}, tags)
+            return
+        equips_file = EquipsFile('equips.json', _EQUIPS_STATE, _EQUIPS_REPORT)
+        # Теги не из выборки (переданы явно) тоже входят в хэш
+        extra = () if tags is self.tags else ([tag['Tag'] for tag in tags],)
+        source_hash = equips_source_hash(self.tags_pattern, self.only_a_point, self.db.sdrpoint.parent, extra)
+        if equips_file.is_current(source_hash):
+            print(f"{Fore.YELLOW}Исходные базы не изменились:{Fore.GREEN}  equips.json  {Style.RESET_ALL}")
+            return
+        changes = equips_file.update([tag_to_equip(tag) for tag in tags], source_hash)
+        report = format_report(changes)
+        print(f"{Fore.WHITE}" + "\n".join(report[:_REPORT_LINES + 1]) + Style.RESET_ALL)
+        if len(report) > _REPORT_LINES + 1:
+            print(f"{Fore.WHITE}... полный список в {_EQUIPS_REPORT}{Style.RESET_ALL}")
+        if changes['written']:
+            print(f"{Fore.YELLOW}Оборудование сохранено в: {Fore.GREEN}  equips.json  {Style.RESET_ALL}")
 
 
 def main():
-    tags = TagsHelper("MAINT%_MH", with_mimic=False)
+    tags_pattern = "MAINT%_MH"
+    # Базы и параметры не менялись — equips.json актуален, выборку из баз не выполняем
+    equips_file = EquipsFile('equips.json', _EQUIPS_STATE, _EQUIPS_REPORT)
+    if equips_file.is_current(equips_source_hash(tags_pattern, db_dir=_TAG_DB_DIR)):
+        print(f"{Fore.YELLOW}Исходные базы не изменились:{Fore.GREEN}  equips.json  {Style.RESET_ALL}")
+        return
+    tags = TagsHelper(tags_pattern, with_mimic=False)
     # tags_wi_mim = tags.get_tags_without_mimic()
     # tags.save_csv()
     # tags.save_telegraf()
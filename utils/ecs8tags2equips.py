@@ -1,8 +1,98 @@
 import pandas as pd
-import json
-import re
-import sys
+import marshal
 import os
+import sys
+import time
+
+from equips_merge import DB_ADDR_OFFSET, EquipsFile, file_sha1, format_report, sources_hash
+
+# Нужные столбцы Points.xlsx: тег, PLC, номер DB и адрес в DB
+COLUMNS = ('Designation', 'IOType_0', 'IOType_2', 'IOType_3')
+# Теги счётчиков часов ТО: ...maint...mh или ...maint...mh_N
+FILTER_REGEX = r'.+maint.+mh(?:_\d+)?$'
+# Кэш рядом со скриптом: общий для запуска из любого каталога и для import_equips
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+# Формат кэша; меняется вместе со структурой данных или версией Python
+CACHE_TAG = f"points-columns-1:{marshal.version}:{sys.version_info[0]}.{sys.version_info[1]}"
+BAD_ROWS_FILE = 'equips2_bad_rows.csv'
+OUTPUT_FILE = 'equips2.json'
+CHANGES_FILE = 'equips2_changes.txt'
+REPORT_LINES = 20  # строк отчёта об изменениях в консоли
+
+
+def read_columns(path: str, columns=COLUMNS) -> dict:
+    """Потоковое чтение нужных столбцов первого листа (openpyxl, read_only).
+
+    Возвращает {столбец: список значений} и 'row' — номера строк Excel.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = wb.worksheets[0]
+        header = next(sheet.iter_rows(max_row=1, values_only=True), ())
+        missing = [name for name in columns if name not in header]
+        if missing:
+            raise ValueError(f"В {path} нет столбцов: {', '.join(missing)}")
+        positions = [header.index(name) for name in columns]
+        result = {name: [] for name in columns}
+        result['row'] = []
+        # Строки читаются только до последнего нужного столбца
+        for row_number, row in enumerate(sheet.iter_rows(min_row=2, max_col=max(positions) + 1, values_only=True),
+                                         start=2):
+            for name, position in zip(columns, positions):
+                result[name].append(row[position] if position < len(row) else None)
+            result['row'].append(row_number)
+        return result
+    finally:
+        wb.close()
+
+
+def load_columns(path: str, columns=COLUMNS, cache_dir: str = CACHE_DIR, sha1: str = None) -> tuple:
+    """Столбцы листа из кэша (если xlsx не менялся) или из Excel. Возвращает (столбцы, из_кэша).
+
+    sha1 — уже посчитанный хэш xlsx (чтобы не читать файл ещё раз).
+    """
+    sha1 = sha1 or file_sha1(path)
+    cache_path = os.path.join(cache_dir, os.path.basename(path) + '.columns.bin')
+    try:
+        with open(cache_path, 'rb') as f:
+            tag, cached_sha1, cached_columns, data = marshal.load(f)
+        if (tag, cached_sha1, cached_columns) == (CACHE_TAG, sha1, list(columns)):
+            return data, True
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    data = read_columns(path, columns)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        marshal.dump((CACHE_TAG, sha1, list(columns), data), f)
+    os.replace(tmp_path, cache_path)
+    return data, False
+
+
+def build_equips(data: dict) -> tuple:
+    """Фильтр тегов и расчёт plc_name/db_num/db_addr операциями над столбцами.
+
+    Возвращает (список equips, DataFrame строк с ошибками).
+    """
+    df = pd.DataFrame(data)
+    names = df['Designation'].astype('string')
+    df = df[names.str.contains(FILTER_REGEX, case=False, regex=True, na=False)]
+    db_num = pd.to_numeric(df['IOType_2'], errors='coerce')
+    db_addr = pd.to_numeric(df['IOType_3'], errors='coerce')
+    bad = db_num.isna() | db_addr.isna()
+    bad_rows = df[bad].assign(error=[
+        'нет номера DB (IOType_2)' if num_missing else 'нет адреса (IOType_3)'
+        for num_missing in db_num[bad].isna()])
+    good = df[~bad]
+    equips = pd.DataFrame({
+        'eq_name': good['Designation'].astype(str),
+        'plc_name': good['IOType_0'].fillna('').astype(str).str[0:3],
+        'db_num': db_num[~bad].astype('int64'),
+        'db_addr': db_addr[~bad].astype('int64') + DB_ADDR_OFFSET,
+    })
+    return equips.to_dict('records'), bad_rows
 
 
 def main():
@@ -13,34 +103,38 @@ def main():
             print(f"Файл не найден: {file_path}")
             sys.exit(1)
 
-        # Загружаем Excel-файл в DataFrame
-        df = pd.read_excel(file_path)
-
-        # Фильтруем строки, где в столбце 'Designation' содержится 'maint_mh'
-        filter_regex = r'.+maint.+mh(_\d+)?$'
-        df_filtered = df[df['Designation'].str.contains(filter_regex, flags=re.IGNORECASE, regex=True)]
-
-        # Формируем список словарей для equips2.json
-        result = []
-        for _, row in df_filtered.iterrows():
-            try:
-                equip = {
-                    "eq_name": row.get("Designation", ""),
-                    "plc_name": str(row.get("IOType_0", ""))[0:3],
-                    "db_num": int(row.get("IOType_2", None)),
-                    "db_addr": int(row.get("IOType_3", None)) + 16
-                }
-                result.append(equip)
-            except Exception as e:
-                print(f"Ошибка обработки строки: {e}")
-                continue
-
-        # Сохраняем в equips2.json
-        output_path = "equips2.json"
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump({"equips": result}, f, ensure_ascii=False, indent=4)
-
-        print(f"Сохранено {len(result)} записей в {output_path}")
+        # Слияние с существующим equips2.json; при неизменном xlsx файл не трогаем
+        equips_file = EquipsFile(OUTPUT_FILE, os.path.join(CACHE_DIR, OUTPUT_FILE + '.state.json'), CHANGES_FILE)
+        hashes = {}
+        source_hash = sources_hash([file_path], (COLUMNS, FILTER_REGEX, DB_ADDR_OFFSET), hashes)
+        if equips_file.is_current(source_hash):
+            print(f"{file_path} не изменился, {OUTPUT_FILE} актуален")
+            input("Нажмите Enter для выхода...")
+            return
+
+        # Читаем только нужные столбцы; при неизменном xlsx — из кэша
+        start_time = time.perf_counter()
+        data, cached = load_columns(file_path, sha1=hashes[file_path])
+        read_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        result, bad_rows = build_equips(data)
+        build_time = time.perf_counter() - start_time
+
+        if len(bad_rows):
+            bad_rows.to_csv(BAD_ROWS_FILE, index=False, encoding='utf-8')
+            print(f"Строк с ошибками: {len(bad_rows)}, см. {BAD_ROWS_FILE}")
+
+        changes = equips_file.update(result, source_hash)
+        report = format_report(changes)
+        print('\n'.join(report[:REPORT_LINES + 1]))
+        if len(report) > REPORT_LINES + 1:
+            print(f"... полный список в {CHANGES_FILE}")
+
+        print(f"Чтение {'из кэша' if cached else 'Excel'}: {read_time:.2f} с, обработка: {build_time:.3f} с "
+              f"({len(data['row'])} строк)")
+        if changes['written']:
+            print(f"Сохранено {len(result)} записей в {OUTPUT_FILE}")
         input("Нажмите Enter для выхода...")
     except ImportError as e:
         print(f"Ошибка импорта: {e}\nУбедитесь, что установлены все необходимые библиотеки: pandas, openpyxl")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*
+# Обновление equips.json слиянием вместо перезаписи
+#
+# Сгенерированные из источника (ECS7, ECS8) записи сравниваются с текущим
+# файлом по eq_name: добавляются новые, удаляются исчезнувшие из источника,
+# у изменившихся обновляются plc_name/db_num/db_addr. Записи, добавленные в
+# файл вручную (например, тестовые t_pu977), сохраняются: в файле состояния
+# запоминается, какие eq_name были сгенерированы в прошлый раз и из каких
+# исходных данных (хэш). Если исходные данные и сам файл не менялись, файл не
+# перезаписывается — редактору не нужно перечитывать конфигурацию.
+#
+import datetime
+import hashlib
+import json
+import os
+
+EQUIP_FIELDS = ('plc_name', 'db_num', 'db_addr')
+# Смещение db_addr относительно адреса точки в ECS (общее для ECS7 и ECS8)
+DB_ADDR_OFFSET = 16
+HASH_CHUNK = 1 << 20  # файлы хэшируются кусками, не читаясь в память целиком
+
+
+def file_sha1(path) -> str:
+    """SHA-1 содержимого файла (общий для скриптов utils)."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sources_hash(files, params=(), hashes: dict = None) -> str:
+    """Хэш исходных данных: содержимое файлов files и параметры генерации params.
+
+    hashes — словарь путь -> SHA-1: уже известные хэши берутся из него, новые
+    добавляются, чтобы вызывающий мог передать их дальше (например, в load_columns).
+    """
+    hashes = {} if hashes is None else hashes
+    digest = hashlib.sha1()
+    for path in files:
+        path = str(path)
+        if path not in hashes:
+            hashes[path] = file_sha1(path)
+        digest.update(hashes[path].encode() + b'\0')
+    digest.update(repr(tuple(params)).encode())
+    return digest.hexdigest()
+
+
+def load_equips(path) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('equips', [])
+
+
+def merge_equips(existing: list, generated: list, previous: set = None) -> tuple:
+    """Слить generated в existing по eq_name.
+
+    previous — eq_name, сгенерированные прошлым запуском; остальные записи
+    existing считаются ручными и сохраняются. Без previous (первый запуск)
+    ручными считаются все записи, которых нет в generated.
+    Возвращает (новый список, изменения: added, removed, changed, manual).
+    """
+    previous = previous or set()
+    new_by_name = {}
+    for equip in generated:
+        new_by_name.setdefault(equip['eq_name'], equip)
+    changes = {'added': [], 'removed': [], 'changed': [], 'manual': []}
+    merged = []
+    seen = set()
+    for equip in existing:
+        name = equip.get('eq_name')
+        new = new_by_name.get(name)
+        if new is None:
+            if name in previous:
+                changes['removed'].append(equip)
+            else:
+                changes['manual'].append(equip)
+                merged.append(equip)
+            continue
+        if name in seen:
+            continue
+        seen.add(name)
+        diff = {field: (equip.get(field), new[field]) for field in EQUIP_FIELDS if equip.get(field) != new[field]}
+        if diff:
+            changes['changed'].append((name, diff))
+            equip = dict(equip, **{field: new[field] for field in EQUIP_FIELDS})
+        merged.append(equip)
+    for name, equip in new_by_name.items():
+        if name not in seen:
+            changes['added'].append(equip)
+            merged.append(equip)
+    return merged, changes
+
+
+def format_report(changes: dict) -> list:
+    """Строки отчёта об изменениях для человека."""
+    lines = [f"Добавлено: {len(changes['added'])}, удалено: {len(changes['removed'])}, "
+             f"изменено: {len(changes['changed'])}, ручных записей сохранено: {len(changes['manual'])}"]
+    for equip in changes['added']:
+        lines.append(f"+ {equip['eq_name']}: PLC {equip['plc_name']} DB{equip['db_num']}.DBD{equip['db_addr']}")
+    for equip in changes['removed']:
+        lines.append(f"- {equip['eq_name']}: PLC {equip.get('plc_name')} "
+                     f"DB{equip.get('db_num')}.DBD{equip.get('db_addr')}")
+    for name, diff in changes['changed']:
+        lines.append(f"* {name}: " + ", ".join(f"{field} {old} -> {new}" for field, (old, new) in diff.items()))
+    return lines
+
+
+class EquipsFile(object):
+    """equips.json, обновляемый слиянием; состояние последней генерации — в state_path."""
+
+    def __init__(self, path, state_path, report_path=None):
+        self.path = str(path)
+        self.state_path = str(state_path)
+        self.report_path = str(report_path) if report_path else None
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def is_current(self, source_hash: str) -> bool:
+        """Исходные данные те же, и файл не правили после прошлой генерации."""
+        state = self._load_state()
+        return (state.get('source_hash') == source_hash and os.path.exists(self.path)
+                and state.get('output_sha1') == file_sha1(self.path))
+
+    def update(self, generated: list, source_hash: str) -> dict:
+        """Слить generated в файл; файл пишется (атомарно), только если есть изменения."""
+        state = self._load_state()
+        merged, changes = merge_equips(load_equips(self.path), generated, set(state.get('generated', [])))
+        changed = changes['added'] or changes['removed'] or changes['changed'] or not os.path.exists(self.path)
+        if changed:
+            _write_json_atomic(self.path, {"equips": merged}, indent=4)
+            if self.report_path and (changes['added'] or changes['removed'] or changes['changed']):
+                with open(self.report_path, 'a', encoding='utf-8') as f:
+                    f.write(f"=== {datetime.datetime.now().isoformat(timespec='seconds')} {self.path}\n")
+                    f.write('\n'.join(format_report(changes)) + '\n')
+        changes['written'] = bool(changed)
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        _write_json_atomic(self.state_path, {
+            'source_hash': source_hash,
+            'output_sha1': file_sha1(self.path),
+            'generated': sorted({equip['eq_name'] for equip in generated}),
+        })
+        return changes
+
+
+def _write_json_atomic(path: str, data, indent=None) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, path)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*
+# Единый импорт оборудования из ECS7 (SQLite FlsaProDb) и ECS8 (Points.xlsx)
+#
+# Каждый источник описывается адаптером (SourceAdapter), адаптеры
+# выполняются параллельно в отдельных процессах. Результаты сливаются по
+# eq_name: одинаковые записи из разных источников склеиваются, разные адреса
+# одного тега помечаются как конфликт (в файл идёт запись первого источника).
+# Записи проверяются и сливаются с существующим equips.json (equips_merge),
+# в конце печатается время по каждому источнику.
+#
+# Запуск из каталога utils:
+#     python import_equips.py -o ../equips.json
+#     python import_equips.py --no-ecs8 --ecs7-pattern MAINT%_MH
+#
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from equips_merge import EQUIP_FIELDS, EquipsFile, format_report, sources_hash
+
+_PRG_DIR = Path(__file__).parent.absolute()
+_RES_DIR = _PRG_DIR / 'resources'
+
+REPORT_LINES = 20  # строк отчёта об изменениях в консоли
+
+
+class SourceAdapter(object):
+    """Источник тегов: файлы, параметры (для хэша) и загрузка списка equips.
+
+    source_files() вызывается в основном процессе и не должен открывать
+    источник; вся тяжёлая работа — в load(), в процессе-исполнителе.
+    """
+
+    name = ''
+    hashes = None  # путь -> SHA-1 файлов источника, посчитанные для sources_hash
+
+    def source_files(self) -> list:
+        return []
+
+    def params(self) -> tuple:
+        return ()
+
+    def load(self) -> tuple:
+        """Возвращает (equips, problems, timings) — timings: этап -> секунды."""
+        raise NotImplementedError
+
+    def run(self) -> dict:
+        start_time = time.perf_counter()
+        equips, problems, timings = self.load()
+        timings['total'] = time.perf_counter() - start_time
+        return {'source': self.name, 'equips': equips, 'problems': problems, 'timings': timings}
+
+
+class ECS7Adapter(SourceAdapter):
+    """ECS7: базы SdrPoint30/SdrSimS5Config30; PLC по номеру (_PLCNAME), адрес — InputWord + 16."""
+
+    name = 'ecs7'
+
+    def __init__(self, pattern='MAINT%_MH', db_dir=None, only_a_point=True):
+        self.pattern = pattern
+        self.db_dir = db_dir
+        self.only_a_point = only_a_point
+
+    def _db_dir(self) -> Path:
+        from ecs7tags2equips import _TAG_DB_DIR
+        return Path(self.db_dir) if self.db_dir else _TAG_DB_DIR
+
+    def source_files(self) -> list:
+        from ecs7tags2equips import DBHelper
+        return DBHelper.source_files(self._db_dir())
+
+    def params(self) -> tuple:
+        return self.name, self.pattern, self.only_a_point
+
+    def load(self) -> tuple:
+        from ecs7tags2equips import DBHelper
+        from tag_export import tag_to_equip
+        from tag_model import TagRecord
+
+        # Проверка и перестройка поискового индекса — здесь, параллельно с другими источниками
+        db = DBHelper(self._db_dir())
+        try:
+            rows = db.get_tag(self.pattern, self.only_a_point)
+            start_time = time.perf_counter()
+            equips = [tag_to_equip(TagRecord(row, db.get_conv_alg_name(row[4]), db.get_blk_alg_name(row[6])))
+                      for row in rows]
+            db.timings['build'] = time.perf_counter() - start_time
+            return equips, [], dict(db.timings)
+        finally:
+            db.close()
+
+
+class ECS8Adapter(SourceAdapter):
+    """ECS8: Points.xlsx; PLC — первые 3 символа IOType_0, адрес — IOType_3 + 16."""
+
+    name = 'ecs8'
+
+    def __init__(self, xlsx_path=None, cache_dir=None):
+        self.xlsx_path = str(xlsx_path or _RES_DIR / 'Points.xlsx')
+        self.cache_dir = cache_dir  # None — общий кэш ecs8tags2equips.CACHE_DIR
+
+    def source_files(self) -> list:
+        return [self.xlsx_path]
+
+    def params(self) -> tuple:
+        from ecs8tags2equips import COLUMNS, DB_ADDR_OFFSET, FILTER_REGEX
+        return self.name, COLUMNS, FILTER_REGEX, DB_ADDR_OFFSET
+
+    def load(self) -> tuple:
+        from ecs8tags2equips import CACHE_DIR, build_equips, load_columns
+
+        start_time = time.perf_counter()
+        data, cached = load_columns(self.xlsx_path, cache_dir=self.cache_dir or CACHE_DIR,
+                                    sha1=(self.hashes or {}).get(self.xlsx_path))
+        timings = {'read_cache' if cached else 'read_xlsx': time.perf_counter() - start_time}
+        start_time = time.perf_counter()
+        equips, bad_rows = build_equips(data)
+        timings['build'] = time.perf_counter() - start_time
+        problems = [f"строка {row['row']}: {row['Designation']}: {row['error']}"
+                    for row in bad_rows.to_dict('records')]
+        return equips, problems, timings
+
+
+def _run_adapter(adapter: SourceAdapter) -> dict:
+    return adapter.run()
+
+
+def validate_equip(equip: dict) -> str:
+    """Текст ошибки или '' для корректной записи equips.json."""
+    if not isinstance(equip.get('eq_name'), str) or not equip['eq_name'].strip():
+        return "пустой eq_name"
+    if not isinstance(equip.get('plc_name'), str) or not equip['plc_name']:
+        return "нет plc_name"
+    for field in ('db_num', 'db_addr'):
+        value = equip.get(field)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            return f"некорректный {field}: {value!r}"
+    return ''
+
+
+def merge_sources(results: list) -> tuple:
+    """Слить результаты источников (в порядке приоритета) по eq_name.
+
+    Возвращает (equips, conflicts, invalid): conflicts — (eq_name, [(источник,
+    (plc_name, db_num, db_addr)), ...]) для тегов с разными адресами (в том
+    числе внутри одного источника), invalid — (источник, eq_name, ошибка).
+    """
+    merged = {}
+    origins = {}  # eq_name -> {(источник, адрес): None} в порядке появления
+    invalid = []
+    for result in results:
+        for equip in result['equips']:
+            error = validate_equip(equip)
+            if error:
+                invalid.append((result['source'], equip.get('eq_name'), error))
+                continue
+            equip = {'eq_name': equip['eq_name'], **{field: equip[field] for field in EQUIP_FIELDS}}
+            address = tuple(equip[field] for field in EQUIP_FIELDS)
+            origins.setdefault(equip['eq_name'], {})[(result['source'], address)] = None
+            merged.setdefault(equip['eq_name'], equip)
+    conflicts = [(name, list(sources)) for name, sources in origins.items()
+                 if len({address for _, address in sources}) > 1]
+    return list(merged.values()), conflicts, invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Импорт оборудования из ECS7 и ECS8 в один equips.json')
+    parser.add_argument('-o', '--output', default='equips.json', help='файл equips.json (по умолчанию в текущем)')
+    parser.add_argument('--ecs7-pattern', default='MAINT%_MH', help='шаблон тегов ECS7 (LIKE)')
+    parser.add_argument('--ecs7-db-dir', help='каталог баз FlsaProDb')
+    parser.add_argument('--xlsx', help='Points.xlsx ECS8')
+    parser.add_argument('--no-ecs7', action='store_true')
+    parser.add_argument('--no-ecs8', action='store_true')
+    parser.add_argument('--processes', type=int, help='процессов (по умолчанию по числу источников)')
+    args = parser.parse_args()
+
+    adapters = []
+    if not args.no_ecs7:
+        adapters.append(ECS7Adapter(args.ecs7_pattern, args.ecs7_db_dir))
+    if not args.no_ecs8:
+        adapters.append(ECS8Adapter(args.xlsx))
+    if not adapters:
+        parser.error('не выбран ни один источник')
+
+    for adapter in list(adapters):
+        missing = [path for path in adapter.source_files() if not Path(path).is_file()]
+        if missing:
+            print(f"{adapter.name}: нет файла {missing[0]}, источник пропущен")
+            adapters.remove(adapter)
+    if not adapters:
+        print("ОШИБКА: нет ни одного доступного источника", file=sys.stderr)
+        return 2
+
+    start_time = time.perf_counter()
+    equips_file = EquipsFile(args.output, _PRG_DIR / 'cache' / (Path(args.output).name + '.import.state.json'),
+                             os.path.splitext(args.output)[0] + '_changes.txt')
+    hashes = {}
+    source_hash = sources_hash([path for adapter in adapters for path in adapter.source_files()],
+                               [adapter.params() for adapter in adapters], hashes)
+    if equips_file.is_current(source_hash):
+        print(f"Источники не изменились, {args.output} актуален")
+        return 0
+
+    for adapter in adapters:
+        adapter.hashes = hashes
+    with ProcessPoolExecutor(max_workers=args.processes or len(adapters)) as pool:
+        results = list(pool.map(_run_adapter, adapters))
+
+    equips, conflicts, invalid = merge_sources(results)
+    for result in results:
+        timings = ', '.join(f"{stage} {seconds:.2f} с" for stage, seconds in result['timings'].items())
+        print(f"{result['source']}: {len(result['equips'])} записей, ошибок {len(result['problems'])} ({timings})")
+        for problem in result['problems'][:REPORT_LINES]:
+            print(f"  {problem}")
+    for source, name, error in invalid:
+        print(f"ПРОПУЩЕНО {source}: {name}: {error}")
+    for name, sources in conflicts:
+        print(f"КОНФЛИКТ {name}: " + '; '.join(f"{source} PLC {plc} DB{db_num}.DBD{db_addr}"
+                                              for source, (plc, db_num, db_addr) in sources))
+
+    changes = equips_file.update(equips, source_hash)
+    report = format_report(changes)
+    print('\n'.join(report[:REPORT_LINES + 1]))
+    if len(report) > REPORT_LINES + 1:
+        print(f"... полный список в {equips_file.report_path}")
+    print(f"Итого {len(equips)} записей, конфликтов {len(conflicts)}, за {time.perf_counter() - start_time:.2f} с")
+    return 1 if conflicts or invalid else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*
+# Постоянный индекс тег -> мнемосхемы ECS (SQLite)
+#
+# Для каждого файла мнемосхемы хранятся mtime, размер и SHA-1. При обновлении
+# заново сканируются только новые и изменённые файлы (по размеру/mtime, а
+# если они изменились — по хэшу), записи удалённых файлов стираются. Индекс
+# помнит, какие теги в нём искались: для новых тегов неизменённые файлы
+# сканируются только на эти теги.
+#
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+from equips_merge import file_sha1
+from mimic_scanner import iter_scan
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hits (
+    tag TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (tag, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hits_name ON hits (name);
+"""
+
+logger = logging.getLogger()
+
+
+class MimicIndex(object):
+    """Инвертированный индекс тег -> имена файлов мнемосхем."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.executescript(_SCHEMA)
+        self.stats = {}  # итоги последнего update()
+
+    def update(self, tags, files, processes=None, on_file=None) -> dict:
+        """Привести индекс в соответствие с файлами files для тегов tags.
+
+        on_file(path) вызывается после каждого просканированного файла.
+        Возвращает статистику: сколько файлов новых, изменённых, удалённых,
+        просканированных и время.
+        """
+        start_time = time.perf_counter()
+        files = {Path(path).name: Path(path) for path in files}
+        tags = list(dict.fromkeys(tags))
+        known = {name: (mtime_ns, size, sha1) for name, mtime_ns, size, sha1 in
+                 self._conn.execute("SELECT name, mtime_ns, size, sha1 FROM files")}
+        indexed_tags = {tag for tag, in self._conn.execute("SELECT tag FROM tags")}
+        new_tags = [tag for tag in tags if tag not in indexed_tags]
+
+        deleted = [name for name in known if name not in files]
+        stamps = {}  # name -> (mtime_ns, size, sha1) для новых и изменённых файлов
+        rescan = []
+        for name, path in files.items():
+            stat = path.stat()
+            old = known.get(name)
+            if old is not None and old[:2] == (stat.st_mtime_ns, stat.st_size):
+                continue
+            sha1 = file_sha1(path)
+            stamps[name] = (stat.st_mtime_ns, stat.st_size, sha1)
+            # Файл пересохранён без изменений — только обновляем отметку
+            if old is None or old[2] != sha1:
+                rescan.append(name)
+        rescan_names = set(rescan)
+        unchanged = [name for name in files if name not in rescan_names]
+
+        with self._conn:
+            self._conn.executemany("DELETE FROM hits WHERE name = ?", [(name,) for name in deleted + rescan])
+            self._conn.executemany("DELETE FROM files WHERE name = ?", [(name,) for name in deleted])
+            self._conn.executemany("INSERT OR IGNORE INTO tags VALUES (?)", [(tag,) for tag in new_tags])
+            # Изменённые файлы — на все теги индекса, остальные — только на новые теги
+            all_tags = list(indexed_tags) + new_tags
+            for scan_tags, names in ((all_tags, rescan), (new_tags, unchanged if new_tags else [])):
+                if not names:
+                    continue
+                for path, found in iter_scan(scan_tags, [files[name] for name in names], processes):
+                    self._conn.executemany("INSERT OR IGNORE INTO hits VALUES (?, ?)",
+                                           [(tag, path.name) for tag in found])
+                    if on_file is not None:
+                        on_file(path)
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                                   [(name,) + stamp for name, stamp in stamps.items()])
+        self.stats = {
+            'files': len(files),
+            'new': sum(1 for name in rescan if name not in known),
+            'changed': sum(1 for name in rescan if name in known),
+            'deleted': len(deleted),
+            'new_tags': len(new_tags),
+            'scanned': len(rescan) + (len(unchanged) if new_tags else 0),
+            'time': time.perf_counter() - start_time,
+        }
+        logger.info(f"Mimic index update: {self.stats}")
+        return self.stats
+
+    def mimics(self, tag) -> list:
+        return [name for name, in self._conn.execute("SELECT name FROM hits WHERE tag = ? ORDER BY name", (tag,))]
+
+    def tags_to_mimics(self, tags) -> dict:
+        """tag -> отсортированный список мнемосхем для каждого из tags."""
+        result = {tag: [] for tag in tags}
+        for tag, name in self._conn.execute("SELECT tag, name FROM hits ORDER BY tag, name"):
+            if tag in result:
+                result[tag].append(name)
+        return result
+
+    def tags_without_mimic(self, tags) -> list:
+        """Теги из tags, которых нет ни на одной мнемосхеме."""
+        used = {tag for tag, in self._conn.execute("SELECT DISTINCT tag FROM hits")}
+        return [tag for tag in tags if tag not in used]
+
+    def close(self):
+        self._conn.close()
+
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*
+# Поиск тегов на мнемосхемах ECS за один проход по каждому файлу
+#
+# Все теги ищутся одновременно автоматом Ахо — Корасик. Тег состоит только из
+# символов своего алфавита (буквы, цифры, '_'), поэтому вхождение тега всегда
+# лежит внутри непрерывной последовательности таких символов. Автомат
+# прогоняется только по уникальным последовательностям файла длиной не меньше
+# самого короткого тега, сами последовательности выделяет re (на стороне C).
+# Файлы читаются через mmap и раздаются по процессам.
+#
+# Поиск побайтный, а кодировка мнемосхем не задана, поэтому ищутся только
+# ASCII-теги; теги с другими символами пропускаются с предупреждением.
+#
+import logging
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Файлов на одну задачу процесса: меньше накладных расходов на передачу
+_CHUNK_SIZE = 4
+
+logger = logging.getLogger()
+
+
+def searchable_tags(tags) -> list:
+    """Теги, которые можно искать на мнемосхемах (ASCII); о прочих — предупреждение."""
+    tags = list(dict.fromkeys(tag for tag in tags if tag))
+    skipped = [tag for tag in tags if not tag.isascii()]
+    if skipped:
+        logger.warning(f"Не ASCII теги не ищутся на мнемосхемах ({len(skipped)}): {', '.join(skipped[:10])}")
+    return [tag for tag in tags if tag.isascii()]
+
+
+class MimicScanner(object):
+    """Автомат Ахо — Корасик для набора тегов (поиск подстрок, как `tag in text`)."""
+
+    def __init__(self, tags):
+        # Не ASCII теги не ищутся (см. searchable_tags), символы из них не выбрасываются
+        self.tags = [tag for tag in dict.fromkeys(tag for tag in tags if tag) if tag.isascii()]
+        patterns = [tag.encode('ascii') for tag in self.tags]
+        self._goto = [{}]  # состояние -> {байт: состояние}
+        self._fail = [0]
+        self._out = [()]  # состояние -> индексы тегов, заканчивающихся здесь
+        for index, pattern in enumerate(patterns):
+            self._add(pattern, index)
+        self._build_links()
+        alphabet = sorted(set(b''.join(patterns)))
+        min_len = min((len(pattern) for pattern in patterns), default=1)
+        char_class = b''.join(re.escape(bytes([byte])) for byte in alphabet) or b'\x00'
+        self._token_re = re.compile(b'[' + char_class + b']{' + str(max(min_len, 1)).encode() + b',}')
+        self._cache = {}  # последовательность -> найденные в ней индексы тегов
+
+    def _add(self, pattern: bytes, index: int):
+        state = 0
+        for byte in pattern:
+            next_state = self._goto[state].get(byte)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][byte] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+        self._out[state] += (index,)
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for byte, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and byte not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(byte, 0)
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def _match_token(self, token: bytes) -> tuple:
+        found = self._cache.get(token)
+        if found is not None:
+            return found
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = set()
+        state = 0
+        for byte in token:
+            while state and byte not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(byte, 0)
+            if out[state]:
+                matches.update(out[state])
+        found = self._cache[token] = tuple(matches)
+        return found
+
+    def scan_bytes(self, data) -> set:
+        """Индексы тегов (в self.tags), встречающихся в data (bytes или mmap)."""
+        found = set()
+        for token in set(self._token_re.findall(data)):
+            found.update(self._match_token(token))
+        return found
+
+    def scan_file(self, path) -> set:
+        """Теги, встречающиеся в файле; файл читается через mmap."""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return set()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return {self.tags[index] for index in self.scan_bytes(data)}
+
+
+# Автомат процесса-исполнителя: строится один раз в initializer
+_worker_scanner = None
+
+
+def _init_worker(tags):
+    global _worker_scanner
+    _worker_scanner = MimicScanner(tags)
+
+
+def _scan_in_worker(path):
+    return path, _worker_scanner.scan_file(path)
+
+
+def iter_scan(tags, files, processes=None):
+    """Выдаёт (файл, множество найденных тегов) в порядке files.
+
+    processes=1 — без пула процессов (например, для нескольких файлов).
+    """
+    files = list(files)
+    tags = searchable_tags(tags)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(files) <= _CHUNK_SIZE:
+        scanner = MimicScanner(tags)
+        for path in files:
+            yield path, scanner.scan_file(path)
+        return
+    with ProcessPoolExecutor(max_workers=min(processes, len(files)), initializer=_init_worker,
+                             initargs=(tags,)) as pool:
+        yield from pool.map(_scan_in_worker, files, chunksize=_CHUNK_SIZE)
+
+
+def tags_to_mimics(tags, files, processes=None) -> dict:
+    """tag -> список имён файлов мнемосхем (в порядке files), на которых он есть."""
+    mimics = {tag: [] for tag in tags}
+    for path, found in iter_scan(tags, files, processes):
+        for tag in found:
+            mimics[tag].append(os.path.basename(path))
+    return mimics
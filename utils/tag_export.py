@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*
+# Потоковая выгрузка тегов ECS в несколько форматов за один проход
+#
+# Каждый формат пишется своим писателем построчно во временный файл, который
+# после успешного завершения атомарно заменяет целевой. Теги принимаются как
+# итератор и не собираются в памяти, поэтому расход памяти не зависит от
+# количества точек.
+#
+import csv
+import json
+import os
+
+import yaml
+
+from equips_merge import DB_ADDR_OFFSET
+
+CSV_FIELDS = ['Id', 'Tag', 'DescEng', 'DescRus', 'Groups', 'PLC', 'PLC_INP', 'Algorithms', 'Mimics']
+
+
+def tag_to_equip(tag) -> dict:
+    """Запись equips.json для тега."""
+    return {
+        "eq_name": tag["Tag"],
+        "plc_name": tag["PLC"]["PLCNo"],
+        "db_num": tag["PLC"]["Input"]["Block"],
+        "db_addr": int(tag["PLC"]["Input"]["Word"] or 0) + DB_ADDR_OFFSET,
+    }
+
+
+class _Writer(object):
+    """Запись во временный файл рядом с целевым; commit() заменяет целевой файл."""
+
+    encoding = None  # кодировка по умолчанию, как у прежних save_*
+    newline = None
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.tmp_path = self.path + '.tmp'
+        self.count = 0
+        self.file = open(self.tmp_path, 'w', encoding=self.encoding, newline=self.newline)
+        self.begin()
+
+    def begin(self):
+        pass
+
+    def write(self, tag):
+        raise NotImplementedError
+
+    def end(self):
+        pass
+
+    def commit(self):
+        self.end()
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp_path)
+
+
+class CsvWriter(_Writer):
+    newline = ''
+
+    def begin(self):
+        self.writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, tag):
+        self.writer.writerow(tag)
+
+
+class YamlWriter(_Writer):
+    def write(self, tag):
+        # Элемент верхнего списка: склейка даёт тот же документ, что yaml.dump(всего списка)
+        self.file.write(yaml.dump([tag], default_flow_style=False, indent=3, sort_keys=False, allow_unicode=True))
+
+    def end(self):
+        if not self.count:
+            self.file.write('[]\n')
+
+
+class TelegrafWriter(_Writer):
+    """Перечень OPC тегов для telegraf.conf."""
+    newline = ''
+
+    def begin(self):
+        self.file.write("   nodes = [\n")
+
+    def write(self, tag):
+        self.file.write(f'     {{name="{tag["Tag"]} {tag["DescEng"]}", namespace="1", identifier_type="s", '
+                        f'identifier="t|{tag["Tag"]}"}},\n')
+
+    def end(self):
+        self.file.write("]")
+
+
+class EquipsJsonWriter(_Writer):
+    """equips.json в том же виде, что json.dump({"equips": [...]}, indent=4)."""
+    encoding = 'utf-8'
+
+    def begin(self):
+        self.file.write('{\n    "equips": [')
+
+    def write(self, tag):
+        item = json.dumps(tag_to_equip(tag), ensure_ascii=False, indent=4).replace('\n', '\n        ')
+        self.file.write(('\n        ' if not self.count else ',\n        ') + item)
+
+    def end(self):
+        self.file.write('\n    ]\n}' if self.count else ']\n}')
+
+
+class NdjsonWriter(_Writer):
+    encoding = 'utf-8'
+
+    def write(self, tag):
+        self.file.write(json.dumps(tag, ensure_ascii=False, default=str) + '\n')
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'yaml': YamlWriter,
+    'telegraf': TelegrafWriter,
+    'equips': EquipsJsonWriter,
+    'ndjson': NdjsonWriter,
+}
+
+
+def export_tags(tags, targets: dict) -> dict:
+    """Записать теги во все форматы за один проход.
+
+    targets — {формат из WRITERS: путь}. Возвращает {формат: число тегов}.
+    При ошибке временные файлы удаляются, прежние файлы не меняются.
+    """
+    writers = {}
+    try:
+        for fmt, path in targets.items():
+            writers[fmt] = WRITERS[fmt](path)
+        for tag in tags:
+            for writer in writers.values():
+                writer.write(tag)
+                writer.count += 1
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    for writer in writers.values():
+        writer.commit()
+    return {fmt: writer.count for fmt, writer in writers.items()}
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*
+# Компактное представление точки ECS
+#
+# Вместо вложенного словаря на каждую точку хранится запись с __slots__.
+# Повторяющиеся строки (группа, PLC, тип памяти, алгоритмы) интернируются и
+# занимают память один раз на всю выборку. Вложенный словарь прежнего вида
+# строится только по запросу (as_dict) — для выгрузки в YAML/CSV/JSON.
+#
+from sys import intern
+
+_PLCNAME = {0: 'spare', 1: '991', 2: '992', 3: '990'}
+_PLCMEMTYP = {
+    '17': '16 Bit',
+    '21': '16 Bit',
+    '22': '32 Bit',
+    '23': 'Float',
+    '26': '16 Bit/Time',
+    '28': 'Float/Stat/Timer',
+    '29': '8 Bit',
+    '30': 'Flt/Trig/Sts',
+}
+
+
+def _interned(value):
+    return intern(value) if isinstance(value, str) else value
+
+
+class TagRecord(object):
+    """Точка ECS. Ключи прежнего словаря доступны как tag['Tag'], tag['PLC'] и т.д."""
+
+    __slots__ = ('id', 'tag', 'group', 'desc_eng', 'desc_rus', 'conv_alg', 'calc_alg', 'block_alg',
+                 'plc_no', 'fc', 'in_type', 'in_block', 'in_word', 'in_bit',
+                 'out_type', 'out_block', 'out_word', 'out_bit', 'mimics')
+
+    def __init__(self, row, conv_alg_name, block_alg_name):
+        """row — строка DBHelper.get_tag, *_alg_name — названия алгоритмов из справочников."""
+        self.id = row[0]
+        self.tag = row[1]
+        self.desc_eng = _interned(row[2])
+        self.desc_rus = intern(str(row[3]))
+        self.conv_alg = intern(f"{row[4]} {conv_alg_name}")
+        self.calc_alg = row[5]
+        self.block_alg = intern(f"{row[6]} {block_alg_name}")
+        self.group = _interned(row[7])
+        self.plc_no = _PLCNAME.get(row[8])
+        self.in_type = _PLCMEMTYP.get(row[9])
+        self.in_block, self.in_word, self.in_bit = row[10], row[11], row[12]
+        self.out_type = _PLCMEMTYP.get(row[13])
+        self.out_block, self.out_word, self.out_bit = row[14], row[15], row[16]
+        self.fc = row[17]
+        self.mimics = ''
+
+    @property
+    def plc_inp(self) -> str:
+        return f"%DB{self.in_block}.DBD{self.in_word}"
+
+    def plc_view(self) -> dict:
+        return {"PLCNo": self.plc_no,
+                "FC": self.fc,
+                "Input": {"Type": self.in_type, "Block": self.in_block, "Word": self.in_word, "Bit": self.in_bit},
+                "Output": {"Type": self.out_type, "Block": self.out_block, "Word": self.out_word,
+                           "Bit": self.out_bit},
+                }
+
+    def algorithms_view(self) -> dict:
+        return {"ConvAlg": self.conv_alg, "CalcAlg": self.calc_alg, "BlockAlg": self.block_alg}
+
+    def as_dict(self) -> dict:
+        """Вложенный словарь в прежнем формате TagsHelper (для экспорта)."""
+        return {
+            "Id": self.id, "Tag": self.tag, "Groups": self.group, "DescEng": self.desc_eng, "DescRus": self.desc_rus,
+            "Algorithms": self.algorithms_view(),
+            "PLC": self.plc_view(),
+            "PLC_INP": self.plc_inp,
+            "Mimics": self.mimics,
+        }
+
+    def __getitem__(self, key):
+        getter = _VIEWS.get(key)
+        if getter is None:
+            raise KeyError(key)
+        return getter(self)
+
+    def __setitem__(self, key, value):
+        if key != 'Mimics':
+            raise KeyError(key)
+        self.mimics = value
+
+    def get(self, key, default=None):
+        return self[key] if key in _VIEWS else default
+
+    def __repr__(self):
+        return f"TagRecord({self.tag!r})"
+
+
+_VIEWS = {
+    'Id': lambda record: record.id,
+    'Tag': lambda record: record.tag,
+    'Groups': lambda record: record.group,
+    'DescEng': lambda record: record.desc_eng,
+    'DescRus': lambda record: record.desc_rus,
+    'Algorithms': TagRecord.algorithms_view,
+    'PLC': TagRecord.plc_view,
+    'PLC_INP': lambda record: record.plc_inp,
+    'Mimics': lambda record: record.mimics,
+}
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*
+# Поисковая база тегов ECS: FTS5 (trigram) поверх заранее соединённой таблицы точек
+#
+# Исходные базы ECS не изменяются: соединение PointConfig, Groups и
+# sim.Points выполняется один раз и сохраняется в отдельный файл SQLite
+# вместе с полнотекстовым индексом по коду точки и описаниям. Триграммный
+# индекс позволяет выполнять LIKE с подстрокой ('%MAINT%_MH%') без полного
+# перебора. База перестраивается, когда меняются исходные файлы (mtime/размер).
+#
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+# Столбцы выборки в порядке строк DBHelper.get_tag (без двух повторов в конце)
+POINT_COLUMNS = ('PointId', 'PointCode', 'DefaultText', 'LocalText', 'ConvAlg', 'CalcAlg', 'BlockAlg',
+                 'GroupCode', 'PLCNo', 'InputType', 'InputBlock', 'InputWord', 'InputBit',
+                 'OutputType', 'OutputBlock', 'OutputWord', 'OutputBit', 'ParameterBlock')
+
+_SCHEMA = f"""
+CREATE TABLE points (
+    id INTEGER PRIMARY KEY,
+    {', '.join(POINT_COLUMNS)}
+);
+CREATE INDEX points_code ON points (PointCode);
+CREATE VIRTUAL TABLE points_fts USING fts5(
+    PointCode, DefaultText, LocalText,
+    content='points', content_rowid='id', tokenize='trigram'
+);
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Как в исходном запросе get_tag: без точек уставок _SPM/_SPA
+_EXCLUDE = "PointCode NOT LIKE '%_SPM%' AND PointCode NOT LIKE '%_SPA%'"
+
+logger = logging.getLogger()
+
+
+def sources_stamp(sources) -> str:
+    """Отметка исходных файлов: имя, mtime_ns и размер каждого."""
+    parts = []
+    for source in sources:
+        stat = os.stat(source)
+        parts.append(f"{Path(source).name}:{stat.st_mtime_ns}:{stat.st_size}")
+    return ';'.join(parts)
+
+
+class TagSearchIndex(object):
+    """Поисковая база тегов в отдельном файле SQLite."""
+
+    def __init__(self, path, sources):
+        self.path = Path(path)
+        self.sources = list(sources)
+        self._conn = None
+
+    def is_fresh(self) -> bool:
+        if not self.path.is_file():
+            return False
+        try:
+            conn = sqlite3.connect(f"{self.path.as_uri()}?mode=ro", uri=True)
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'sources'").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return False
+        return row is not None and row[0] == sources_stamp(self.sources)
+
+    def build(self, rows) -> float:
+        """Создать базу заново из строк POINT_COLUMNS. Файл заменяется атомарно."""
+        start_time = time.perf_counter()
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        if tmp_path.exists():
+            tmp_path.unlink()
+        conn = sqlite3.connect(str(tmp_path))
+        try:
+            conn.executescript(_SCHEMA)
+            placeholders = ', '.join('?' * len(POINT_COLUMNS))
+            with conn:
+                conn.executemany(f"INSERT INTO points ({', '.join(POINT_COLUMNS)}) VALUES ({placeholders})", rows)
+                conn.execute("INSERT INTO points_fts(points_fts) VALUES ('rebuild')")
+                conn.execute("INSERT INTO meta VALUES ('sources', ?)", (sources_stamp(self.sources),))
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        os.replace(tmp_path, self.path)
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"Tag search index built: {self.path} ({elapsed:.2f} s)")
+        return elapsed
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(f"{self.path.as_uri()}?mode=ro", uri=True)
+        return self._conn
+
+    def find(self, pattern, only_a_point=False) -> list:
+        """Точки, код которых соответствует LIKE '%pattern%', в виде строк POINT_COLUMNS."""
+        sql_apoint = "AND PointId > 0 " if only_a_point is True else ""
+        sql = f"SELECT {', '.join(POINT_COLUMNS)} FROM points " \
+              "WHERE id IN (SELECT rowid FROM points_fts WHERE PointCode LIKE ?) " \
+              f"{sql_apoint}AND {_EXCLUDE} ORDER BY id"
+        return self._db().execute(sql, (f"%{pattern}%",)).fetchall()
+
+    def search(self, text, limit=100) -> list:
+        """Точки, у которых text встречается в коде или описаниях (без учёта регистра)."""
+        # Строка в кавычках — одна фраза FTS5; для trigram это поиск подстроки
+        query = '"' + str(text).replace('"', '""') + '"'
+        sql = f"SELECT {', '.join('p.' + column for column in POINT_COLUMNS)} " \
+              "FROM points_fts JOIN points p ON p.id = points_fts.rowid " \
+              "WHERE points_fts MATCH ? ORDER BY rank LIMIT ?"
+        return self._db().execute(sql, (query, limit)).fetchall()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
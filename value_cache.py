@@ -0,0 +1,78 @@
+"""Кэш последних прочитанных из PLC значений DINT.
+
+Ключ — (plc_name, db_num, db_addr). Значение считается свежим в течение
+ttl секунд; при переполнении вытесняются давно не использованные записи.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_TTL = 300.0  # секунд, после которых значение считается устаревшим
+CACHE_SIZE = 50000
+
+
+def cache_key(equip: dict) -> tuple:
+    return equip.get('plc_name', ''), equip.get('db_num'), equip.get('db_addr')
+
+
+def format_age(age: float) -> str:
+    """Возраст значения для таблицы: <1 мин / 5 мин / 3 ч.
+
+    Точность до минуты: текст ячейки меняется редко, и строки не приходится
+    перерисовывать на каждом опросе.
+    """
+    if age < 60:
+        return "<1 мин"
+    if age < 3600:
+        return f"{age / 60:.0f} мин"
+    return f"{age / 3600:.0f} ч"
+
+
+class ValueCache:
+    """LRU-кэш значений с TTL."""
+
+    def __init__(self, ttl: float = CACHE_TTL, max_size: int = CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = OrderedDict()  # key -> (value, время чтения)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def put(self, equip: dict, value: int, timestamp: float = None) -> None:
+        key = cache_key(equip)
+        with self._lock:
+            self._data[key] = (value, timestamp if timestamp is not None else time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def get(self, equip: dict):
+        """(value, age) или None, если значения нет. Устаревшие тоже возвращаются."""
+        key = cache_key(equip)
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            self._data.move_to_end(key)
+        value, timestamp = item
+        return value, time.time() - timestamp
+
+    def get_fresh(self, equip: dict):
+        """Значение, если оно моложе ttl, иначе None."""
+        item = self.get(equip)
+        if item is None or item[1] > self.ttl:
+            return None
+        return item[0]
+
+    def is_stale(self, age: float) -> bool:
+        return age > self.ttl
+
+    def invalidate(self, equip: dict) -> None:
+        with self._lock:
+            self._data.pop(cache_key(equip), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
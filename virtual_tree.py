@@ -0,0 +1,243 @@
+"""Виртуальная таблица на ttk.Treeview.
+
+В Treeview создаются только строки, попадающие в видимое окно; полоса
+прокрутки и колесо мыши управляют смещением окна в полном списке. При
+смене списка или прокрутке строки окна сравниваются с уже созданными:
+лишние удаляются, недостающие вставляются, совпадающие остаются на месте.
+Item id строки — имя вместе с адресом тега (row_key): уникальность eq_name
+в equips.json не гарантируется.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+HEADING_HEIGHT = 24
+
+
+def row_name(equip: dict) -> str:
+    return str(equip.get('eq_name', ''))
+
+
+def row_key(equip: dict) -> str:
+    """Item id строки: eq_name, plc_name, db_num и db_addr."""
+    return '|'.join(str(equip.get(field, '')) for field in ('eq_name', 'plc_name', 'db_num', 'db_addr'))
+
+
+class VirtualTreeview:
+    """Treeview, показывающий окно из большого отсортированного списка equips.
+
+    row_cells(equip) возвращает (values, tags) строки; on_select(equip)
+    вызывается при выборе строки пользователем.
+    """
+
+    def __init__(self, master, columns, row_cells, on_select=None):
+        self.frame, self.tree, self.scrollbar = self._create_widgets(master, columns)
+        self.row_cells = row_cells
+        self.on_select = on_select
+        self.rows = []
+        self.offset = 0
+        self.visible = 1
+        self.window = {}  # item id -> equip для созданных строк
+        self.rendered = {}  # item id -> выведенные (values, tags)
+        self.selected = None  # выбранный equip (сохраняется, даже если строка прокручена)
+
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<<TreeviewSelect>>', self._on_tree_select)
+        self.tree.bind('<MouseWheel>', self._on_wheel)
+        self.tree.bind('<Button-4>', lambda event: self._scroll_units(-3))
+        self.tree.bind('<Button-5>', lambda event: self._scroll_units(3))
+        for key in ('<Up>', '<Down>', '<Prior>', '<Next>', '<Home>', '<End>'):
+            self.tree.bind(key, self._on_key)
+
+    def _create_widgets(self, master, columns) -> tuple:
+        """(frame, tree, scrollbar) таблицы."""
+        frame = tk.Frame(master)
+        tree = ttk.Treeview(frame, columns=columns, show='headings', selectmode='browse')
+        scrollbar = tk.Scrollbar(frame, orient=tk.VERTICAL, command=self.yview)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        return frame, tree, scrollbar
+
+    # --- Данные ---
+    def set_rows(self, rows: list) -> None:
+        """Показать новый (отсортированный) список; созданные строки переиспользуются."""
+        self.rows = rows
+        self._clamp_offset()
+        self.render()
+
+    def item_equip(self, item):
+        """Equip по item id строки (только для строк в видимом окне)."""
+        return self.window.get(item)
+
+    @property
+    def selected_equip(self):
+        return self.selected
+
+    def select(self, equip) -> None:
+        """Выбрать строку и прокрутить к ней."""
+        position = self._find_row(equip)
+        if position is None:
+            return
+        self.selected = self.rows[position]
+        self._see(position)
+        self.render()
+        if self.on_select:
+            self.on_select(self.selected)
+
+    def refresh(self, equips=None) -> None:
+        """Обновить ячейки созданных строк; Tk вызывается только для изменившихся."""
+        items = list(self.window.items())
+        if equips is not None:
+            keys = {row_key(eq) for eq in equips}
+            items = [(item, equip) for item, equip in items if row_key(equip) in keys]
+        for item, equip in items:
+            self._update_item(item, equip)
+
+    # --- Отрисовка окна ---
+    def render(self) -> None:
+        new_window = {}
+        for equip in self.rows[self.offset:self.offset + self.visible]:
+            key = row_key(equip)
+            item = key
+            # Полные дубли записи в equips.json тоже получают свои строки
+            count = 1
+            while item in new_window:
+                item = f'{key}#{count}'
+                count += 1
+            new_window[item] = equip
+        stale = [item for item in self.window if item not in new_window]
+        if stale:
+            self.tree.delete(*stale)
+            for item in stale:
+                self.rendered.pop(item, None)
+        for position, (item, equip) in enumerate(new_window.items()):
+            if item in self.window:
+                if self.tree.index(item) != position:
+                    self.tree.move(item, '', position)
+                self._update_item(item, equip)
+            else:
+                values, tags = self.row_cells(equip)
+                self.tree.insert('', position, iid=item, values=values, tags=tags)
+                self.rendered[item] = (values, tags)
+        self.window = new_window
+        self._sync_selection()
+        self._update_scrollbar()
+
+    def _update_item(self, item, equip) -> None:
+        cells = self.row_cells(equip)
+        if self.rendered.get(item) == cells:
+            return
+        values, tags = cells
+        self.tree.item(item, values=values, tags=tags)
+        self.rendered[item] = cells
+
+    def _sync_selection(self) -> None:
+        item = None
+        if self.selected is not None:
+            key = row_key(self.selected)
+            item = next((item for item, equip in self.window.items() if row_key(equip) == key), None)
+        current = self.tree.selection()
+        if item is not None:
+            if current != (item,):
+                self.tree.selection_set((item,))
+        elif current:
+            self.tree.selection_set(())
+
+    def _update_scrollbar(self) -> None:
+        total = len(self.rows)
+        if total <= self.visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible) / total)
+
+    # --- Прокрутка ---
+    def _clamp_offset(self) -> None:
+        self.offset = max(0, min(self.offset, len(self.rows) - self.visible))
+
+    def _scroll_to(self, offset: int) -> None:
+        old_offset = self.offset
+        self.offset = offset
+        self._clamp_offset()
+        if self.offset != old_offset:
+            self.render()
+
+    def _scroll_units(self, units: int) -> str:
+        self._scroll_to(self.offset + units)
+        return 'break'
+
+    def _see(self, position: int) -> None:
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.visible:
+            self.offset = position - self.visible + 1
+        self._clamp_offset()
+
+    def yview(self, *args) -> None:
+        """Команда полосы прокрутки: moveto f | scroll n units|pages."""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == 'scroll':
+            step = self.visible if args[2] == 'pages' else 1
+            self._scroll_to(self.offset + int(args[1]) * step)
+
+    def _on_wheel(self, event) -> str:
+        # Windows: delta кратно 120, macOS: небольшие значения
+        units = -event.delta // 120 if abs(event.delta) >= 120 else (-1 if event.delta > 0 else 1)
+        return self._scroll_units(units * 3)
+
+    def _on_configure(self, event) -> None:
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or DEFAULT_ROW_HEIGHT)
+        visible = max(1, (event.height - HEADING_HEIGHT) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self._clamp_offset()
+            self.render()
+
+    # --- Выбор ---
+    def _find_row(self, equip: dict):
+        """Позиция строки в отсортированном списке (двоичный поиск по eq_name, среди тёзок — по адресу)."""
+        name = row_name(equip)
+        key = row_key(equip)
+        low, high = 0, len(self.rows)
+        while low < high:
+            middle = (low + high) // 2
+            if row_name(self.rows[middle]) < name:
+                low = middle + 1
+            else:
+                high = middle
+        while low < len(self.rows) and row_name(self.rows[low]) == name:
+            if row_key(self.rows[low]) == key:
+                return low
+            low += 1
+        return None
+
+    def _on_tree_select(self, event) -> None:
+        selection = self.tree.selection()
+        # Пустой выбор — строка ушла из окна при прокрутке, сам выбор сохраняется
+        if not selection:
+            return
+        equip = self.window.get(selection[0])
+        if equip is None or equip is self.selected:
+            return
+        self.selected = equip
+        if self.on_select:
+            self.on_select(equip)
+
+    def _on_key(self, event) -> str:
+        if not self.rows:
+            return 'break'
+        position = self._find_row(self.selected) if self.selected is not None else None
+        if position is None:
+            position = self.offset - 1 if event.keysym in ('Down', 'Next') else self.offset
+        moves = {
+            'Up': position - 1,
+            'Down': position + 1,
+            'Prior': position - self.visible,
+            'Next': position + self.visible,
+            'Home': 0,
+            'End': len(self.rows) - 1,
+        }
+        self.select(self.rows[max(0, min(moves[event.keysym], len(self.rows) - 1))])
+        return 'break'